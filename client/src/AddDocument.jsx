@@ -85,7 +85,7 @@ export default function AddDocument() {
                 const data = await response.json();
                 toast({
                     title: "Success",
-                    description: "Document added successfully and processed.",
+                    description: "Document uploaded. It will be searchable once indexing finishes.",
                 });
                 console.log("Server Response:", data);
             } else {
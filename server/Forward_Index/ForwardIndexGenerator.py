@@ -4,10 +4,11 @@ import json
 import os
 from pathlib import Path
 from collections import defaultdict
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from nltk import pos_tag
+from concurrent.futures import ProcessPoolExecutor
+
+from Preprocessing.CompactLexicon import CompactLexicon
+from Preprocessing.TextNormalizer import TextNormalizer, get_normalizer
+from Forward_Index.SegmentStore import SegmentStore
 
 # Download necessary NLTK resources
 nltk.download('stopwords', quiet=True)
@@ -16,13 +17,52 @@ nltk.download('wordnet', quiet=True)
 nltk.download('averaged_perceptron_tagger', quiet=True)
 nltk.download('omw-1.4', quiet=True)
 
+# Text normalizer of a worker process, built once by init_worker
+worker_state = {}
+
+
+def preprocess_document(text, normalizer):
+    """
+    Tokenize, lemmatize, and remove stopwords from one document, preserving positions.
+
+    Parameters:
+        text (str): The input text to preprocess.
+        normalizer (TextNormalizer): Shared normalizer holding the lemma cache.
+
+    Returns:
+        list: A list of tuples containing lemmatized words and their positions.
+    """
+    if pd.isnull(text):
+        return []
+    return normalizer.normalize_with_positions(text)
+
+
+def init_worker():
+    """
+    Build the text normalizer of a worker process once, warm-started from the lemma cache file.
+    """
+    worker_state['normalizer'] = get_normalizer()
+
+
+def preprocess_chunk(texts):
+    """
+    Preprocess a chunk of documents inside a worker process.
+
+    Parameters:
+        texts (list): Document texts, in docID order.
+
+    Returns:
+        list: The processed tokens with positions of each document, in the same order.
+    """
+    return [preprocess_document(text, worker_state['normalizer']) for text in texts]
+
 
 class ForwardIndexGenerator:
     """
     A utility class to preprocess text, generate a forward index, and save it to JSON files.
     """
 
-    def __init__(self, dataset_path, lexicon_path, output_json, new_json):
+    def __init__(self, dataset_path, lexicon_path, output_json, new_json, workers=1, segments_dir=None):
         """
         Initialize the generator with dataset, lexicon paths, and output file paths.
 
@@ -31,19 +71,27 @@ class ForwardIndexGenerator:
             lexicon_path (str): Path to the lexicon CSV file.
             output_json (str): Path to save the combined forward index JSON.
             new_json (str): Path to save the newly generated forward index JSON.
+            workers (int): Number of processes used to preprocess documents (default: 1, no pool).
+            segments_dir (str): When set, the forward index is stored as append-only segments in this
+                directory instead of rewriting output_json; an existing output_json is imported once.
         """
         self.dataset_path = dataset_path
         self.lexicon_path = lexicon_path
         self.output_json = output_json
         self.new_json = new_json
+        self.workers = workers
+        self.segment_store = SegmentStore(segments_dir, legacy_index_path=output_json) if segments_dir else None
+        self.first_doc_id = None
+        self.last_doc_id = None
+        self.normalizer = get_normalizer()
         self.vocabulary = self.load_lexicon()
 
     def load_lexicon(self):
         """
-        Load the lexicon from a CSV file and create a word-to-index mapping.
+        Open the lexicon as a memory-mapped CompactLexicon built from the CSV file.
 
         Returns:
-            dict: A dictionary mapping words to their lexicon indices.
+            CompactLexicon: A mapping of words to their lexicon indices.
         """
         if not os.path.exists(self.lexicon_path):
             print(f"Error: The lexicon file was not found at {self.lexicon_path}. Creating a placeholder.")
@@ -52,8 +100,7 @@ class ForwardIndexGenerator:
             sample_lexicon.to_csv(self.lexicon_path, index=False)
             print(f"Placeholder lexicon file created at {self.lexicon_path}.")
 
-        lexicon_df = pd.read_csv(self.lexicon_path)
-        return dict(zip(lexicon_df['Word'], lexicon_df['Index']))
+        return CompactLexicon.load_or_build(self.lexicon_path, Path(self.lexicon_path).with_suffix(".lex"))
 
     def preprocess_with_positions(self, text):
         """
@@ -65,19 +112,27 @@ class ForwardIndexGenerator:
         Returns:
             list: A list of tuples containing lemmatized words and their positions.
         """
-        stop_words = set(stopwords.words('english'))
-        lemmatizer = WordNetLemmatizer()
+        return preprocess_document(text, self.normalizer)
+
+    def preprocess_parallel(self, texts, executor):
+        """
+        Preprocess documents across a pool of worker processes.
+
+        Parameters:
+            texts (list): Document texts, in docID order.
+            executor (ProcessPoolExecutor): Pool whose workers were started with init_worker.
 
-        if pd.isnull(text):
-            return []
+        Returns:
+            list: The processed tokens with positions of each document, in docID order.
+        """
+        chunk_size = max(1, -(-len(texts) // (self.workers * 4)))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
 
-        tokens = word_tokenize(text.lower())
-        processed_tokens_with_positions = []
-        for i, word in enumerate(tokens):
-            if word.isalnum() and word not in stop_words and len(word) > 2:
-                lemma = lemmatizer.lemmatize(word, self.get_wordnet_pos(pos_tag([word])[0][1]) or 'n')
-                processed_tokens_with_positions.append((lemma, i))
-        return processed_tokens_with_positions
+        processed = []
+        # map yields chunk results in submission order, which keeps docIDs in order
+        for chunk_result in executor.map(preprocess_chunk, chunks):
+            processed.extend(chunk_result)
+        return processed
 
     @staticmethod
     def get_wordnet_pos(treebank_tag):
@@ -90,16 +145,7 @@ class ForwardIndexGenerator:
         Returns:
             str: Corresponding WordNet POS tag.
         """
-        if treebank_tag.startswith('J'):
-            return 'a'
-        elif treebank_tag.startswith('V'):
-            return 'v'
-        elif treebank_tag.startswith('N'):
-            return 'n'
-        elif treebank_tag.startswith('R'):
-            return 'r'
-        else:
-            return None
+        return TextNormalizer.get_wordnet_pos(treebank_tag)
 
     def load_existing_forward_index(self):
         """
@@ -113,52 +159,104 @@ class ForwardIndexGenerator:
                 return json.load(json_file)
         return {}
 
-    def generate_forward_index(self):
+    def read_dataset(self, chunksize=None):
+        """
+        Read the dataset, either whole or as an iterator of fixed-size chunks.
+
+        Parameters:
+            chunksize (int): Rows per chunk, or None to read the file in one piece.
+
+        Returns:
+            iterable: DataFrames covering the dataset in row order.
+        """
+        if chunksize:
+            return pd.read_csv(self.dataset_path, chunksize=chunksize)
+        return [pd.read_csv(self.dataset_path)]
+
+    def build_document_entry(self, processed_text_with_positions):
+        """
+        Build the forward index entry of one document.
+
+        Parameters:
+            processed_text_with_positions (list): (lemma, position) tuples of the document.
+
+        Returns:
+            dict: Lexicon index -> {"frequency", "positions"} for the words found in the lexicon.
+        """
+        word_positions = defaultdict(list)
+        for word, pos in processed_text_with_positions:
+            if word in self.vocabulary:
+                word_positions[self.vocabulary[word]].append(pos)
+
+        return {
+            word_index: {
+                "frequency": len(positions),
+                "positions": positions
+            }
+            for word_index, positions in word_positions.items()
+        }
+
+    def generate_forward_index(self, chunksize=None):
         """
         Generate a forward index for the dataset, append it to the existing index, and save to JSON files.
+
+        Parameters:
+            chunksize (int): When set, the dataset is streamed in chunks of this many rows and
+                new entries are written as they are produced, so memory is bounded by the chunk size.
         """
         if not os.path.exists(self.dataset_path):
             raise FileNotFoundError(f"The dataset file was not found at {self.dataset_path}.")
 
-        data = pd.read_csv(self.dataset_path)
-        data.reset_index(drop=True, inplace=True)  # Ensure index is numeric
-        data['forward'] = data['title'] + " " + data['description']
-        data['processed_text_with_positions'] = data['forward'].apply(self.preprocess_with_positions)
-
-        existing_forward_index = self.load_existing_forward_index()
-
-        next_doc_id = max(map(int, existing_forward_index.keys()), default=-1) + 1
-        forward_index = existing_forward_index
-        new_index = {}
-
-        for _, row in data.iterrows():  # Generate forward index for each document
-            word_positions = defaultdict(list)
-            for word, pos in row['processed_text_with_positions']:
-                if word in self.vocabulary:
-                    word_positions[self.vocabulary[word]].append(pos)
-
-            formatted_index = {
-                word_index: {
-                    "frequency": len(positions),
-                    "positions": positions
-                }
-                for word_index, positions in word_positions.items()
-            }
-            forward_index[str(next_doc_id)] = formatted_index
-            new_index[str(next_doc_id)] = formatted_index  # Add to the new file
-            next_doc_id += 1
+        if self.segment_store:
+            # Only the new batch is written; earlier documents stay in their segments
+            forward_index = None
+            next_doc_id = self.segment_store.next_doc_id
+        else:
+            forward_index = self.load_existing_forward_index()
+            next_doc_id = max(map(int, forward_index.keys()), default=-1) + 1
+        self.first_doc_id = next_doc_id
 
         output_dir = os.path.dirname(self.output_json)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Save the combined forward index
-        with open(self.output_json, 'w') as json_file:
-            json.dump(forward_index, json_file, indent=4)
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) if self.workers > 1 else None
+        try:
+            with open(self.new_json, 'w') as new_json_file:
+                new_json_file.write("{")
+                separator = "\n"
+                for chunk in self.read_dataset(chunksize):
+                    texts = (chunk['title'] + " " + chunk['description']).tolist()
+                    if executor and len(texts) > 1:
+                        processed_documents = self.preprocess_parallel(texts, executor)
+                    else:
+                        processed_documents = [self.preprocess_with_positions(text) for text in texts]
+
+                    for processed_text_with_positions in processed_documents:
+                        doc_key = str(next_doc_id)
+                        formatted_index = self.build_document_entry(processed_text_with_positions)
+                        if forward_index is not None:
+                            forward_index[doc_key] = formatted_index
+
+                        # Stream the entry into the new index file instead of holding the whole batch
+                        new_json_file.write(f"{separator}{json.dumps(doc_key)}: {json.dumps(formatted_index)}")
+                        separator = ",\n"
+                        next_doc_id += 1
+                new_json_file.write("\n}")
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.last_doc_id = next_doc_id - 1
+
+        if self.segment_store:
+            self.segment_store.add_segment_file(self.new_json, self.first_doc_id, self.last_doc_id)
+        else:
+            # Save the combined forward index
+            with open(self.output_json, 'w') as json_file:
+                json.dump(forward_index, json_file, indent=4)
+            print(f"Forward index saved to {self.output_json}")
 
-        # Save the new index as a separate file
-        with open(self.new_json, 'w') as new_json_file:
-            json.dump(new_index, new_json_file, indent=4)
+        self.normalizer.save_warm_start()
 
-        print(f"Forward index saved to {self.output_json}")
         print(f"New index saved to {self.new_json}")
@@ -0,0 +1,257 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SegmentStore:
+    """
+    Append-only storage for the forward index.
+
+    Every ingest batch is written as an immutable segment file, and a small manifest records
+    the docID range of each segment and the next free docID. Adjacent small segments can be
+    merged by a compaction pass without rewriting the rest of the index.
+
+    Several stores, in one process or several, may be open on the same directory. Every
+    change re-reads the manifest while holding a lock file in the directory, so segment
+    names are always allocated from the manifest on disk and no change is lost.
+    """
+
+    def __init__(self, segments_dir, legacy_index_path=None):
+        """
+        Open (or create) a segment store.
+
+        Parameters:
+            segments_dir (str): Directory holding the segment files and the manifest.
+            legacy_index_path (str): A single-file forward_index.json to import as the first
+                segment when the store is still empty.
+        """
+        self.segments_dir = segments_dir
+        self.manifest_path = os.path.join(segments_dir, "manifest.json")
+        self.lock_path = os.path.join(segments_dir, "manifest.lock")
+        self.lock = threading.Lock()
+        os.makedirs(segments_dir, exist_ok=True)
+
+        with self.locked():
+            import_legacy = not self.manifest["segments"] and legacy_index_path and os.path.exists(legacy_index_path)
+        if import_legacy:
+            self.import_legacy_index(legacy_index_path)
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the store's thread lock and the cross-process lock file, with self.manifest
+        re-read from disk so changes made by other stores are seen.
+        """
+        with self.lock:
+            with open(self.lock_path, "a+b") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    self.manifest = self.load_manifest()
+                    yield self.manifest
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def load_manifest(self):
+        """
+        Load the manifest, or start an empty one.
+
+        Returns:
+            dict: The manifest with "next_doc_id", "next_segment" and "segments".
+        """
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as file:
+                return json.load(file)
+        return {"next_doc_id": 0, "next_segment": 0, "segments": []}
+
+    def save_manifest(self):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.manifest, file, indent=4)
+        os.replace(temp_path, self.manifest_path)
+
+    @property
+    def next_doc_id(self):
+        with self.locked() as manifest:
+            return manifest["next_doc_id"]
+
+    def new_segment_name(self):
+        # Callers hold locked(), so the counter comes from the manifest on disk
+        name = f"segment_{self.manifest['next_segment']:06d}.json"
+        self.manifest["next_segment"] += 1
+        return name
+
+    def add_segment_file(self, source_path, first_doc_id, last_doc_id):
+        """
+        Register a forward index JSON file holding docIDs first_doc_id..last_doc_id as a new segment.
+
+        Parameters:
+            source_path (str): Forward index JSON file for the batch; it is copied, not moved.
+            first_doc_id (int): First docID in the batch.
+            last_doc_id (int): Last docID in the batch.
+
+        Returns:
+            dict: The manifest entry of the new segment, or None for an empty batch.
+        """
+        if last_doc_id < first_doc_id:
+            return None
+
+        with self.locked():
+            name = self.new_segment_name()
+            segment_path = os.path.join(self.segments_dir, name)
+            temp_path = f"{segment_path}.tmp"
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, segment_path)
+
+            segment = {
+                "name": name,
+                "first_doc_id": first_doc_id,
+                "last_doc_id": last_doc_id,
+                "doc_count": last_doc_id - first_doc_id + 1,
+            }
+            self.manifest["segments"].append(segment)
+            self.manifest["next_doc_id"] = max(self.manifest["next_doc_id"], last_doc_id + 1)
+            self.save_manifest()
+        print(f"Forward index segment {name} written for docIDs {first_doc_id}-{last_doc_id}.")
+        return segment
+
+    def write_segment(self, entries):
+        """
+        Write a batch of forward index entries as a new segment.
+
+        Parameters:
+            entries (dict): docID -> forward index entry, with consecutive docIDs.
+
+        Returns:
+            dict: The manifest entry of the new segment, or None for an empty batch.
+        """
+        if not entries:
+            return None
+        doc_ids = [int(doc_id) for doc_id in entries]
+        temp_path = os.path.join(self.segments_dir, f"incoming-{os.getpid()}-{threading.get_ident()}.json.tmp")
+        with open(temp_path, "w") as file:
+            json.dump(entries, file)
+        try:
+            return self.add_segment_file(temp_path, min(doc_ids), max(doc_ids))
+        finally:
+            os.remove(temp_path)
+
+    def import_legacy_index(self, legacy_index_path):
+        with open(legacy_index_path, "r") as file:
+            entries = json.load(file)
+        print(f"Importing {len(entries)} documents from {legacy_index_path} as the first segment.")
+        self.write_segment(entries)
+
+    def read_segment(self, segment):
+        with open(os.path.join(self.segments_dir, segment["name"]), "r") as file:
+            return json.load(file)
+
+    def iter_documents(self):
+        """
+        Yield (docID, entry) pairs across all segments in docID order, one segment in memory at a time.
+        """
+        next_doc_id = 0
+        while True:
+            with self.locked() as manifest:
+                segments = list(manifest["segments"])
+            try:
+                for segment in segments:
+                    if segment["last_doc_id"] < next_doc_id:
+                        continue
+                    for doc_id, entry in self.read_segment(segment).items():
+                        if int(doc_id) >= next_doc_id:
+                            yield doc_id, entry
+                            next_doc_id = int(doc_id) + 1
+                return
+            except FileNotFoundError:
+                # Another store merged the segment away; carry on from the current manifest
+                continue
+
+    def load_all(self):
+        """
+        Load the whole forward index into one dictionary.
+
+        Returns:
+            dict: docID -> forward index entry.
+        """
+        return dict(self.iter_documents())
+
+    def compact(self, min_docs=5000):
+        """
+        Merge runs of adjacent segments that each hold fewer than min_docs documents.
+
+        Parameters:
+            min_docs (int): Segments at least this large are left untouched.
+
+        Returns:
+            int: Number of segments removed by merging.
+        """
+        with self.locked() as manifest:
+            runs, run = [], []
+            for segment in manifest["segments"]:
+                if segment["doc_count"] < min_docs:
+                    run.append(segment)
+                    continue
+                if len(run) > 1:
+                    runs.append(run)
+                run = []
+            if len(run) > 1:
+                runs.append(run)
+
+        removed = 0
+        for run in runs:
+            # Segments are immutable, so they can be merged without holding the lock
+            try:
+                merged_entries = {}
+                for segment in run:
+                    merged_entries.update(self.read_segment(segment))
+            except FileNotFoundError:
+                # Another store compacted these segments in the meantime
+                continue
+
+            with self.locked() as manifest:
+                run_names = {segment["name"] for segment in run}
+                if len(run_names & {segment["name"] for segment in manifest["segments"]}) != len(run_names):
+                    continue
+                name = self.new_segment_name()
+                segment_path = os.path.join(self.segments_dir, name)
+                temp_path = f"{segment_path}.tmp"
+                with open(temp_path, "w") as file:
+                    json.dump(merged_entries, file)
+                os.replace(temp_path, segment_path)
+
+                merged = {
+                    "name": name,
+                    "first_doc_id": run[0]["first_doc_id"],
+                    "last_doc_id": run[-1]["last_doc_id"],
+                    "doc_count": sum(segment["doc_count"] for segment in run),
+                }
+                segments = self.manifest["segments"]
+                position = next(i for i, segment in enumerate(segments) if segment["name"] in run_names)
+                self.manifest["segments"] = (
+                    segments[:position] + [merged] + [s for s in segments[position:] if s["name"] not in run_names]
+                )
+                self.save_manifest()
+
+            for segment in run:
+                os.remove(os.path.join(self.segments_dir, segment["name"]))
+            removed += len(run) - 1
+
+        if removed:
+            print(f"Compacted forward index: {removed} segments merged away.")
+        return removed
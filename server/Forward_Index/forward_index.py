@@ -1,14 +1,18 @@
+import os
 import pathlib
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 input_path = (pathlib.Path().absolute() /"server" / "data" / "postings.csv")
 lexicon_path = (pathlib.Path().absolute() /"server" / "Preprocessing" /"lexicon.csv")
 output_forward_index_path = (pathlib.Path().absolute() /"server" / "Forward_Index" /"forward_index.json")
 new_forward_index_path = (pathlib.Path().absolute() /"server" / "Forward_Index" /"New_forward_index.json")
+segments_dir = (pathlib.Path().absolute() /"server" / "Forward_Index" /"segments")
 from ForwardIndexGenerator import ForwardIndexGenerator
 
-generator = ForwardIndexGenerator(input_path, lexicon_path, output_forward_index_path, new_forward_index_path)
-generator.generate_forward_index()
+# A full reindex preprocesses documents on every available core
+generator = ForwardIndexGenerator(input_path, lexicon_path, output_forward_index_path, new_forward_index_path, workers=os.cpu_count(), segments_dir=segments_dir)
+generator.generate_forward_index(chunksize=10000)
@@ -0,0 +1,184 @@
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+
+# File layout:
+#   header        MAGIC, word count (uint32), size and mtime (ns) of the lexicon CSV it was built from
+#   word offsets  word count + 1 uint32 offsets into the string table
+#   term IDs      one uint32 per word
+#   string table  the UTF-8 encoded words, sorted by their bytes, back to back
+MAGIC = b"LEX1"
+HEADER = struct.Struct("<4sIQQ")
+
+
+def write_compact_lexicon(lexicon_path, output_path):
+    """
+    Build the compact lexicon file from the lexicon CSV, replacing any existing file atomically.
+
+    Parameters:
+        lexicon_path (str): The lexicon CSV (word, term ID rows).
+        output_path (str): Destination of the compact lexicon.
+
+    Returns:
+        int: Number of words written.
+    """
+    stat = os.stat(lexicon_path)
+    entries = {}
+    with open(lexicon_path, "r", newline="") as file:
+        for row in csv.reader(file):
+            if len(row) == 2 and row[1].isdigit():
+                entries[row[0].encode("utf-8")] = int(row[1])
+
+    words = sorted(entries)
+    offsets = array("I", [0])
+    term_ids = array("I")
+    strings = bytearray()
+    for word in words:
+        strings += word
+        offsets.append(len(strings))
+        term_ids.append(entries[word])
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(words), stat.st_size, stat.st_mtime_ns))
+        file.write(offsets.tobytes())
+        file.write(term_ids.tobytes())
+        file.write(strings)
+    os.replace(temp_path, output_path)
+    return len(words)
+
+
+class CompactLexicon(Mapping):
+    """
+    Read-only word -> term ID lexicon backed by a memory-mapped file.
+
+    Words are binary searched in a sorted string table, so opening the lexicon costs the
+    same whatever the vocabulary size, and every process that maps the file shares one
+    physical copy of it through the page cache. Like the CSV-loaded dictionaries it
+    replaces, lookups return term IDs as strings; term_id() returns the integer.
+    """
+
+    def __init__(self, path):
+        """
+        Open and map a compact lexicon file.
+
+        Parameters:
+            path (str): Path of the file written by write_compact_lexicon.
+        """
+        self.path = str(path)
+        self.file = open(self.path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, source_size, source_mtime = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a compact lexicon: {self.path}")
+        self.source_signature = (source_size, source_mtime)
+
+        # Zero-copy views of the offset and term ID arrays
+        self.view = memoryview(self.data)
+        offsets_start = HEADER.size
+        term_ids_start = offsets_start + 4 * (self.count + 1)
+        self.strings_start = term_ids_start + 4 * self.count
+        self.offsets = self.view[offsets_start:term_ids_start].cast("I")
+        self.term_ids = self.view[term_ids_start:self.strings_start].cast("I")
+
+    @classmethod
+    def load_or_build(cls, lexicon_path, compact_path):
+        """
+        Open the compact lexicon if it was built from the current lexicon CSV, otherwise rebuild it first.
+
+        Parameters:
+            lexicon_path (str): The lexicon CSV file.
+            compact_path (str): Where the compact lexicon is persisted.
+
+        Returns:
+            CompactLexicon: The lexicon.
+        """
+        stat = os.stat(lexicon_path)
+        if os.path.exists(compact_path):
+            try:
+                lexicon = cls(compact_path)
+                if lexicon.source_signature == (stat.st_size, stat.st_mtime_ns):
+                    return lexicon
+                lexicon.close()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Rebuilding unreadable compact lexicon at {compact_path}: {e}")
+
+        count = write_compact_lexicon(lexicon_path, compact_path)
+        print(f"Compact lexicon built for {count} words.")
+        return cls(compact_path)
+
+    def word_at(self, index):
+        start = self.strings_start + self.offsets[index]
+        end = self.strings_start + self.offsets[index + 1]
+        return self.data[start:end]
+
+    def find(self, word):
+        """
+        Binary search the string table for a word.
+
+        Parameters:
+            word (str): The word to look up.
+
+        Returns:
+            int: Index of the word in the table, or -1 if it is not in the lexicon.
+        """
+        key = word.encode("utf-8")
+        low, high = 0, self.count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            candidate = self.word_at(mid)
+            if candidate == key:
+                return mid
+            if candidate < key:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return -1
+
+    def term_id(self, word):
+        """
+        Return the integer term ID of a word, or None if it is not in the lexicon.
+        """
+        index = self.find(word) if isinstance(word, str) else -1
+        return self.term_ids[index] if index >= 0 else None
+
+    def __getitem__(self, word):
+        term_id = self.term_id(word)
+        if term_id is None:
+            raise KeyError(word)
+        return str(term_id)
+
+    def __contains__(self, word):
+        return isinstance(word, str) and self.find(word) >= 0
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.word_at(index).decode("utf-8")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        for view in ("offsets", "term_ids", "view"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+        self.data.close()
+        self.file.close()
+
+    def __reduce__(self):
+        # Worker processes map the same file instead of receiving a copy of it
+        return type(self), (self.path,)
+
+
+if __name__ == "__main__":
+    default_csv = Path(__file__).resolve().parent / "lexicon.csv"
+    source = sys.argv[1] if len(sys.argv) > 1 else default_csv
+    target = sys.argv[2] if len(sys.argv) > 2 else Path(source).with_suffix(".lex")
+    print(f"Wrote {write_compact_lexicon(source, target)} words to '{target}'.")
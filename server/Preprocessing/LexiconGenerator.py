@@ -2,11 +2,11 @@ import pandas as pd
 import re
 import nltk
 from collections import Counter
-from nltk.corpus import stopwords, words
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+from nltk.corpus import words
 from pathlib import Path
 
+from Preprocessing.TextNormalizer import get_normalizer
+
 
 class LexiconGenerator:
     """
@@ -26,8 +26,10 @@ class LexiconGenerator:
         nltk.download("wordnet", quiet=True)
         nltk.download("words", quiet=True)
         self.english_words = set(words.words())
+        self.normalizer = get_normalizer()
 
-    def clean_text(self, text):
+    @staticmethod
+    def clean_text(text):
         """
         Cleans input text by removing special characters, numbers, and short words.
 
@@ -49,6 +51,7 @@ class LexiconGenerator:
         """
         Processes text by tokenizing, lemmatizing, and filtering stopwords.
         Relaxes the reliance on NLTK's `words.words`.
+        Uses the shared TextNormalizer so lexicon entries match the forward index and query lemmas.
 
         Parameters:
             text (str): The text to process.
@@ -56,51 +59,39 @@ class LexiconGenerator:
         Returns:
             list: Processed tokens.
         """
-        stop_words = set(stopwords.words("english"))
-        lemmatizer = WordNetLemmatizer()
-
-        # Tokenize the text
-        tokens = word_tokenize(text)
-
-        # Filter tokens
-        filtered_tokens = [
-            lemmatizer.lemmatize(token.lower())  # Lemmatize and lowercase
-            for token in tokens
-            if token.lower() not in stop_words  # Exclude stopwords
-            and len(token) > 2  # Minimum length 3
-            and token.isalpha()  # Only alphabetic words
-        ]
-
-        return filtered_tokens
+        return self.normalizer.normalize(text)
 
-    def generate(self, input_csv):
+    def generate(self, input_csv, chunksize=None):
         """
         Processes the input CSV file to generate or update a lexicon.
 
         Parameters:
             input_csv (str): Path to the input CSV file.
+            chunksize (int): When set, the CSV is streamed in chunks of this many rows into a
+                running word count, so memory is bounded by the chunk size rather than the corpus.
         """
-        # Load CSV
-        data_frame = pd.read_csv(input_csv, low_memory=False)
-
         # Specify columns to process
         columns_to_process = ["company_name", "description", "title", "location", "skills_desc"]
 
-        # Fill NaN values and clean text
-        for col in columns_to_process:
-            if col in data_frame.columns:
-                data_frame[col] = data_frame[col].fillna("").apply(self.clean_text)
-            else:
-                print(f"Column '{col}' not found in DataFrame. Skipping...")
-
-        # Process text and build vocabulary
-        processed_tokens = []
-        for col in columns_to_process:
-            if col in data_frame.columns:
-                data_frame[col] = data_frame[col].apply(lambda x: self.process_text(x))
-                processed_tokens.extend(data_frame[col].explode().dropna())
-
-        vocabulary_counter = Counter(processed_tokens)
+        # Load CSV, either whole or chunk by chunk
+        if chunksize:
+            chunks = pd.read_csv(input_csv, low_memory=False, chunksize=chunksize)
+        else:
+            chunks = [pd.read_csv(input_csv, low_memory=False)]
+
+        # Clean and process text, counting words as each chunk is read
+        vocabulary_counter = Counter()
+        reported_missing = False
+        for data_frame in chunks:
+            for col in columns_to_process:
+                if col not in data_frame.columns:
+                    if not reported_missing:
+                        print(f"Column '{col}' not found in DataFrame. Skipping...")
+                    continue
+                for text in data_frame[col].fillna(""):
+                    vocabulary_counter.update(self.process_text(self.clean_text(str(text))))
+            reported_missing = True
+
         vocabulary = [word for word, _ in vocabulary_counter.most_common()]
 
         # Set up output path
@@ -123,6 +114,8 @@ class LexiconGenerator:
         if not new_lexicon_df.empty:
             new_lexicon_df.to_csv(output_path, mode="a", header=False, index=False)
 
+        self.normalizer.save_warm_start()
+
         print(f"Unique words added to {self.output_csv}: {len(new_entries)}")
         print("Updated Vocabulary Size:", len(existing_words) + len(new_entries))
 
@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import nltk
+from collections import OrderedDict
+from pathlib import Path
+from nltk import pos_tag
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+nltk.download("punkt", quiet=True)
+nltk.download("stopwords", quiet=True)
+nltk.download("wordnet", quiet=True)
+nltk.download("averaged_perceptron_tagger", quiet=True)
+
+DEFAULT_WARM_START_PATH = Path(__file__).parent.resolve() / "lemma_cache.json"
+
+
+class TextNormalizer:
+    """
+    Shared tokenization and lemmatization used by both the indexing and the query paths.
+
+    POS tags are assigned per token rather than per sentence, so a word always gets the
+    same lemma whether it appears in a document, a lexicon column or a query. Tags and
+    lemmas are memoized in bounded LRU caches that can be persisted as a warm-start file.
+
+    The trade-off is tagging accuracy: without its sentence, a token gets its most likely
+    tag, so a word used in its rarer role is lemmatized as its common one (e.g. a word that
+    is usually a noun keeps its noun lemma where a sentence uses it as a verb). Since queries are
+    too short for sentence context, sentence-level tagging would give the same word
+    different lemmas in documents and queries, and those words would no longer match.
+    """
+
+    def __init__(self, cache_size=100000, warm_start_path=None):
+        """
+        Initialize the normalizer and load the warm-start file if one exists.
+
+        Parameters:
+            cache_size (int): Maximum number of entries kept in each LRU cache.
+            warm_start_path (str): File the caches are loaded from and saved to (default: none).
+        """
+        self.cache_size = cache_size
+        self.warm_start_path = warm_start_path
+        self.stop_words = set(stopwords.words("english"))
+        self.lemmatizer = WordNetLemmatizer()
+
+        self.tag_cache = OrderedDict()    # token -> WordNet POS
+        self.lemma_cache = OrderedDict()  # (token, WordNet POS) -> lemma
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if warm_start_path:
+            self.load_warm_start(warm_start_path)
+
+    @staticmethod
+    def get_wordnet_pos(treebank_tag):
+        """
+        Map Penn Treebank POS tags to WordNet POS tags.
+
+        Parameters:
+            treebank_tag (str): Penn Treebank POS tag.
+
+        Returns:
+            str: Corresponding WordNet POS tag, defaulting to noun.
+        """
+        if treebank_tag.startswith('J'):
+            return 'a'
+        elif treebank_tag.startswith('V'):
+            return 'v'
+        elif treebank_tag.startswith('R'):
+            return 'r'
+        else:
+            return 'n'
+
+    def cache_get(self, cache, key):
+        with self.lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.hits += 1
+                return cache[key]
+            self.misses += 1
+            return None
+
+    def cache_put(self, cache, key, value):
+        with self.lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def get_pos(self, token):
+        """
+        Return the WordNet POS of a token, tagging it on its own the first time it is seen.
+        """
+        pos = self.cache_get(self.tag_cache, token)
+        if pos is None:
+            pos = self.get_wordnet_pos(pos_tag([token])[0][1])
+            self.cache_put(self.tag_cache, token, pos)
+        return pos
+
+    def lemmatize(self, token, pos=None):
+        """
+        Lemmatize a lowercase token, using the LRU cache keyed by (token, POS).
+
+        Parameters:
+            token (str): The token to lemmatize.
+            pos (str): WordNet POS tag; looked up with get_pos when omitted.
+
+        Returns:
+            str: The lemma.
+        """
+        if pos is None:
+            pos = self.get_pos(token)
+        key = (token, pos)
+        lemma = self.cache_get(self.lemma_cache, key)
+        if lemma is None:
+            lemma = self.lemmatizer.lemmatize(token, pos)
+            self.cache_put(self.lemma_cache, key, lemma)
+        return lemma
+
+    def is_indexable(self, token):
+        return token.isalpha() and len(token) > 2 and token not in self.stop_words
+
+    def normalize_with_positions(self, text):
+        """
+        Tokenize and lemmatize text, dropping stopwords and short or non-alphabetic tokens.
+
+        Parameters:
+            text (str): The text to normalize.
+
+        Returns:
+            list: (lemma, position) tuples, where position is the token index in the text.
+        """
+        tokens = word_tokenize(text.lower())
+        return [(self.lemmatize(token), i) for i, token in enumerate(tokens) if self.is_indexable(token)]
+
+    def normalize(self, text):
+        """
+        Tokenize and lemmatize text.
+
+        Parameters:
+            text (str): The text to normalize.
+
+        Returns:
+            list: The lemmas, in text order.
+        """
+        return [lemma for lemma, _ in self.normalize_with_positions(text)]
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            dict: Hit and miss counts, hit rate and current cache sizes.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tag_cache_size": len(self.tag_cache),
+                "lemma_cache_size": len(self.lemma_cache),
+            }
+
+    def load_warm_start(self, path):
+        """
+        Fill the caches from a warm-start file, if it exists.
+        """
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable lemma cache at {path}: {e}")
+            return
+
+        for token, pos in data.get("tags", [])[-self.cache_size:]:
+            self.tag_cache[token] = pos
+        for token, pos, lemma in data.get("lemmas", [])[-self.cache_size:]:
+            self.lemma_cache[(token, pos)] = lemma
+
+    def save_warm_start(self, path=None):
+        """
+        Persist the caches, least recently used first, so the next process starts warm.
+        """
+        path = path or self.warm_start_path
+        if not path:
+            return
+        with self.lock:
+            data = {
+                "tags": [[token, pos] for token, pos in self.tag_cache.items()],
+                "lemmas": [[token, pos, lemma] for (token, pos), lemma in self.lemma_cache.items()],
+            }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+
+
+shared_normalizer = None
+shared_normalizer_lock = threading.Lock()
+
+
+def get_normalizer():
+    """
+    Return the process-wide TextNormalizer, creating it from the default warm-start file on first use.
+    """
+    global shared_normalizer
+    with shared_normalizer_lock:
+        if shared_normalizer is None:
+            shared_normalizer = TextNormalizer(warm_start_path=DEFAULT_WARM_START_PATH)
+        return shared_normalizer
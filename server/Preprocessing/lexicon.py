@@ -2,8 +2,9 @@ import pathlib
 import sys
 from pathlib import Path
 
-# Add the 'Preprocessing' directory to the Python path
+# Add the 'Preprocessing' and 'server' directories to the Python path
 sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 input_path = (pathlib.Path().absolute()/"server" / "data" / "postings.csv")
 output_path = (pathlib.Path().absolute() /"server" / "Preprocessing" /"lexicon.csv")
@@ -13,4 +14,4 @@ from LexiconGenerator import LexiconGenerator
 lex_gen = LexiconGenerator(output_path)
 
 # Generate or update the lexicon from a CSV file
-lex_gen.generate(input_path)
+lex_gen.generate(input_path, chunksize=10000)
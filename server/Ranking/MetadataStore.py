@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+
+class MetadataStore:
+    """
+    Persistent docID-keyed store of the fields shown for a ranked result.
+
+    Only the display fields are kept, so hydrating the top N results reads N small
+    rows by primary key instead of parsing the whole postings CSV.
+    """
+
+    # Store column -> postings CSV column
+    columns = {
+        "title": "title",
+        "url": "job_posting_url",
+        "company": "company_name",
+        "location": "location",
+    }
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the metadata database.
+
+        Parameters:
+            db_path (str): Path of the SQLite database file.
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id INTEGER PRIMARY KEY, title TEXT, url TEXT, company TEXT, location TEXT)"
+        )
+        self.connection.commit()
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def append_csv(self, csv_path, first_doc_id, chunksize=5000):
+        """
+        Store the display fields of every row of a postings CSV, numbering documents from first_doc_id.
+
+        Parameters:
+            csv_path (str): Postings CSV, in the same row order the forward index assigned docIDs.
+            first_doc_id (int): docID of the first row.
+            chunksize (int): Rows read per chunk.
+
+        Returns:
+            int: Number of documents stored.
+        """
+        header = pd.read_csv(csv_path, nrows=0).columns
+        usecols = [column for column in self.columns.values() if column in header]
+
+        doc_id = first_doc_id
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            rows = []
+            for record in chunk.to_dict("records"):
+                rows.append((doc_id, *(record.get(column) for column in self.columns.values())))
+                doc_id += 1
+            with self.lock:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO documents (doc_id, title, url, company, location) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.connection.commit()
+
+        print(f"Stored metadata for {doc_id - first_doc_id} documents in {self.db_path}.")
+        return doc_id - first_doc_id
+
+    def build_from_csv(self, csv_path):
+        """
+        Populate an empty store from the full postings CSV, where row n holds docID n.
+        """
+        if self.count() == 0 and os.path.exists(csv_path):
+            self.append_csv(csv_path, 0)
+
+    def get_many(self, doc_ids):
+        """
+        Fetch the display fields of the given documents.
+
+        Parameters:
+            doc_ids (list): Integer docIDs.
+
+        Returns:
+            dict: docID -> {"title", "url", "company", "location"} for the docIDs that exist.
+        """
+        doc_ids = [int(doc_id) for doc_id in doc_ids]
+        records = {}
+        with self.lock:
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(doc_ids), 500):
+                batch = doc_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self.connection.execute(
+                    f"SELECT doc_id, title, url, company, location FROM documents WHERE doc_id IN ({placeholders})",
+                    batch,
+                )
+                for doc_id, title, url, company, location in cursor:
+                    records[doc_id] = {"title": title, "url": url, "company": company, "location": location}
+        return records
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
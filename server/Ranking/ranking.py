@@ -1,11 +1,27 @@
+import heapq
 import json
+import math
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from inverted_index.BinaryBarrel import BlockPostingList
+from inverted_index.CompactPostings import CompactPostingList
+from inverted_index.ImpactIndex import term_weight
+from search.intersection import PostingList
+
 class DocumentRankingUtility:
-    def __init__(self, filtered_results_path, metadata_file_path):
+    # BM25 parameters
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, filtered_results_path, metadata_file_path, metadata_df=None, metadata_store=None):
         self.filtered_results_path = filtered_results_path
         self.metadata_file_path = metadata_file_path
+        # Metadata already held in memory (e.g. by the SearchEngine) is used instead of re-reading the CSV
+        self.metadata_df = metadata_df
+        # A docID-keyed MetadataStore, when given, hydrates only the returned results
+        self.metadata_store = metadata_store
 
     def reformat_filtered_results(self, filtered_results):
         """
@@ -36,6 +52,8 @@ class DocumentRankingUtility:
                 }
                 reformatted_results.append(consolidated_entry)
             return reformatted_results
+        elif isinstance(filtered_results, (CompactPostingList, BlockPostingList)):  # Decoded lazily, always well-formed
+            return filtered_results
         elif isinstance(filtered_results, list):  # Already in list format
             for item in filtered_results:
                 if not all(key in item for key in ("docID", "frequency", "positions")):
@@ -44,7 +62,8 @@ class DocumentRankingUtility:
         else:
             raise ValueError("Unexpected format for filtered results.")
 
-    def rank_documents_with_metadata(self, filtered_results, metadata_df):
+    def rank_documents_with_metadata(self, filtered_results, metadata_df, top_k=None, boosts=None, offset=0,
+                                     hydrate=True):
         """
         Rank documents based on relevance using frequency and positions,
         and return specific fields in the output.
@@ -52,10 +71,15 @@ class DocumentRankingUtility:
         Parameters:
             filtered_results (list): List of documents with frequencies and positions.
             metadata_df (DataFrame): Metadata DataFrame for each document.
+            top_k (int): Number of results to return (default: all).
+            boosts (dict): Proximity boost per docID; a document's score is multiplied by (1 + boost).
+            offset (int): Number of top results to skip; top_k counts them too.
+            hydrate (bool): Attach the display fields; otherwise (doc_id, score) tuples are returned.
 
         Returns:
             list: Ranked list of documents with required fields.
         """
+        boosts = boosts or {}
         scores = {}
 
         for result in filtered_results:
@@ -68,32 +92,302 @@ class DocumentRankingUtility:
 
             # Calculate score
             score = 0.7 * frequency + 0.3 * (1 / avg_position)
-            scores[doc_id] = score
+            scores[doc_id] = score * (1 + boosts.get(doc_id, 0.0))
+
+        # Select the best documents (all of them when top_k is not set)
+        if top_k is None:
+            ranked_docs = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        else:
+            ranked_docs = heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
+
+        return self.page_results(ranked_docs, metadata_df, offset, hydrate)
 
-        # Sort documents by score
-        ranked_docs = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    def page_results(self, ranked_docs, metadata_df=None, offset=0, hydrate=True):
+        """
+        Drop the documents before the requested page and hydrate the rest, so only the
+        page that is returned is ever hydrated.
+        """
+        ranked_docs = ranked_docs[offset:] if offset else ranked_docs
+        return self.hydrate_results(ranked_docs, metadata_df) if hydrate else ranked_docs
+
+    def hydrate_results(self, ranked_docs, metadata_df=None):
+        """
+        Attach the display fields to ranked documents.
+
+        Parameters:
+            ranked_docs (list): (doc_id, score) tuples, best first.
+            metadata_df (DataFrame): Metadata to read from when no metadata store is set.
 
-        # Prepare the results with only required fields
+        Returns:
+            list: Ranked list of documents with required fields.
+        """
+        if self.metadata_store is None:
+            return [self.build_result_entry(doc_id, score, metadata_df) for doc_id, score in ranked_docs]
+
+        records = self.metadata_store.get_many([doc_id for doc_id, _ in ranked_docs])
         results = []
         for doc_id, score in ranked_docs:
-            # Retrieve the nth row based on doc_id
-            if 0 <= doc_id < len(metadata_df):  # Ensure doc_id is within range
-                row = metadata_df.iloc[doc_id]
-                title = row.get("title", "N/A")
-                url = row.get("job_posting_url", "N/A")
-            else:
-                title = "N/A"
-                url = "N/A"
-
+            record = records.get(doc_id, {})
             results.append({
                 "doc_id": doc_id,
                 "score": score,
-                "title": title,
-                "url": url
+                "title": record.get("title") or "N/A",
+                "url": record.get("url") or "N/A",
+                "company": record.get("company") or "N/A",
+                "location": record.get("location") or "N/A",
             })
-
         return results
 
+    @staticmethod
+    def build_result_entry(doc_id, score, metadata_df):
+        """
+        Hydrate one ranked document with the fields returned to the client.
+        """
+        # Retrieve the nth row based on doc_id
+        if 0 <= doc_id < len(metadata_df):  # Ensure doc_id is within range
+            row = metadata_df.iloc[doc_id]
+            title = row.get("title", "N/A")
+            url = row.get("job_posting_url", "N/A")
+            company = row.get("company_name", "N/A")
+            location = row.get("location", "N/A")
+        else:
+            title = "N/A"
+            url = "N/A"
+            company = "N/A"
+            location = "N/A"
+
+        return {
+            "doc_id": doc_id,
+            "score": score,
+            "title": title,
+            "url": url,
+            "company": company,
+            "location": location
+        }
+
+    @staticmethod
+    def term_frequency_matrix(filtered_results):
+        """
+        Turn search results into a docs x terms matrix of term frequencies.
+
+        Parameters:
+            filtered_results (dict or list): Multi-word results ({docID: {word: posting}})
+                or single-word postings ([posting, ...]).
+
+        Returns:
+            tuple: (docIDs array, list of terms, term frequency matrix). Single-word postings
+                yield one unnamed term (None).
+        """
+        if isinstance(filtered_results, dict):
+            terms = sorted({term for entries in filtered_results.values() for term in entries})
+            columns = {term: i for i, term in enumerate(terms)}
+            doc_ids = np.fromiter((int(doc_id) for doc_id in filtered_results), dtype=np.int64,
+                                  count=len(filtered_results))
+            tf = np.zeros((len(doc_ids), len(terms)))
+            for row, entries in enumerate(filtered_results.values()):
+                for term, entry in entries.items():
+                    tf[row, columns[term]] = entry.get("frequency", 0)
+            return doc_ids, terms, tf
+
+        if isinstance(filtered_results, CompactPostingList):
+            # The arrays are read as they are, without decoding any posting
+            doc_ids = np.frombuffer(filtered_results.doc_ids, dtype=np.uint32).astype(np.int64)
+            tf = np.frombuffer(filtered_results.frequencies, dtype=np.uint32).astype(float).reshape(-1, 1)
+            return doc_ids, [None], tf
+
+        if isinstance(filtered_results, BlockPostingList):
+            # The docIDs and frequencies are decoded without the positions
+            doc_ids = np.fromiter(filtered_results.doc_ids, dtype=np.int64, count=len(filtered_results))
+            tf = np.fromiter(filtered_results.frequencies, dtype=float, count=len(filtered_results)).reshape(-1, 1)
+            return doc_ids, [None], tf
+
+        doc_ids = np.fromiter((int(posting["docID"]) for posting in filtered_results), dtype=np.int64,
+                              count=len(filtered_results))
+        tf = np.fromiter((posting["frequency"] for posting in filtered_results), dtype=float,
+                         count=len(filtered_results)).reshape(-1, 1)
+        return doc_ids, [None], tf
+
+    @staticmethod
+    def select_top_k(scores, top_k):
+        """
+        Return the indices of the top_k highest scores, best first, without sorting every score.
+
+        Equal scores keep their input (docID) order, as in a full sort, so every top_k is a
+        prefix of the full ranking and consecutive pages never overlap or skip a document.
+        """
+        if top_k is None or top_k >= len(scores):
+            return np.argsort(-scores, kind="stable")
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        threshold = -np.partition(-scores, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:top_k - len(above)]
+        top = np.sort(np.concatenate([above, tied]))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def rank_documents_bm25(self, filtered_results, metadata_df, statistics, document_frequencies=None, top_k=None,
+                            boosts=None, offset=0, hydrate=True):
+        """
+        Rank documents with BM25, computed over NumPy arrays.
+
+        Parameters:
+            filtered_results (dict or list): Results returned by a search class.
+            metadata_df (DataFrame): Metadata DataFrame for each document.
+            statistics (CollectionStatistics): Document lengths and collection size.
+            document_frequencies (dict): Number of documents containing each query word.
+            top_k (int): Number of results to return (default: all).
+            boosts (dict): Proximity boost per docID; a document's score is multiplied by (1 + boost).
+            offset (int): Number of top results to skip; top_k counts them too.
+            hydrate (bool): Attach the display fields; otherwise (doc_id, score) tuples are returned.
+
+        Returns:
+            list: Ranked list of documents with required fields.
+        """
+        document_frequencies = document_frequencies or {}
+        doc_ids, terms, tf = self.term_frequency_matrix(filtered_results)
+
+        if terms == [None] and len(document_frequencies) == 1:
+            df = np.array(list(document_frequencies.values()), dtype=float)
+        else:
+            df = np.array([document_frequencies.get(term, np.count_nonzero(tf[:, i])) for i, term in enumerate(terms)],
+                          dtype=float)
+
+        total_docs = max(statistics.total_docs, len(doc_ids))
+        average_length = statistics.average_length or 1.0
+        doc_lengths = statistics.lengths_for(doc_ids).astype(float)
+
+        idf = np.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / average_length)
+        scores = (tf * (self.k1 + 1) / (tf + length_norm[:, None])) @ idf
+        if boosts:
+            scores *= 1 + np.fromiter((boosts.get(int(doc_id), 0.0) for doc_id in doc_ids), dtype=float,
+                                      count=len(doc_ids))
+
+        ranked_docs = [(int(doc_ids[i]), float(scores[i])) for i in self.select_top_k(scores, top_k)[offset:]]
+        return self.page_results(ranked_docs, metadata_df, hydrate=hydrate)
+
+    @staticmethod
+    def inverse_document_frequency(document_frequency, total_docs):
+        return math.log(1 + (total_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def rank_term_by_impact(self, impact_reader, term_id, statistics, top_k):
+        """
+        BM25 top-k for a single term, read from its impact-ordered postings.
+
+        Blocks arrive best first and each block carries an upper bound on every score that
+        follows, so the scan stops as soon as that bound cannot beat the current k-th result.
+        The scores are identical to rank_documents_bm25.
+
+        Parameters:
+            impact_reader (ImpactBarrelReader): Impact barrel holding the term.
+            term_id (str): Term ID.
+            statistics (CollectionStatistics): Document lengths and collection size.
+            top_k (int): Number of results to return.
+
+        Returns:
+            list: (doc_id, score) tuples, best first.
+        """
+        entry = impact_reader.find_entry(term_id)
+        if entry is None or top_k <= 0:
+            return []
+        document_frequency = entry[1]
+        idf = self.inverse_document_frequency(document_frequency, max(statistics.total_docs, document_frequency))
+        average_length = statistics.average_length or 1.0
+
+        # Min-heap of (score, -doc_id): on equal scores the higher docID is evicted first
+        heap = []
+        for max_frequency, min_length, block in impact_reader.iter_blocks(term_id):
+            bound = idf * term_weight(max_frequency, min_length, average_length, self.k1, self.b)
+            if len(heap) == top_k and bound < heap[0][0]:
+                break
+            lengths = statistics.lengths_for(np.fromiter((doc_id for doc_id, _ in block), dtype=np.int64,
+                                                         count=len(block)))
+            for (doc_id, frequency), length in zip(block, lengths):
+                item = (idf * term_weight(frequency, length, average_length, self.k1, self.b), -doc_id)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        return [(-neg_doc_id, float(score)) for score, neg_doc_id in sorted(heap, reverse=True)]
+
+    def rank_disjunction_wand(self, term_postings, upper_bounds, statistics, top_k, document_frequencies=None):
+        """
+        BM25 top-k for documents containing any of several terms, using WAND.
+
+        Each term's score upper bound comes from its maximum frequency and minimum document
+        length. Documents whose bound sum cannot beat the current k-th score are skipped
+        without being scored, galloping the lagging posting lists past them.
+
+        Parameters:
+            term_postings (dict): word -> postings.
+            upper_bounds (dict): word -> (max frequency, min document length).
+            statistics (CollectionStatistics): Document lengths and collection size.
+            top_k (int): Number of results to return.
+            document_frequencies (dict): word -> number of documents containing it, as used by
+                rank_documents_bm25 (default: the length of each word's postings).
+
+        Returns:
+            list: (doc_id, score) tuples, best first.
+        """
+        if top_k <= 0:
+            return []
+        average_length = statistics.average_length or 1.0
+        document_frequencies = {word: (document_frequencies or {}).get(word, len(postings))
+                                for word, postings in term_postings.items()}
+        total_docs = max([statistics.total_docs] + list(document_frequencies.values()))
+
+        lists, idfs, bounds = [], [], []
+        for word, postings in term_postings.items():
+            if not postings:
+                continue
+            idf = self.inverse_document_frequency(document_frequencies[word], total_docs)
+            max_frequency, min_length = upper_bounds[word]
+            lists.append(PostingList(postings))
+            idfs.append(idf)
+            bounds.append(idf * term_weight(max_frequency, min_length, average_length, self.k1, self.b))
+        cursors = [0] * len(lists)
+
+        heap = []
+        while True:
+            active = sorted((i for i in range(len(lists)) if cursors[i] < len(lists[i])),
+                            key=lambda i: lists[i].doc_ids[cursors[i]])
+            threshold = heap[0][0] if len(heap) == top_k else -math.inf
+
+            # The pivot is the first document whose accumulated upper bound can beat the threshold
+            accumulated, pivot = 0.0, None
+            for position, i in enumerate(active):
+                accumulated += bounds[i]
+                if accumulated > threshold:
+                    pivot = position
+                    break
+            if pivot is None:
+                break
+
+            pivot_doc = lists[active[pivot]].doc_ids[cursors[active[pivot]]]
+            if lists[active[0]].doc_ids[cursors[active[0]]] != pivot_doc:
+                # None of the documents before the pivot can make the top k
+                for i in active[:pivot]:
+                    cursors[i] = lists[i].advance_to(cursors[i], pivot_doc)
+                continue
+
+            length = statistics.lengths_for(np.array([pivot_doc]))[0]
+            score = 0.0
+            for i in active:
+                if lists[i].doc_ids[cursors[i]] != pivot_doc:
+                    break
+                frequency = lists[i].frequency(cursors[i])
+                score += idfs[i] * term_weight(frequency, length, average_length, self.k1, self.b)
+                cursors[i] += 1
+
+            item = (score, -pivot_doc)
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        return [(-neg_doc_id, float(score)) for score, neg_doc_id in sorted(heap, reverse=True)]
+
     def load_filtered_results(self):
         try:
             if self.filtered_results_path.exists():
@@ -107,6 +401,9 @@ class DocumentRankingUtility:
             return []  # Fallback to empty list if JSON is missing or invalid
 
     def load_metadata(self, columns_to_process):
+        if self.metadata_df is not None:
+            return self.metadata_df
+
         try:
             if self.metadata_file_path.exists():
                 metadata_df = pd.read_csv(self.metadata_file_path, usecols=columns_to_process)
@@ -121,20 +418,43 @@ class DocumentRankingUtility:
             print(f"Error reading metadata file: {e}")
             return pd.DataFrame(columns=columns_to_process)  # Empty DataFrame if CSV not found
 
-    def rank(self):
+    def rank(self, filtered_results=None, mode="frequency", top_k=None, statistics=None, document_frequencies=None,
+             boosts=None, offset=0, hydrate=True):
+        """
+        Rank filtered results against the document metadata.
+
+        Parameters:
+            filtered_results (dict or list): Postings returned by a search class. When omitted,
+                they are read back from the filtered results JSON file.
+            mode (str): "frequency" for the frequency/position score, or "bm25".
+            top_k (int): Number of results to return (default: all).
+            statistics (CollectionStatistics): Corpus statistics, required for "bm25".
+            document_frequencies (dict): Number of documents containing each query word, for "bm25".
+            boosts (dict): Proximity boost per docID from phrase and NEAR/k queries.
+            offset (int): Number of top results to skip, for paging; top_k counts them too.
+            hydrate (bool): Attach the display fields; otherwise (doc_id, score) tuples are returned.
+
+        Returns:
+            list: Ranked list of documents with required fields.
+        """
         columns_to_process = ["company_name", "description", "title", "location", "skills_desc", "job_posting_url"]
 
         # Load data
-        filtered_results = self.load_filtered_results()
-        metadata_df = self.load_metadata(columns_to_process)
+        if filtered_results is None:
+            filtered_results = self.load_filtered_results()
+        metadata_df = None if self.metadata_store is not None else self.load_metadata(columns_to_process)
 
-        if filtered_results and not metadata_df.empty:
-            ranked_results = self.rank_documents_with_metadata(filtered_results, metadata_df)
-            return ranked_results
-        else:
+        if not filtered_results or (metadata_df is not None and metadata_df.empty):
             print("No data available for ranking.")
             return []
 
+        if mode == "bm25" and statistics is not None:
+            return self.rank_documents_bm25(filtered_results, metadata_df, statistics, document_frequencies, top_k,
+                                            boosts, offset, hydrate)
+
+        filtered_results = self.reformat_filtered_results(filtered_results)
+        return self.rank_documents_with_metadata(filtered_results, metadata_df, top_k, boosts, offset, hydrate)
+
 # Example usage
 if __name__ == "__main__":
     absolute_path = Path(__file__).resolve()
@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+from Preprocessing.LexiconGenerator import LexiconGenerator
+from Preprocessing.TextNormalizer import get_normalizer
+from Forward_Index.ForwardIndexGenerator import preprocess_document
+from Forward_Index.SegmentStore import SegmentStore
+from inverted_index.BarrelManager import BarrelManager
+
+
+class FusedIndexer:
+    """
+    Builds the lexicon additions, forward index entries and inverted postings of a batch of
+    documents in one pass, tokenizing and lemmatizing every document only once.
+
+    The lexicon, forward index and inverted index generators each re-read the CSV and the
+    previous stage's JSON output; here every stage works from the same in-memory tokens, and
+    the intermediate JSON files are only written when asked for.
+
+    Inverted postings are buffered and merged into the barrels every flush_postings postings,
+    at a chunk boundary, so memory stays bounded by that many postings rather than by the
+    batch. When the intermediate JSON is written the whole batch is kept, since
+    New_Inverted.json holds all of it.
+    """
+
+    # Columns that only contribute lexicon words; title and description are also indexed
+    lexicon_only_columns = ["company_name", "location", "skills_desc"]
+    # Buffered postings that trigger a merge into the barrels
+    flush_postings = 1_000_000
+
+    def __init__(self, base_dir, write_intermediate=False):
+        """
+        Parameters:
+            base_dir (str): The server directory holding the index files.
+            write_intermediate (bool): Also write New_forward_index.json and New_Inverted.json, as
+                the separate generators do, e.g. for debugging.
+        """
+        base_dir = Path(base_dir)
+        self.lexicon_path = base_dir / "Preprocessing" / "lexicon.csv"
+        self.new_forward_index_path = base_dir / "Forward_Index" / "New_forward_index.json"
+        self.new_inverted_index_path = base_dir / "inverted_index" / "New_Inverted.json"
+        self.segment_store = SegmentStore(base_dir / "Forward_Index" / "segments",
+                                          legacy_index_path=base_dir / "Forward_Index" / "forward_index.json")
+        self.barrel_manager = BarrelManager(base_dir / "inverted_index" / "barrels")
+        self.write_intermediate = write_intermediate
+        self.normalizer = get_normalizer()
+        self.lexicon = self.load_lexicon()
+        self.next_term_id = max(self.lexicon.values(), default=-1) + 1
+        self.first_doc_id = None
+        self.last_doc_id = None
+
+    def load_lexicon(self):
+        """
+        Load the lexicon CSV into a word -> term ID dictionary.
+        """
+        lexicon = {}
+        if not os.path.exists(self.lexicon_path):
+            return lexicon
+        with open(self.lexicon_path, "r") as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Header
+            for word, term_id in reader:
+                lexicon[word] = int(term_id)
+        return lexicon
+
+    def add_words(self, counts):
+        """
+        Give term IDs to the words not in the lexicon yet, most frequent first.
+
+        Parameters:
+            counts (Counter): Word counts of the current chunk.
+
+        Returns:
+            list: The new (word, term ID) entries.
+        """
+        new_entries = []
+        for word, _ in counts.most_common():
+            if word not in self.lexicon:
+                self.lexicon[word] = self.next_term_id
+                new_entries.append((word, self.next_term_id))
+                self.next_term_id += 1
+        return new_entries
+
+    def append_lexicon(self, new_entries):
+        if not new_entries:
+            return
+        write_header = not os.path.exists(self.lexicon_path)
+        with open(self.lexicon_path, "a", newline="") as file:
+            writer = csv.writer(file)
+            if write_header:
+                writer.writerow(["Word", "Index"])
+            writer.writerows(new_entries)
+
+    @staticmethod
+    def build_document_entry(processed, lexicon):
+        """
+        Build the forward index entry of one document from its (lemma, position) tuples.
+        """
+        positions = defaultdict(list)
+        for word, pos in processed:
+            positions[str(lexicon[word])].append(pos)
+        return {term_id: {"frequency": len(pos), "positions": pos} for term_id, pos in positions.items()}
+
+    def index_csv(self, csv_path, chunksize=5000):
+        """
+        Index every row of a postings CSV, numbering documents after the forward index segments.
+
+        Parameters:
+            csv_path (str): Postings CSV.
+            chunksize (int): Rows read and tokenized per chunk.
+
+        Returns:
+            dict: The number of documents and new lexicon words.
+        """
+        next_doc_id = self.segment_store.next_doc_id
+        self.first_doc_id = next_doc_id
+        inverted_index = defaultdict(list)
+        buffered_postings = 0
+        added_words = 0
+
+        forward_file = open(self.new_forward_index_path, "w") if self.write_intermediate else None
+        separator = "\n"
+        try:
+            if forward_file:
+                forward_file.write("{")
+
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+                texts = (chunk["title"] + " " + chunk["description"]).tolist()
+                processed_documents = [preprocess_document(text, self.normalizer) for text in texts]
+
+                # The indexed words and the words of the other text columns make up the lexicon additions
+                counts = Counter(word for processed in processed_documents for word, _ in processed)
+                for column in self.lexicon_only_columns:
+                    if column in chunk.columns:
+                        for text in chunk[column].fillna(""):
+                            counts.update(self.normalizer.normalize(LexiconGenerator.clean_text(str(text))))
+                new_entries = self.add_words(counts)
+                self.append_lexicon(new_entries)
+                added_words += len(new_entries)
+
+                entries = {}
+                for processed in processed_documents:
+                    doc_key = str(next_doc_id)
+                    entry = self.build_document_entry(processed, self.lexicon)
+                    entries[doc_key] = entry
+                    for term_id, posting in entry.items():
+                        inverted_index[term_id].append({"docID": doc_key, **posting})
+                    buffered_postings += len(entry)
+                    if forward_file:
+                        forward_file.write(f"{separator}{json.dumps(doc_key)}: {json.dumps(entry)}")
+                        separator = ",\n"
+                    next_doc_id += 1
+
+                # Each chunk becomes a forward index segment; compaction merges small ones later
+                self.segment_store.write_segment(entries)
+
+                # Later chunks only have higher docIDs, so a flushed chunk's postings are appended as is
+                if not self.write_intermediate and buffered_postings >= self.flush_postings:
+                    self.barrel_manager.update_barrels(inverted_index)
+                    inverted_index = defaultdict(list)
+                    buffered_postings = 0
+
+            if forward_file:
+                forward_file.write("\n}")
+        finally:
+            if forward_file:
+                forward_file.close()
+
+        self.last_doc_id = next_doc_id - 1
+
+        if self.write_intermediate:
+            with open(self.new_inverted_index_path, "w") as file:
+                json.dump(inverted_index, file)
+
+        if inverted_index:
+            self.barrel_manager.update_barrels(inverted_index)
+        self.normalizer.save_warm_start()
+
+        documents = self.last_doc_id - self.first_doc_id + 1
+        print(f"Indexed {documents} documents in one pass; {added_words} words added to the lexicon.")
+        return {"documents": documents, "new_words": added_words}
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class IngestionQueue:
+    """
+    Persistent queue of uploaded CSVs waiting to be indexed, backed by SQLite so queued
+    uploads survive a restart and the server needs no external broker.
+
+    Jobs move from "pending" to "running" when a batch picks them up, and then to
+    "completed" or "failed" together with the rest of their batch.
+    """
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the queue database.
+
+        Parameters:
+            db_path (str): Path of the SQLite database file.
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, csv_path TEXT, status TEXT, batch_id TEXT, "
+            "submitted_at REAL, started_at REAL, finished_at REAL, error TEXT);"
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);"
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "batch_id TEXT PRIMARY KEY, job_count INTEGER, documents INTEGER, status TEXT, "
+            "started_at REAL, finished_at REAL);"
+        )
+        self.connection.commit()
+
+    def execute(self, sql, parameters=()):
+        with self.lock:
+            cursor = self.connection.execute(sql, parameters)
+            self.connection.commit()
+            return cursor
+
+    def query(self, sql, parameters=()):
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def enqueue(self, csv_path):
+        """
+        Add an uploaded CSV to the queue.
+
+        Returns:
+            str: The job ID.
+        """
+        job_id = uuid.uuid4().hex
+        self.execute(
+            "INSERT INTO jobs (job_id, csv_path, status, submitted_at) VALUES (?, ?, 'pending', ?)",
+            (job_id, str(csv_path), time.time()),
+        )
+        return job_id
+
+    def pending(self, limit):
+        """
+        Return the oldest pending jobs, in submission order.
+        """
+        return self.query(
+            "SELECT * FROM jobs WHERE status = 'pending' ORDER BY submitted_at LIMIT ?", (limit,)
+        )
+
+    def start_batch(self, job_ids):
+        """
+        Mark jobs as running under a new batch.
+
+        Returns:
+            str: The batch ID.
+        """
+        batch_id = uuid.uuid4().hex
+        now = time.time()
+        placeholders = ",".join("?" * len(job_ids))
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO batches (batch_id, job_count, status, started_at) VALUES (?, ?, 'running', ?)",
+                (batch_id, len(job_ids), now),
+            )
+            self.connection.execute(
+                f"UPDATE jobs SET status = 'running', batch_id = ?, started_at = ? WHERE job_id IN ({placeholders})",
+                (batch_id, now, *job_ids),
+            )
+            self.connection.commit()
+        return batch_id
+
+    def finish_batch(self, batch_id, documents=None, error=None):
+        """
+        Mark a batch and all of its jobs as completed, or as failed when an error is given.
+        """
+        status = "failed" if error else "completed"
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE batches SET status = ?, documents = ?, finished_at = ? WHERE batch_id = ?",
+                (status, documents, now, batch_id),
+            )
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE batch_id = ?",
+                (status, error, now, batch_id),
+            )
+            self.connection.commit()
+
+    def fail_job(self, job_id, error):
+        """
+        Mark a single pending job as failed, e.g. when its upload cannot be read.
+        """
+        self.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def recover_interrupted(self):
+        """
+        Fail the batches that were running when the server stopped.
+
+        Their pipeline run may have partly updated the index, so they are not retried
+        automatically; the uploads stay on disk for inspection.
+        """
+        error = "Interrupted by a server restart."
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ? WHERE status = 'running'", (error,)
+            )
+            self.connection.execute("UPDATE batches SET status = 'failed' WHERE status = 'running'")
+            self.connection.commit()
+
+    def get(self, job_id):
+        rows = self.query("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def stats(self):
+        """
+        Report the backlog and the ingest throughput.
+
+        Returns:
+            dict: Job counts per status, the age of the oldest pending job and the
+                documents per second achieved by completed batches.
+        """
+        counts = {row["status"]: row["count"] for row in
+                  self.query("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status")}
+        oldest = self.query("SELECT MIN(submitted_at) AS oldest FROM jobs WHERE status = 'pending'")[0]["oldest"]
+        batches = self.query(
+            "SELECT COUNT(*) AS batches, SUM(job_count) AS jobs, SUM(documents) AS documents, "
+            "SUM(finished_at - started_at) AS seconds FROM batches WHERE status = 'completed'"
+        )[0]
+
+        seconds = batches["seconds"] or 0.0
+        documents = batches["documents"] or 0
+        return {
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "completed": counts.get("completed", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_pending_seconds": time.time() - oldest if oldest else 0.0,
+            "completed_batches": batches["batches"],
+            "jobs_per_batch": (batches["jobs"] or 0) / batches["batches"] if batches["batches"] else 0.0,
+            "documents_indexed": documents,
+            "documents_per_second": documents / seconds if seconds else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from ingestion.ingestionQueue import IngestionQueue
+from ingestion.pipeline import run_pipeline
+
+
+class IngestionJobManager:
+    """
+    Queues uploaded CSVs and indexes them in batches in a worker process, so indexing never
+    blocks the event loop or competes with searches for the GIL.
+
+    A background thread waits until the oldest pending upload is batch_window seconds old,
+    merges every pending upload into one CSV and runs the pipeline once for all of them, so
+    a burst of small uploads costs one lexicon, forward index and barrel rewrite instead of one each.
+    Uploads that cannot be read or lack the indexed columns fail on their own before merging.
+    """
+
+    # Columns the indexer reads from every row
+    required_columns = ("title", "description")
+
+    def __init__(self, base_dir, chunksize=5000, on_complete=None, batch_window=2.0, max_batch_jobs=100,
+                 write_intermediate=False):
+        """
+        Parameters:
+            base_dir (str): The server directory holding the index files.
+            chunksize (int): Rows read per chunk when streaming uploaded CSVs.
+            on_complete (callable): Called after each successful batch, e.g. to reload the search engine.
+            batch_window (float): Seconds to wait for more uploads before starting a batch.
+            max_batch_jobs (int): Maximum number of uploads merged into one batch.
+            write_intermediate (bool): Also write the New_forward_index.json and New_Inverted.json debug files.
+        """
+        self.base_dir = Path(base_dir)
+        self.chunksize = chunksize
+        self.on_complete = on_complete
+        self.batch_window = batch_window
+        self.max_batch_jobs = max_batch_jobs
+        self.write_intermediate = write_intermediate
+        self.uploads_dir = self.base_dir / "data" / "uploads"
+        self.uploads_dir.mkdir(parents=True, exist_ok=True)
+
+        self.queue = IngestionQueue(self.base_dir / "data" / "ingestion.db")
+        self.queue.recover_interrupted()
+
+        # Spawned workers start from a clean interpreter instead of forking the server's threads
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        self.manager = context.Manager()
+        # batch_id -> {"stage", "updated_at"}, written by the worker while a batch runs
+        self.progress = self.manager.dict()
+
+        self.wake = threading.Event()
+        self.stopping = False
+        self.worker = threading.Thread(target=self.run, name="ingestion-worker", daemon=True)
+        self.worker.start()
+
+    def submit(self, csv_path):
+        """
+        Queue an uploaded CSV for ingestion.
+
+        Parameters:
+            csv_path (str): The uploaded CSV; it is deleted once indexed.
+
+        Returns:
+            str: The job ID.
+        """
+        job_id = self.queue.enqueue(csv_path)
+        self.wake.set()
+        return job_id
+
+    def run(self):
+        # Worker thread: one batch at a time, in submission order
+        while not self.stopping:
+            self.wake.wait(timeout=self.batch_window)
+            self.wake.clear()
+
+            jobs = self.queue.pending(1)
+            if not jobs or self.stopping:
+                continue
+
+            # Give further uploads until the end of the batch window to join this batch
+            remaining = jobs[0]["submitted_at"] + self.batch_window - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            self.run_batch(self.queue.pending(self.max_batch_jobs))
+
+    def run_batch(self, jobs):
+        """
+        Merge the uploads of some pending jobs and index them with one pipeline run.
+
+        Parameters:
+            jobs (list): Pending job rows.
+        """
+        # A bad upload fails its own job instead of the whole batch
+        frames, valid_jobs = [], []
+        for job in jobs:
+            try:
+                frames.append(self.read_upload(job["csv_path"]))
+                valid_jobs.append(job)
+            except (OSError, ValueError) as error:
+                print(f"Ingestion job {job['job_id']} rejected: {error}")
+                self.queue.fail_job(job["job_id"], str(error) or type(error).__name__)
+        if not valid_jobs:
+            return
+
+        batch_id = self.queue.start_batch([job["job_id"] for job in valid_jobs])
+        print(f"Ingestion batch {batch_id}: indexing {len(valid_jobs)} uploads.")
+
+        try:
+            batch_path = self.uploads_dir / f"batch-{batch_id}.csv"
+            self.merge_uploads(frames, batch_path)
+            result = self.executor.submit(run_pipeline, str(self.base_dir), str(batch_path), self.chunksize,
+                                          self.progress, batch_id, self.write_intermediate).result()
+        except Exception as error:
+            print(f"Ingestion batch {batch_id} failed: {error}")
+            self.queue.finish_batch(batch_id, error=str(error) or type(error).__name__)
+            return
+
+        for job in valid_jobs:
+            if os.path.exists(job["csv_path"]):
+                os.remove(job["csv_path"])
+
+        # Reload before reporting completion, so a client that sees "completed" can search the new documents
+        if self.on_complete is not None:
+            try:
+                self.on_complete()
+            except Exception as error:
+                print(f"Reload after ingestion batch {batch_id} failed: {error}")
+
+        # The documents are indexed at this point, whatever happened to the reload
+        self.queue.finish_batch(batch_id, documents=result["documents"])
+        print(f"Ingestion batch {batch_id} completed.")
+
+    def read_upload(self, csv_path):
+        """
+        Read one uploaded CSV and check that it has the columns the indexer needs.
+
+        Parameters:
+            csv_path (str): The uploaded CSV.
+
+        Returns:
+            DataFrame: Its rows, every value as a string.
+
+        Raises:
+            ValueError: If the file is not a readable CSV or lacks a required column.
+        """
+        frame = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        missing = [column for column in self.required_columns if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Upload is missing the column(s): {', '.join(missing)}.")
+        return frame
+
+    def merge_uploads(self, frames, batch_path):
+        """
+        Concatenate uploaded CSVs into one, with columns in the order of postings.csv so
+        uploads with differently ordered headers line up.
+
+        Parameters:
+            frames (list): The uploads, as returned by read_upload.
+            batch_path (str): Where the merged CSV is written.
+        """
+        merged = pd.concat(frames, ignore_index=True)
+
+        postings_path = self.base_dir / "data" / "postings.csv"
+        columns = list(merged.columns)
+        if postings_path.exists() and postings_path.stat().st_size:
+            header = list(pd.read_csv(postings_path, nrows=0).columns)
+            columns = header + [column for column in columns if column not in header]
+        merged.reindex(columns=columns, fill_value="").to_csv(batch_path, index=False)
+
+    def status(self, job_id):
+        """
+        Report the state of a job.
+
+        Parameters:
+            job_id (str): The job ID returned by submit.
+
+        Returns:
+            dict: The job's status and, while its batch runs, the current stage; None for an unknown job.
+        """
+        job = self.queue.get(job_id)
+        if job is None:
+            return None
+        job.pop("csv_path", None)
+        if job["status"] == "running":
+            job.update(self.progress.get(job["batch_id"]) or {})
+        return job
+
+    def stats(self):
+        stats = self.queue.stats()
+        stats["batch_window_seconds"] = self.batch_window
+        return stats
+
+    def shutdown(self):
+        self.stopping = True
+        self.wake.set()
+        self.worker.join(timeout=5)
+        self.executor.shutdown(wait=True)
+        self.manager.shutdown()
+        self.queue.close()
@@ -0,0 +1,77 @@
+import csv
+import os
+import time
+from pathlib import Path
+
+from ingestion.fusedIndexer import FusedIndexer
+from Preprocessing.CompactLexicon import write_compact_lexicon
+from search.spellingIndex import write_spelling_index
+from Ranking.MetadataStore import MetadataStore
+
+
+def run_pipeline(base_dir, csv_path, chunksize=5000, progress=None, job_id=None, write_intermediate=False):
+    """
+    Index an uploaded postings CSV: append it to the postings data, then update the lexicon,
+    forward index segments, barrels and metadata store.
+
+    This runs in an ingestion worker process, so it opens its own stores instead of sharing
+    the search engine's.
+
+    Parameters:
+        base_dir (str): The server directory holding the index files.
+        csv_path (str): The uploaded CSV.
+        chunksize (int): Rows read per chunk when streaming the CSV.
+        progress (dict): Shared mapping the current stage is reported to, keyed by job_id.
+        job_id (str): ID of the ingestion job.
+        write_intermediate (bool): Also write New_forward_index.json and New_Inverted.json.
+
+    Returns:
+        dict: The number and docID range of the indexed documents.
+    """
+    base_dir = Path(base_dir)
+
+    def report(stage):
+        if progress is not None:
+            progress[job_id] = {"stage": stage, "updated_at": time.time()}
+        print(f"Ingestion job {job_id}: {stage}")
+
+    # Append the uploaded rows to postings.csv, excluding the header
+    report("appending postings")
+    with open(csv_path, "r", newline="", encoding="utf-8") as upload_csv, \
+            open(base_dir / "data" / "postings.csv", "a", newline="", encoding="utf-8") as data_csv:
+        reader = csv.reader(upload_csv)
+        next(reader, None)
+        csv.writer(data_csv).writerows(reader)
+
+    # Lexicon, forward index and inverted postings come from a single tokenization pass
+    report("indexing documents")
+    indexer = FusedIndexer(base_dir, write_intermediate=write_intermediate)
+    indexer.index_csv(csv_path, chunksize=chunksize)
+
+    # Merge small forward index segments before the batch ends, so no compaction outlives it
+    report("compacting forward index")
+    indexer.segment_store.compact()
+
+    # Searches map the lexicon from this file, so the server's reload does not parse the CSV
+    report("writing compact lexicon")
+    write_compact_lexicon(indexer.lexicon_path, base_dir / "Preprocessing" / "lexicon.lex")
+
+    # Built here, once per batch, so the server's reload only has to load it
+    report("writing spelling index")
+    write_spelling_index(indexer.lexicon_path, base_dir / "Preprocessing" / "spelling_index.json")
+
+    # Store the display fields of the new documents under their docIDs
+    report("storing metadata")
+    metadata_store = MetadataStore(base_dir / "data" / "metadata.db")
+    try:
+        metadata_store.append_csv(csv_path, indexer.first_doc_id, chunksize=chunksize)
+    finally:
+        metadata_store.close()
+
+    os.remove(csv_path)
+    report("done")
+    return {
+        "documents": indexer.last_doc_id - indexer.first_doc_id + 1,
+        "first_doc_id": indexer.first_doc_id,
+        "last_doc_id": indexer.last_doc_id,
+    }
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class BarrelCache:
+    """
+    Process-wide LRU cache of loaded barrels with a byte budget.
+
+    Entries are keyed by barrel file path and remember the file's (mtime, size) signature;
+    a lookup whose file has been replaced since it was loaded reloads it, so the cache stays
+    coherent with BarrelManager updates without any explicit coordination.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param max_bytes: Budget for the cached barrels, measured by their file sizes.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # path -> (signature, value, size)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, loader):
+        """
+        Return the loaded barrel at a path, loading it on a miss or when the file changed.
+
+        Evicted values are only dropped, never closed, so a reader still in use by another
+        query stays valid until it is garbage collected.
+
+        :param path: Barrel file path.
+        :param loader: Callable that loads the barrel from the path.
+        :return: The loaded barrel, or None if the file does not exist.
+        """
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.discard(path)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader(path)
+        size = stat.st_size
+        if size > self.max_bytes:
+            return value
+
+        with self.lock:
+            if path in self.entries:
+                self.total_bytes -= self.entries.pop(path)[2]
+            self.entries[path] = (signature, value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def discard(self, path: str) -> None:
+        """
+        Drop a barrel from the cache, e.g. right after it has been rewritten.
+
+        :param path: Barrel file path.
+        """
+        with self.lock:
+            entry = self.entries.pop(str(path), None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_barrel_cache = None
+_barrel_cache_lock = threading.Lock()
+
+
+def get_barrel_cache() -> BarrelCache:
+    """
+    Return the barrel cache shared by every BarrelManager in this process.
+    """
+    global _barrel_cache
+    with _barrel_cache_lock:
+        if _barrel_cache is None:
+            _barrel_cache = BarrelCache()
+        return _barrel_cache
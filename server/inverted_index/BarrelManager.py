@@ -2,15 +2,30 @@ import json
 import os
 from collections import defaultdict
 
+from inverted_index.BarrelCache import BarrelCache, get_barrel_cache
+from inverted_index.BinaryBarrel import BinaryBarrelReader, write_binary_barrel
+from inverted_index.CollectionStatistics import CollectionStatistics
+from inverted_index.CompactPostings import load_compact_barrel
+from inverted_index.ImpactIndex import ImpactBarrelReader, write_impact_barrel
+
 
 class BarrelManager:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, binary: bool = True, cache: BarrelCache = None, in_memory: bool = False):
         """
         Initialize the BarrelManager with the directory to store barrels.
 
         :param output_dir: Directory where barrels will be stored.
+        :param binary: Keep a binary copy of every updated barrel and serve lookups from it.
+        :param cache: Cache of loaded barrels used by lookups (default: the process-wide cache).
+        :param in_memory: Keep every binary barrel that is read resident as compact posting lists,
+                          outside the size-bounded cache; lookups then return CompactPostingList objects.
         """
         self.output_dir = output_dir
+        self.binary = binary
+        self.cache = cache if cache is not None else get_barrel_cache()
+        self.in_memory = in_memory
+        # barrel key -> {term: CompactPostingList}, filled by preload() or on first use
+        self.resident_barrels = {}
         os.makedirs(self.output_dir, exist_ok=True)
 
     @staticmethod
@@ -29,6 +44,105 @@ class BarrelManager:
         except ValueError:
             return None
 
+    def load_barrel(self, barrel_key: str) -> dict:
+        """
+        Load a JSON barrel, or start an empty one if it does not exist yet.
+
+        :param barrel_key: Barrel ID.
+        :return: Barrel contents ({bucket: {term: postings}}).
+        """
+        barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
+        if os.path.exists(barrel_path):
+            with open(barrel_path, "r") as file:
+                return json.load(file)
+        return {}
+
+    def save_barrel(self, barrel_key: str, barrel_data: dict, statistics: CollectionStatistics = None) -> None:
+        """
+        Write a barrel (and its binary copies) by renaming a temporary file over it,
+        so readers never see a partially written barrel.
+
+        :param barrel_key: Barrel ID.
+        :param barrel_data: Barrel contents ({bucket: {term: postings}}).
+        :param statistics: Up-to-date collection statistics; when given, the impact-ordered copy is written too.
+        """
+        barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
+        temp_path = f"{barrel_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(barrel_data, file)
+        os.replace(temp_path, barrel_path)
+        self.cache.discard(barrel_path)
+        self.resident_barrels.pop(barrel_key, None)
+
+        # The JSON barrels stay the source of truth; the binary copies are what queries read
+        if self.binary:
+            binary_path = os.path.join(self.output_dir, f"{barrel_key}.bin")
+            write_binary_barrel(binary_path, barrel_data)
+            self.cache.discard(binary_path)
+            if statistics is not None:
+                impact_path = os.path.join(self.output_dir, f"{barrel_key}.impact")
+                write_impact_barrel(impact_path, barrel_data, statistics)
+                self.cache.discard(impact_path)
+
+    @staticmethod
+    def merge_postings(existing_postings: list, new_postings: list) -> None:
+        """
+        Merge new postings into a term's existing postings in place.
+
+        :param existing_postings: Postings already stored for the term.
+        :param new_postings: Postings to add.
+        """
+        postings_by_doc = {posting["docID"]: posting for posting in existing_postings}
+        for new_posting in new_postings:
+            doc_id = new_posting["docID"]
+            existing_posting = postings_by_doc.get(doc_id)
+            if existing_posting is None:
+                existing_postings.append(new_posting)
+                postings_by_doc[doc_id] = new_posting
+            else:
+                existing_posting["frequency"] += new_posting["frequency"]
+                existing_posting["positions"] = sorted(set(existing_posting["positions"]) | set(new_posting["positions"]))
+
+    def update_barrels(self, new_index: dict) -> None:
+        """
+        Merge an in-memory inverted index into the barrels.
+
+        Terms are grouped by barrel first, so every touched barrel is loaded, merged
+        and written exactly once.
+
+        :param new_index: Inverted index mapping term IDs to postings.
+        """
+        terms_by_barrel = defaultdict(dict)
+        for term, new_postings in new_index.items():
+            barrel_key = self.get_barrel(term)
+            if not barrel_key:
+                print(f"Invalid term '{term}': Unable to determine barrel.")
+                continue
+            terms_by_barrel[barrel_key][term] = new_postings
+
+        # Keep the corpus statistics used by BM25 ranking in step with the barrels. They are
+        # updated first because the impact-ordered barrels need the new document lengths.
+        # Missing, outdated or damaged statistics are rebuilt from the barrels here
+        statistics = CollectionStatistics.for_barrels(self.output_dir)
+        statistics.add_postings(new_index)
+
+        for barrel_key, terms in terms_by_barrel.items():
+            barrel_data = self.load_barrel(barrel_key)
+
+            for term, new_postings in terms.items():
+                bucket = barrel_data.setdefault(self.get_bucket(term), {})
+                if term in bucket:
+                    self.merge_postings(bucket[term], new_postings)
+                else:
+                    bucket[term] = new_postings
+                statistics.set_document_frequency(term, len(bucket[term]))
+
+            self.save_barrel(barrel_key, barrel_data, statistics)
+
+        statistics.save()
+
+        print(f"Updated {len(new_index)} terms across {len(terms_by_barrel)} barrels in '{self.output_dir}'.")
+
     def update_barrels_with_json(self, new_index_path: str) -> None:
         """
         Update barrels with terms and postings from a new inverted index JSON file.
@@ -42,69 +156,119 @@ class BarrelManager:
         with open(new_index_path, "r") as file:
             new_index = json.load(file)
 
-        for term, new_postings in new_index.items():
+        self.update_barrels(new_index)
+
+    def open_impacts(self, term: str) -> ImpactBarrelReader:
+        """
+        Open the impact-ordered barrel holding a term.
+
+        :param term: Term ID.
+        :return: A cached ImpactBarrelReader shared with other queries (do not close it),
+                 or None if there is no impact file.
+        """
+        barrel_key = self.get_barrel(term)
+        if not barrel_key:
+            return None
+        return self.cache.get(os.path.join(self.output_dir, f"{barrel_key}.impact"), ImpactBarrelReader)
+
+    @staticmethod
+    def read_json_barrel(barrel_path: str) -> dict:
+        with open(barrel_path, "r") as file:
+            return json.load(file)
+
+    def query_term(self, term: str) -> dict:
+        return self.query_terms([term]).get(term)
+
+    def query_terms(self, terms: list) -> dict:
+        """
+        Look up the postings of many terms, grouping them by barrel so each barrel is
+        resolved once however many of the terms it holds.
+
+        :param terms: Term IDs.
+        :return: Dictionary of term ID to postings (None for a term without postings).
+        """
+        terms_by_barrel = defaultdict(list)
+        for term in dict.fromkeys(terms):
             barrel_key = self.get_barrel(term)
-            if not barrel_key:
-                print(f"Invalid term '{term}': Unable to determine barrel.")
-                continue
+            if barrel_key:
+                terms_by_barrel[barrel_key].append(term)
 
-            bucket_key = self.get_bucket(term)
-            if not bucket_key:
-                print(f"Invalid term '{term}': Unable to determine bucket.")
-                continue
+        postings = {}
+        for barrel_key, barrel_terms in terms_by_barrel.items():
+            if self.in_memory:
+                barrel = self.resident_barrel(barrel_key)
+                if barrel is not None:
+                    for term in barrel_terms:
+                        postings[term] = barrel.get(term)
+                    continue
 
-            barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
+            # Loaded barrels come from the shared cache, so hot barrels are mapped or parsed only once
+            if self.binary:
+                reader = self.cache.get(os.path.join(self.output_dir, f"{barrel_key}.bin"), BinaryBarrelReader)
+                if reader is not None:
+                    for term in barrel_terms:
+                        postings[term] = reader.lookup(term)
+                    continue
 
-            # Load the existing barrel data or initialize a new one
-            if os.path.exists(barrel_path):
-                with open(barrel_path, "r") as file:
-                    barrel_data = json.load(file)
-            else:
-                barrel_data = defaultdict(dict)
-
-            # Access the bucket
-            bucket = barrel_data.get(bucket_key, {})
-
-            # If the term exists, update its postings
-            if term in bucket:
-                existing_postings = bucket[term]
-                for new_posting in new_postings:
-                    doc_id = new_posting["docID"]
-                    found = False
-                    for existing_posting in existing_postings:
-                        if existing_posting["docID"] == doc_id:
-                            existing_posting["frequency"] += new_posting["frequency"]
-                            existing_posting["positions"].extend(new_posting["positions"])
-                            existing_posting["positions"] = sorted(set(existing_posting["positions"]))
-                            found = True
-                            break
-                    if not found:
-                        existing_postings.append(new_posting)
-            else:
-                # If the term does not exist, add it
-                bucket[term] = new_postings
+            barrel_data = self.cache.get(os.path.join(self.output_dir, f"{barrel_key}.json"), self.read_json_barrel)
+            for term in barrel_terms:
+                bucket = barrel_data.get(self.get_bucket(term), {}) if barrel_data is not None else {}
+                postings[term] = bucket.get(term, None)
+        return postings
 
-            # Update the bucket in the barrel
-            barrel_data[bucket_key] = bucket
+    def resident_barrel(self, barrel_key: str) -> dict:
+        """
+        Return a barrel held in memory as compact posting lists, loading it on first use.
 
-            # Save the updated barrel data back to the file
-            with open(barrel_path, "w") as file:
-                json.dump(barrel_data, file, indent=4)
+        :param barrel_key: Barrel ID.
+        :return: Dictionary of term ID to CompactPostingList, or None if there is no binary barrel.
+        """
+        barrel = self.resident_barrels.get(barrel_key)
+        if barrel is None:
+            binary_path = os.path.join(self.output_dir, f"{barrel_key}.bin")
+            if not os.path.exists(binary_path):
+                return None
+            barrel = self.resident_barrels[barrel_key] = load_compact_barrel(binary_path)
+        return barrel
 
-            print(f"Term '{term}' has been updated/added in barrel '{barrel_key}', bucket '{bucket_key}'.")
+    def preload(self) -> int:
+        """
+        Load every binary barrel into memory, so no query of the in-memory mode touches the disk.
 
-    def query_term(self, term: str) -> dict:
-        barrel_key = self.get_barrel(term)
-        if not barrel_key:
-            return None
+        :return: Number of barrels loaded.
+        """
+        barrel_keys = [name[:-4] for name in os.listdir(self.output_dir)
+                       if name.endswith(".bin") and name[:-4].isdigit()]
+        for barrel_key in barrel_keys:
+            self.resident_barrel(barrel_key)
+        return len(barrel_keys)
 
-        bucket_key = self.get_bucket(term)
-        if not bucket_key:
-            return None
+    def resident_bytes(self) -> int:
+        """
+        Bytes held by the posting buffers of the resident barrels.
+        """
+        return sum(postings.nbytes for barrel in list(self.resident_barrels.values()) for postings in barrel.values())
 
-        barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
-        if os.path.exists(barrel_path):
-            with open(barrel_path, "r") as file:
-                barrel_data = json.load(file)
-            return barrel_data.get(bucket_key, {}).get(term, None)
-        return None
+
+class PrefetchedBarrels:
+    """
+    Read-only view of a BarrelManager that answers lookups from postings fetched ahead of
+    time with query_terms, so a batch of queries reads each barrel once. Terms that were
+    not prefetched, and every other method, go to the wrapped manager.
+    """
+
+    def __init__(self, barrel_manager: BarrelManager, postings: dict):
+        """
+        :param barrel_manager: Manager to fall back to.
+        :param postings: Dictionary of term ID to postings, as returned by query_terms.
+        """
+        self.barrel_manager = barrel_manager
+        self.postings = postings
+
+    def query_term(self, term: str) -> dict:
+        if term in self.postings:
+            return self.postings[term]
+        return self.barrel_manager.query_term(term)
+
+    def __getattr__(self, name):
+        return getattr(self.barrel_manager, name)
@@ -0,0 +1,398 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+# File layout:
+#   header       MAGIC, term count (uint32)
+#   offset table one (term ID uint32, offset uint64, length uint32) entry per term, sorted by term ID
+#   postings     per term: varint posting count and varint block count, then one skip entry per
+#                block of BLOCK_SIZE postings (varint delta of the block's last docID from the
+#                previous block's, varint byte length of the block), then the blocks. Per posting
+#                a block holds a varint docID delta, varint frequency, varint position count and
+#                varint position deltas.
+# BRL1 barrels have the same layout without the block count and skip entries.
+MAGIC = b"BRL2"
+LEGACY_MAGIC = b"BRL1"
+HEADER = struct.Struct("<4sI")
+TABLE_ENTRY = struct.Struct("<IQI")
+BLOCK_SIZE = 128
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """
+    Append an unsigned integer to the buffer using LEB128 variable-byte encoding.
+
+    :param value: Non-negative integer to encode.
+    :param out: Buffer the encoded bytes are appended to.
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset: int) -> tuple:
+    """
+    Decode one variable-byte integer.
+
+    :param data: Buffer (bytes or mmap) to read from.
+    :param offset: Position of the first byte of the integer.
+    :return: Tuple of the decoded value and the offset just past it.
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def encode_postings(postings: list) -> bytes:
+    """
+    Encode one term's postings in blocks, with delta-encoded docIDs and positions and a
+    skip entry per block.
+
+    :param postings: List of {"docID", "frequency", "positions"} postings.
+    :return: The encoded bytes.
+    """
+    postings = sorted(postings, key=lambda p: int(p["docID"]))
+    skips = bytearray()
+    blocks = bytearray()
+    previous_doc = 0
+    for start in range(0, len(postings), BLOCK_SIZE):
+        block = bytearray()
+        block_start_doc = previous_doc
+        for posting in postings[start:start + BLOCK_SIZE]:
+            doc_id = int(posting["docID"])
+            encode_varint(doc_id - previous_doc, block)
+            previous_doc = doc_id
+
+            encode_varint(posting["frequency"], block)
+            positions = sorted(posting["positions"])
+            encode_varint(len(positions), block)
+            previous_pos = 0
+            for pos in positions:
+                encode_varint(pos - previous_pos, block)
+                previous_pos = pos
+        encode_varint(previous_doc - block_start_doc, skips)
+        encode_varint(len(block), skips)
+        blocks += block
+
+    out = bytearray()
+    encode_varint(len(postings), out)
+    encode_varint(-(-len(postings) // BLOCK_SIZE), out)
+    return bytes(out + skips + blocks)
+
+
+def skip_block_table(data, offset: int) -> tuple:
+    """
+    Read past the block count and skip entries of a term's postings.
+
+    :param data: Buffer holding the encoded postings.
+    :param offset: Position just after the posting count.
+    :return: Offset of the first posting.
+    """
+    block_count, offset = decode_varint(data, offset)
+    for _ in range(2 * block_count):
+        _, offset = decode_varint(data, offset)
+    return offset
+
+
+def decode_postings(data, offset: int = 0, block_skips: bool = True) -> list:
+    """
+    Decode one term's postings back into the JSON barrel representation.
+
+    :param data: Buffer holding the encoded postings.
+    :param offset: Position of the encoded postings in the buffer.
+    :param block_skips: False for postings from a BRL1 barrel, which has no skip entries.
+    :return: List of {"docID", "frequency", "positions"} postings.
+    """
+    count, offset = decode_varint(data, offset)
+    if block_skips:
+        offset = skip_block_table(data, offset)
+    postings = []
+    doc_id = 0
+    for _ in range(count):
+        delta, offset = decode_varint(data, offset)
+        doc_id += delta
+        frequency, offset = decode_varint(data, offset)
+        position_count, offset = decode_varint(data, offset)
+        positions = []
+        pos = 0
+        for _ in range(position_count):
+            delta, offset = decode_varint(data, offset)
+            pos += delta
+            positions.append(pos)
+        postings.append({"docID": str(doc_id), "frequency": frequency, "positions": positions})
+    return postings
+
+
+def write_binary_barrel(barrel_path: str, barrel_data: dict) -> None:
+    """
+    Write a barrel in the binary format, replacing any existing file atomically.
+
+    :param barrel_path: Destination path of the binary barrel.
+    :param barrel_data: Barrel contents in the JSON layout ({bucket: {term: postings}}).
+    """
+    terms = {}
+    for bucket in barrel_data.values():
+        for term, postings in bucket.items():
+            terms[int(term)] = encode_postings(postings)
+
+    table = bytearray()
+    body = bytearray()
+    data_start = HEADER.size + TABLE_ENTRY.size * len(terms)
+    for term_id in sorted(terms):
+        encoded = terms[term_id]
+        table += TABLE_ENTRY.pack(term_id, data_start + len(body), len(encoded))
+        body += encoded
+
+    temp_path = f"{barrel_path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(terms)))
+        file.write(table)
+        file.write(body)
+    os.replace(temp_path, barrel_path)
+
+
+class BlockPostingList(Sequence):
+    """
+    The postings of one term, decoded lazily from a binary barrel.
+
+    Only the skip entries are decoded when the list is opened. A block of postings is
+    decoded the first time one of its entries is accessed (positions only when a posting
+    is built), so an intersection that gallops over the skip entries decodes just the
+    blocks that can hold the docIDs it probes for.
+    """
+
+    def __init__(self, data, offset: int):
+        """
+        :param data: Buffer holding the encoded postings (the barrel's mmap).
+        :param offset: Position of the term's encoded postings.
+        """
+        self.data = data
+        self.count, offset = decode_varint(data, offset)
+        block_count, offset = decode_varint(data, offset)
+        # Last docID of each block, and where each block starts
+        self.block_last_doc_ids = []
+        self.block_offsets = []
+        last_doc = 0
+        for _ in range(block_count):
+            delta, offset = decode_varint(data, offset)
+            last_doc += delta
+            self.block_last_doc_ids.append(last_doc)
+            length, offset = decode_varint(data, offset)
+            self.block_offsets.append(length)
+        for index, length in enumerate(self.block_offsets):
+            self.block_offsets[index] = offset
+            offset += length
+        self.blocks = {}
+        self.doc_ids = BlockColumn(self, 0)
+        self.frequencies = BlockColumn(self, 1)
+
+    def block(self, index: int) -> tuple:
+        """
+        Decode one block, or return it from the blocks decoded already.
+
+        :param index: Index of the block.
+        :return: Tuple of the block's docIDs, frequencies and the offsets of their positions.
+        """
+        block = self.blocks.get(index)
+        if block is not None:
+            return block
+
+        data = self.data
+        offset = self.block_offsets[index]
+        doc_id = self.block_last_doc_ids[index - 1] if index else 0
+        doc_ids, frequencies, position_offsets = [], [], []
+        for _ in range(min(BLOCK_SIZE, self.count - index * BLOCK_SIZE)):
+            delta, offset = decode_varint(data, offset)
+            doc_id += delta
+            doc_ids.append(doc_id)
+            frequency, offset = decode_varint(data, offset)
+            frequencies.append(frequency)
+            position_offsets.append(offset)
+            position_count, offset = decode_varint(data, offset)
+            for _ in range(position_count):
+                while data[offset] >= 0x80:
+                    offset += 1
+                offset += 1
+        block = self.blocks[index] = (doc_ids, frequencies, position_offsets)
+        return block
+
+    def positions(self, offset: int) -> list:
+        position_count, offset = decode_varint(self.data, offset)
+        positions = []
+        pos = 0
+        for _ in range(position_count):
+            delta, offset = decode_varint(self.data, offset)
+            pos += delta
+            positions.append(pos)
+        return positions
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        doc_ids, frequencies, position_offsets = self.block(index // BLOCK_SIZE)
+        index %= BLOCK_SIZE
+        return {
+            "docID": str(doc_ids[index]),
+            "frequency": frequencies[index],
+            "positions": self.positions(position_offsets[index]),
+        }
+
+    def __iter__(self):
+        for block_index in range(len(self.block_offsets)):
+            doc_ids, frequencies, position_offsets = self.block(block_index)
+            for doc_id, frequency, offset in zip(doc_ids, frequencies, position_offsets):
+                yield {"docID": str(doc_id), "frequency": frequency, "positions": self.positions(offset)}
+
+
+class BlockColumn(Sequence):
+    """
+    DocIDs or frequencies of a BlockPostingList, read without building postings.
+    """
+
+    def __init__(self, postings: BlockPostingList, column: int):
+        self.postings = postings
+        self.column = column
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.postings.block(index // BLOCK_SIZE)[self.column][index % BLOCK_SIZE]
+
+    def __iter__(self):
+        for block_index in range(len(self.postings.block_offsets)):
+            yield from self.postings.block(block_index)[self.column]
+
+
+class BinaryBarrelReader:
+    """
+    Read-only view of a binary barrel backed by mmap.
+
+    Only the offset table and the bytes of the requested term are touched on lookup,
+    so the cost does not depend on how many terms the barrel holds. BRL1 barrels written
+    before the skip entries existed are still read, without lazy decoding.
+    """
+
+    def __init__(self, barrel_path: str):
+        """
+        Open and map a binary barrel.
+
+        :param barrel_path: Path to the binary barrel file.
+        """
+        self.barrel_path = barrel_path
+        self.file = open(barrel_path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.term_count = HEADER.unpack_from(self.data, 0)
+        if magic not in (MAGIC, LEGACY_MAGIC):
+            self.close()
+            raise ValueError(f"Not a binary barrel: {barrel_path}")
+        self.block_skips = magic == MAGIC
+
+    def find_entry(self, term_id: int) -> tuple:
+        """
+        Binary search the offset table for a term.
+
+        :param term_id: Integer term ID.
+        :return: Tuple of (offset, length), or None if the term is not in this barrel.
+        """
+        low, high = 0, self.term_count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            entry_term, offset, length = TABLE_ENTRY.unpack_from(self.data, HEADER.size + mid * TABLE_ENTRY.size)
+            if entry_term == term_id:
+                return offset, length
+            if entry_term < term_id:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return None
+
+    def entries(self):
+        """
+        Iterate over the offset table.
+
+        :return: Generator of (term ID, offset, length) tuples in term ID order.
+        """
+        for index in range(self.term_count):
+            yield TABLE_ENTRY.unpack_from(self.data, HEADER.size + index * TABLE_ENTRY.size)
+
+    def lookup(self, term: str) -> Sequence:
+        """
+        Open the postings of a single term.
+
+        :param term: Term ID as a string.
+        :return: The term's BlockPostingList (a decoded list for BRL1 barrels),
+                 or None if the term is not in this barrel.
+        """
+        try:
+            term_id = int(term)
+        except ValueError:
+            return None
+
+        entry = self.find_entry(term_id)
+        if entry is None:
+            return None
+        offset, _ = entry
+        if not self.block_skips:
+            return decode_postings(self.data, offset, block_skips=False)
+        # The mmap is never closed while the barrel is cached or evicted, so the list can keep reading it
+        return BlockPostingList(self.data, offset)
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def convert_json_barrels(barrels_dir: str) -> int:
+    """
+    Convert every JSON barrel in a directory to the binary format.
+
+    :param barrels_dir: Directory holding the <barrel>.json files.
+    :return: Number of barrels converted.
+    """
+    converted = 0
+    for json_path in sorted(Path(barrels_dir).glob("*.json")):
+        if not json_path.stem.isdigit():
+            continue
+        with open(json_path, "r") as file:
+            barrel_data = json.load(file)
+        write_binary_barrel(str(json_path.with_suffix(".bin")), barrel_data)
+        converted += 1
+    print(f"Converted {converted} JSON barrels to binary in '{barrels_dir}'.")
+    return converted
+
+
+if __name__ == "__main__":
+    default_dir = Path(__file__).resolve().parent / "barrels"
+    convert_json_barrels(sys.argv[1] if len(sys.argv) > 1 else default_dir)
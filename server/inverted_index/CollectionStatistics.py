@@ -0,0 +1,217 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def document_frequency(statistics, term_id, postings) -> int:
+    """
+    Count the documents containing a term, from the collection statistics when they hold
+    document frequencies, otherwise from the term's postings.
+
+    :param statistics: CollectionStatistics of the barrels, or None.
+    :param term_id: Term ID.
+    :param postings: Postings of the term, counted when the statistics cannot answer.
+    :return: The document frequency.
+    """
+    if statistics is not None and statistics.has_document_frequencies:
+        return statistics.document_frequency(term_id)
+    return len(postings)
+
+
+class CollectionStatistics:
+    """
+    Corpus statistics needed for BM25 scoring and query planning, maintained at index time
+    so ranking never has to rescan postings.
+
+    Document lengths are stored densely by docID (the number of indexed term occurrences
+    in the document); docIDs that were never indexed have length 0. Document frequencies
+    are stored densely by term ID. Both arrays live in .npy files next to a small JSON
+    header holding the totals, and are memory-mapped on load, so loading the statistics
+    does not depend on the size of the collection.
+    """
+
+    FILE_NAME = "collection_stats.json"
+    DOC_LENGTHS_FILE_NAME = "doc_lengths.npy"
+    DOCUMENT_FREQUENCIES_FILE_NAME = "document_frequencies.npy"
+
+    def __init__(self, stats_path: str, load: bool = True):
+        """
+        Load the statistics sidecar, or start empty if it does not exist yet.
+
+        :param stats_path: Path of the statistics JSON file; the arrays are stored in the same directory.
+        :param load: Start empty even if the sidecar exists, e.g. to rebuild it.
+        :raises ValueError: If the arrays do not match the totals of the header (e.g. a partial write).
+        """
+        self.stats_path = stats_path
+        directory = os.path.dirname(stats_path)
+        self.doc_lengths_path = os.path.join(directory, self.DOC_LENGTHS_FILE_NAME)
+        self.document_frequencies_path = os.path.join(directory, self.DOCUMENT_FREQUENCIES_FILE_NAME)
+
+        self.doc_lengths = np.zeros(0, dtype=np.int64)
+        self.document_frequencies = np.zeros(0, dtype=np.int64)
+        self.total_docs = 0
+        self.total_length = 0
+        # False for statistics written before document frequencies were recorded
+        self.has_document_frequencies = True
+        if not load or not os.path.exists(stats_path):
+            return
+
+        with open(stats_path, "r") as file:
+            data = json.load(file)
+        if "doc_lengths" in data:
+            # Older sidecars kept the document lengths inline and had no document frequencies
+            self.doc_lengths = np.asarray(data["doc_lengths"], dtype=np.int64)
+            self.total_docs = int(np.count_nonzero(self.doc_lengths))
+            self.total_length = int(self.doc_lengths.sum())
+            self.has_document_frequencies = False
+            return
+
+        self.total_docs = data["total_docs"]
+        self.total_length = data["total_length"]
+        self.doc_lengths = np.load(self.doc_lengths_path, mmap_mode="r")
+        self.document_frequencies = np.load(self.document_frequencies_path, mmap_mode="r")
+        if len(self.doc_lengths) != data["documents"] or len(self.document_frequencies) != data["terms"]:
+            raise ValueError(f"Statistics arrays do not match their header in {stats_path}")
+
+    @classmethod
+    def for_barrels(cls, barrels_dir: str) -> "CollectionStatistics":
+        """
+        Load the statistics of a barrels directory.
+
+        They are rebuilt from the barrels when barrels exist but the sidecar is missing, was
+        written before document frequencies were recorded, or is unreadable or inconsistent,
+        so ranking never runs on empty statistics for a non-empty index.
+
+        :param barrels_dir: Directory holding the barrels and the statistics.
+        :return: The statistics.
+        """
+        stats_path = os.path.join(barrels_dir, cls.FILE_NAME)
+        if not os.path.exists(stats_path):
+            if not cls.barrel_paths(barrels_dir):
+                return cls(stats_path)
+            reason = "missing"
+        else:
+            try:
+                stats = cls(stats_path)
+                if stats.has_document_frequencies:
+                    return stats
+                reason = "no document frequencies"
+            except (OSError, ValueError, KeyError) as e:
+                reason = str(e)
+        print(f"Rebuilding collection statistics in '{barrels_dir}' ({reason}).")
+        return cls.rebuild(barrels_dir)
+
+    @staticmethod
+    def barrel_paths(barrels_dir: str) -> list:
+        """
+        :return: Paths of the <barrel>.json files of a directory.
+        """
+        return [path for path in Path(barrels_dir).glob("*.json") if path.stem.isdigit()]
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / self.total_docs if self.total_docs else 0.0
+
+    def lengths_for(self, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Look up the lengths of many documents at once.
+
+        :param doc_ids: Integer docIDs.
+        :return: Their lengths (0 for unknown docIDs).
+        """
+        lengths = np.zeros(len(doc_ids), dtype=np.int64)
+        known = doc_ids < len(self.doc_lengths)
+        lengths[known] = self.doc_lengths[doc_ids[known]]
+        return lengths
+
+    def document_frequency(self, term_id) -> int:
+        """
+        Return the number of documents containing a term.
+
+        :param term_id: Term ID (int or string).
+        :return: Its document frequency (0 for unknown terms).
+        """
+        term_id = int(term_id)
+        return int(self.document_frequencies[term_id]) if 0 <= term_id < len(self.document_frequencies) else 0
+
+    @staticmethod
+    def grown(values: np.ndarray, size: int) -> np.ndarray:
+        """
+        Return a writable copy of an array, zero-padded to at least size entries.
+        """
+        if size <= len(values):
+            # Memory-mapped arrays are read-only; they are copied on the first update
+            return values if values.flags.writeable else np.array(values, dtype=np.int64)
+        grown = np.zeros(max(size, 2 * len(values)), dtype=np.int64)
+        grown[:len(values)] = values
+        return grown
+
+    def add_postings(self, new_index: dict) -> None:
+        """
+        Account for new postings in the document lengths.
+
+        :param new_index: Inverted index mapping term IDs to postings.
+        """
+        for postings in new_index.values():
+            for posting in postings:
+                doc_id = int(posting["docID"])
+                self.doc_lengths = self.grown(self.doc_lengths, doc_id + 1)
+                if self.doc_lengths[doc_id] == 0:
+                    self.total_docs += 1
+                self.doc_lengths[doc_id] += posting["frequency"]
+                self.total_length += posting["frequency"]
+
+    def set_document_frequency(self, term_id, document_frequency: int) -> None:
+        """
+        Record the number of documents containing a term, e.g. after its postings were merged.
+
+        :param term_id: Term ID (int or string).
+        :param document_frequency: Length of the term's merged posting list.
+        """
+        term_id = int(term_id)
+        self.document_frequencies = self.grown(self.document_frequencies, term_id + 1)
+        self.document_frequencies[term_id] = document_frequency
+
+    def save(self) -> None:
+        # The arrays are written first, so a reader never finds a header without its arrays
+        last_doc = int(np.flatnonzero(self.doc_lengths)[-1]) + 1 if self.total_docs else 0
+        last_term = int(np.flatnonzero(self.document_frequencies)[-1]) + 1 \
+            if np.any(self.document_frequencies) else 0
+        for path, values in ((self.doc_lengths_path, self.doc_lengths[:last_doc]),
+                             (self.document_frequencies_path, self.document_frequencies[:last_term])):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as file:
+                np.save(file, np.ascontiguousarray(values, dtype=np.int64))
+            os.replace(temp_path, path)
+
+        temp_path = f"{self.stats_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({
+                "total_docs": self.total_docs,
+                "total_length": self.total_length,
+                "documents": last_doc,
+                "terms": last_term,
+            }, file)
+        os.replace(temp_path, self.stats_path)
+        self.has_document_frequencies = True
+
+    @classmethod
+    def rebuild(cls, barrels_dir: str) -> "CollectionStatistics":
+        """
+        Recompute the statistics from every JSON barrel, e.g. for an index built before they existed.
+
+        :param barrels_dir: Directory holding the <barrel>.json files.
+        :return: The rebuilt and saved statistics.
+        """
+        stats = cls(os.path.join(barrels_dir, cls.FILE_NAME), load=False)
+        for barrel_path in cls.barrel_paths(barrels_dir):
+            with open(barrel_path, "r") as file:
+                barrel_data = json.load(file)
+            for bucket in barrel_data.values():
+                stats.add_postings(bucket)
+                for term, postings in bucket.items():
+                    stats.set_document_frequency(term, len(postings))
+        stats.save()
+        return stats
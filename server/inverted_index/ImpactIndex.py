@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from inverted_index.BinaryBarrel import encode_varint, decode_varint
+from inverted_index.CollectionStatistics import CollectionStatistics
+
+# File layout (<barrel>.impact, next to the <barrel>.bin it mirrors):
+#   header       MAGIC, term count (uint32)
+#   term table   one (term ID uint32, offset uint64, document count uint32, max frequency uint32,
+#                min document length uint32) entry per term, sorted by term ID
+#   blocks       per term: varint block count, then per block a varint max frequency, varint min
+#                document length, varint byte length and the block's (docID, frequency) varint pairs
+#
+# Postings are stored in impact order (best BM25 term weight first) in blocks of BLOCK_SIZE.
+# A block's max frequency / min length cover that block and every block after it, so the
+# score bound computed from them never increases from one block to the next.
+MAGIC = b"IMP1"
+HEADER = struct.Struct("<4sI")
+TABLE_ENTRY = struct.Struct("<IQIII")
+BLOCK_SIZE = 64
+
+# BM25 parameters used to order postings by impact; the bounds themselves do not depend on them
+K1 = 1.2
+B = 0.75
+
+
+def term_weight(frequency: int, doc_length: float, average_length: float, k1: float = K1, b: float = B) -> float:
+    """
+    The BM25 term frequency component of a posting (its score before multiplying by the IDF).
+
+    It grows with the frequency and shrinks with the document length, so (max frequency,
+    min document length) over a set of postings bounds the weight of every one of them.
+
+    :param frequency: Term frequency in the document.
+    :param doc_length: Length of the document.
+    :param average_length: Average document length of the collection.
+    :return: The term weight.
+    """
+    if frequency <= 0:
+        return 0.0
+    length_norm = k1 * (1 - b + b * doc_length / (average_length or 1.0))
+    return frequency * (k1 + 1) / (frequency + length_norm)
+
+
+def encode_impact_postings(postings: list, statistics: CollectionStatistics) -> tuple:
+    """
+    Encode one term's postings in impact order.
+
+    :param postings: List of {"docID", "frequency", "positions"} postings.
+    :param statistics: Collection statistics holding the document lengths.
+    :return: Tuple of (encoded bytes, max frequency, min document length).
+    """
+    average_length = statistics.average_length
+    entries = []
+    for posting in postings:
+        doc_id = int(posting["docID"])
+        length = int(statistics.doc_lengths[doc_id]) if doc_id < len(statistics.doc_lengths) else 0
+        entries.append((doc_id, posting["frequency"], length))
+    entries.sort(key=lambda entry: (-term_weight(entry[1], entry[2], average_length), entry[0]))
+
+    blocks = [entries[start:start + BLOCK_SIZE] for start in range(0, len(entries), BLOCK_SIZE)]
+
+    # Suffix bounds, so the bound of block i also covers every later block
+    bounds = []
+    max_frequency, min_length = 0, None
+    for block in reversed(blocks):
+        max_frequency = max(max_frequency, max(frequency for _, frequency, _ in block))
+        block_min = min(length for _, _, length in block)
+        min_length = block_min if min_length is None else min(min_length, block_min)
+        bounds.append((max_frequency, min_length))
+    bounds.reverse()
+
+    out = bytearray()
+    encode_varint(len(blocks), out)
+    for block, (block_frequency, block_length) in zip(blocks, bounds):
+        body = bytearray()
+        for doc_id, frequency, _ in block:
+            encode_varint(doc_id, body)
+            encode_varint(frequency, body)
+        encode_varint(block_frequency, out)
+        encode_varint(block_length, out)
+        encode_varint(len(body), out)
+        out += body
+
+    if not bounds:
+        return bytes(out), 0, 0
+    return bytes(out), bounds[0][0], bounds[0][1]
+
+
+def write_impact_barrel(impact_path: str, barrel_data: dict, statistics: CollectionStatistics) -> None:
+    """
+    Write the impact-ordered copy of a barrel, replacing any existing file atomically.
+
+    :param impact_path: Destination path of the impact file.
+    :param barrel_data: Barrel contents in the JSON layout ({bucket: {term: postings}}).
+    :param statistics: Collection statistics, already updated for the postings being written.
+    """
+    terms = {}
+    for bucket in barrel_data.values():
+        for term, postings in bucket.items():
+            terms[int(term)] = (len(postings), *encode_impact_postings(postings, statistics))
+
+    table = bytearray()
+    body = bytearray()
+    data_start = HEADER.size + TABLE_ENTRY.size * len(terms)
+    for term_id in sorted(terms):
+        count, encoded, max_frequency, min_length = terms[term_id]
+        table += TABLE_ENTRY.pack(term_id, data_start + len(body), count, max_frequency, min_length)
+        body += encoded
+
+    temp_path = f"{impact_path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(terms)))
+        file.write(table)
+        file.write(body)
+    os.replace(temp_path, impact_path)
+
+
+class ImpactBarrelReader:
+    """
+    Read-only, mmap-backed view of an impact file.
+
+    Blocks are decoded one at a time, so a top-k scan that stops early never touches the
+    remaining postings of the term.
+    """
+
+    def __init__(self, impact_path: str):
+        """
+        Open and map an impact file.
+
+        :param impact_path: Path to the impact file.
+        """
+        self.impact_path = impact_path
+        self.file = open(impact_path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.term_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an impact barrel: {impact_path}")
+
+    def find_entry(self, term: str) -> tuple:
+        """
+        Binary search the term table.
+
+        :param term: Term ID as a string.
+        :return: Tuple of (offset, document count, max frequency, min document length),
+                 or None if the term is not in this barrel.
+        """
+        try:
+            term_id = int(term)
+        except ValueError:
+            return None
+
+        low, high = 0, self.term_count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            entry_term, *entry = TABLE_ENTRY.unpack_from(self.data, HEADER.size + mid * TABLE_ENTRY.size)
+            if entry_term == term_id:
+                return tuple(entry)
+            if entry_term < term_id:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return None
+
+    def iter_blocks(self, term: str):
+        """
+        Yield a term's blocks in impact order.
+
+        :param term: Term ID as a string.
+        :return: Generator of (max frequency, min document length, [(docID, frequency), ...]).
+        """
+        entry = self.find_entry(term)
+        if entry is None:
+            return
+        offset = entry[0]
+        block_count, offset = decode_varint(self.data, offset)
+        for _ in range(block_count):
+            max_frequency, offset = decode_varint(self.data, offset)
+            min_length, offset = decode_varint(self.data, offset)
+            size, offset = decode_varint(self.data, offset)
+            end = offset + size
+            postings = []
+            while offset < end:
+                doc_id, offset = decode_varint(self.data, offset)
+                frequency, offset = decode_varint(self.data, offset)
+                postings.append((doc_id, frequency))
+            yield max_frequency, min_length, postings
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_impact_barrels(barrels_dir: str) -> int:
+    """
+    Write the impact file of every JSON barrel in a directory, e.g. for an index built before they existed.
+
+    :param barrels_dir: Directory holding the <barrel>.json files and collection statistics.
+    :return: Number of barrels written.
+    """
+    statistics = CollectionStatistics.for_barrels(barrels_dir)
+    written = 0
+    for json_path in sorted(Path(barrels_dir).glob("*.json")):
+        if not json_path.stem.isdigit():
+            continue
+        with open(json_path, "r") as file:
+            barrel_data = json.load(file)
+        write_impact_barrel(str(json_path.with_suffix(".impact")), barrel_data, statistics)
+        written += 1
+    return written
+
+
+if __name__ == "__main__":
+    # Run from the server directory: python -m inverted_index.ImpactIndex [barrels_dir]
+    default_dir = Path(__file__).resolve().parent / "barrels"
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else default_dir
+    print(f"Wrote {build_impact_barrels(target_dir)} impact barrels in '{target_dir}'.")
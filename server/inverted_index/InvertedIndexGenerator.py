@@ -3,6 +3,8 @@ from collections import defaultdict
 import os
 from pathlib import Path
 
+from Forward_Index.SegmentStore import SegmentStore
+
 
 class InvertedIndexGenerator:
     def __init__(self, forward_index_path: str, output_file_path: str):
@@ -18,7 +20,8 @@ class InvertedIndexGenerator:
 
     def load_forward_index(self) -> dict:
         """
-        Loads the forward index from the specified path.
+        Loads the forward index from the specified path, which may be a single JSON file
+        or a directory of forward index segments.
 
         Returns:
             dict: The loaded forward index.
@@ -26,6 +29,9 @@ class InvertedIndexGenerator:
         Raises:
             FileNotFoundError: If the forward index file is not found.
         """
+        if os.path.isdir(self.forward_index_path):
+            return SegmentStore(self.forward_index_path).load_all()
+
         try:
             with open(self.forward_index_path, 'r') as file:
                 return json.load(file)
@@ -2,14 +2,14 @@ import pathlib
 import sys
 from pathlib import Path
 
-# Add the 'inverted_index' directory to the Python path
-sys.path.append(str(Path(__file__).resolve().parent))
+# Add the 'server' directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 # Define paths
 inverted_index_path = (pathlib.Path().absolute() / "server" / "inverted_index" / "New_Inverted.json")
 output_dir = (pathlib.Path().absolute() / "server" / "inverted_index" / "barrels")
 
-from BarrelManager import BarrelManager
+from inverted_index.BarrelManager import BarrelManager
 manager = BarrelManager(output_dir)
 
     # Update barrels with the new JSON
@@ -3,9 +3,10 @@ import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 output_file_path = (pathlib.Path().absolute() /"server" / "inverted_index" /"inverted_index.json")
-forward_index_path = (pathlib.Path().absolute() /"server" / "Forward_Index" /"forward_index.json")
+forward_index_path = (pathlib.Path().absolute() /"server" / "Forward_Index" /"segments")
 
 from InvertedIndexGenerator import InvertedIndexGenerator
 
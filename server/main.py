@@ -1,11 +1,14 @@
 from fastapi import FastAPI, UploadFile
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware  # Import CORSMiddleware
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import sys
-import csv
-import pathlib
+import uuid
 from pydantic import BaseModel
+from typing import List, Optional
 
 # Add the parent directory of 'server' to the Python path
 sys.path.append(str(Path(__file__).resolve().parent))
@@ -20,102 +23,190 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Rows read per chunk when streaming CSVs through the index builders
+CSV_CHUNK_SIZE = 5000
+
+# Result cache bounds of the search engine
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+QUERY_CACHE_TTL_SECONDS = 300
+
+# Uploads arriving within this many seconds of each other are indexed in one pipeline run
+INGEST_BATCH_WINDOW_SECONDS = 2.0
+
+# Write the New_forward_index.json / New_Inverted.json files of every ingestion batch, for debugging
+WRITE_INTERMEDIATE_INDEXES = False
+
+# Hold the whole index in memory as compact posting lists instead of reading barrels on demand
+IN_MEMORY_INDEX = False
+
+# Threads that run searches, so a slow query never blocks the event loop
+SEARCH_THREADS = 8
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_THREADS)
+
+# Results hydrated per batch when a query response is streamed
+STREAM_BATCH_SIZE = 20
+
+# Most queries accepted by one /api/batch-query/ request
+MAX_BATCH_QUERIES = 5000
+
+# Shared search engine, loaded once at startup and reloaded after every index rebuild
+search_engine = None
+# Runs uploaded CSVs through the indexing pipeline in a worker process
+ingestion_jobs = None
+
+
+@app.on_event("startup")
+def load_search_engine():
+    global search_engine, ingestion_jobs
+    from search.searchEngine import SearchEngine
+    from ingestion.jobManager import IngestionJobManager
+    search_engine = SearchEngine(
+        Path(__file__).resolve().parent,
+        cache_max_entries=QUERY_CACHE_MAX_ENTRIES,
+        cache_max_bytes=QUERY_CACHE_MAX_BYTES,
+        cache_ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+        in_memory_index=IN_MEMORY_INDEX,
+    )
+    # Swapping the rebuilt index in bumps the index generation, so cached results of the old index are dropped
+    ingestion_jobs = IngestionJobManager(Path(__file__).resolve().parent, chunksize=CSV_CHUNK_SIZE,
+                                         on_complete=search_engine.reload,
+                                         batch_window=INGEST_BATCH_WINDOW_SECONDS,
+                                         write_intermediate=WRITE_INTERMEDIATE_INDEXES)
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    ingestion_jobs.shutdown()
+    search_executor.shutdown(wait=False)
+
+
 # Define the request body schema
 class QueryRequest(BaseModel):
     text: str
+    top_k: Optional[int] = None
+    # Paging: skip the first `offset` results and return at most `limit` (defaults to top_k)
+    offset: int = 0
+    limit: Optional[int] = None
+    # Send the results as newline-delimited JSON while they are hydrated
+    stream: bool = False
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    top_k: Optional[int] = None
 
 
 @app.get("/favicon.ico")
 async def favicon():
     return JSONResponse(content={}, status_code=204)
 
+@app.get("/api/normalizer-stats/")
+async def normalizer_stats():
+    return JSONResponse(content=search_engine.normalizer.stats(), status_code=200)
+
+@app.get("/api/cache-stats/")
+async def cache_stats():
+    from inverted_index.BarrelCache import get_barrel_cache
+    stats = search_engine.query_cache.stats() if search_engine.query_cache else {}
+    stats["index_generation"] = search_engine.generation
+    stats["barrel_cache"] = get_barrel_cache().stats()
+    return JSONResponse(content=stats, status_code=200)
+
 @app.post("/api/process-csv/")
 async def process_csv(file: UploadFile):
-    temp_file = Path("temp_postings.csv")
     try:
-        # Save the uploaded file temporarily
-        with open(temp_file, "wb") as f:
-            f.write(file.file.read())
-
-        data_file = (pathlib.Path().absolute() / "data" /"postings.csv")  # Path to the existing data file
-
-         # Append the content of temp_file to postings.csv, excluding the header
-        with open(temp_file, "r", newline="", encoding="utf-8") as temp_csv:
-            temp_reader = csv.reader(temp_csv)
-            temp_data = list(temp_reader)[1:]  # Skip the header row
-
-        with open(data_file, "a", newline="", encoding="utf-8") as data_csv:
-            data_writer = csv.writer(data_csv)
-            data_writer.writerows(temp_data)
-
-        # Generate the lexicon
-        output_path = (pathlib.Path().absolute() / "Preprocessing" /"lexicon.csv")
-        from Preprocessing.LexiconGenerator import LexiconGenerator
-        lex_gen = LexiconGenerator(output_path)
-        lex_gen.generate(temp_file)
-
-        # Generate the forward index
-        forward_index_path = (pathlib.Path().absolute() / "Forward_Index" / "forward_index.json")
-        new_forward_index_path = (pathlib.Path().absolute() / "Forward_Index" / "New_forward_index.json")
-        from Forward_Index.ForwardIndexGenerator import ForwardIndexGenerator
-        generator = ForwardIndexGenerator(temp_file, output_path, forward_index_path, new_forward_index_path)
-        generator.generate_forward_index()
-
-        # Generate the inverted index
-        new_output_file_path = (pathlib.Path().absolute() / "inverted_index" / "New_Inverted.json")
-        from inverted_index.InvertedIndexGenerator import InvertedIndexGenerator
-        generator = InvertedIndexGenerator(new_forward_index_path, new_output_file_path)
-        generator.generate()
-
-        # Generate the barrels
-        output_dir = (pathlib.Path().absolute() / "inverted_index" / "barrels")
-        from inverted_index.BarrelManager import BarrelManager
-        manager = BarrelManager(output_dir)
-        manager.update_barrels_with_json(new_output_file_path)
+        # Keep the upload until its ingestion job has indexed it
+        uploads_dir = Path(__file__).resolve().parent / "data" / "uploads"
+        uploads_dir.mkdir(parents=True, exist_ok=True)
+        upload_path = uploads_dir / f"{uuid.uuid4().hex}.csv"
+        contents = await file.read()
+        await asyncio.get_running_loop().run_in_executor(search_executor, upload_path.write_bytes, contents)
+
+        # Uploads are queued and indexed in batches by the ingestion worker; the engine reloads after each batch
+        job_id = ingestion_jobs.submit(upload_path)
 
         return JSONResponse(
-            content={"message": "Successfully processed the document."},
-            status_code=200,
+            content={"message": "Upload accepted for indexing.", "job_id": job_id},
+            status_code=202,
         )
     except Exception as e:
-        print('a'+ e)
+        print(e)
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.get("/api/ingest-status/{job_id}")
+async def ingest_status(job_id: str):
+    job = ingestion_jobs.status(job_id)
+    if job is None:
+        return JSONResponse(content={"message": "Unknown job."}, status_code=404)
+    return JSONResponse(content=job, status_code=200)
+
+@app.get("/api/ingest-queue/")
+async def ingest_queue():
+    return JSONResponse(content=ingestion_jobs.stats(), status_code=200)
+
 @app.post("/api/get-query-result/")
 async def get_query_result(request: QueryRequest):
     try:
         query = request.text.strip()
+        limit = request.limit if request.limit is not None else request.top_k
+        if request.offset < 0 or (limit is not None and limit < 1):
+            return JSONResponse(content={"error": "offset must be >= 0 and limit >= 1."}, status_code=400)
 
-        # Perform search based on the query
-        from search.singleSearch import SingleWordSearch
-        from search.multiSearch import MultiWordSearch
-        from Ranking.ranking import DocumentRankingUtility
+        # Search and rank against the in-memory index; only the requested page is selected and hydrated
+        ranked_results = await asyncio.get_running_loop().run_in_executor(
+            search_executor, search_engine.search, query, limit, request.offset, not request.stream
+        )
 
+        if ranked_results is None:
+            return JSONResponse(content={"message": "No results found."}, status_code=404)
 
-        query_type = "single" if len(query.split()) == 1 else "multi"
+        page = {
+            "query": query,
+            "offset": request.offset,
+            "limit": limit,
+            # A full page may be followed by more results
+            "next_offset": request.offset + len(ranked_results) if limit and len(ranked_results) == limit else None,
+        }
 
-        if query_type == "single":
-            search_instance = SingleWordSearch(query)
-            result = search_instance.search()
-        else:
-            search_instance = MultiWordSearch(query)
-            result = search_instance.search()
+        if request.stream:
+            return StreamingResponse(stream_results(page, ranked_results), media_type="application/x-ndjson")
 
-        # Validate search result
-        if not result or "filtered_results.json" not in result:
-            return JSONResponse(content={"message": "No results found."}, status_code=404)
+        # Return ranked results
+        return JSONResponse(content={**page, "ranked_results": ranked_results}, status_code=200)
+
+    except Exception as e:
+        print(e)
+        return JSONResponse(content={"error": str(e)}, status_code=500)
 
-        # Perform ranking
-        absolute_path = Path(__file__).resolve()
-        filtered_result_path = absolute_path.parents[0] / 'Ranking' / 'filtered_results.json'
-        metadata_file_path = absolute_path.parents[0] / 'data' / 'postings.csv'
+@app.post("/api/batch-query/")
+async def batch_query(request: BatchQueryRequest):
+    try:
+        if len(request.queries) > MAX_BATCH_QUERIES:
+            return JSONResponse(content={"error": f"At most {MAX_BATCH_QUERIES} queries per batch."}, status_code=400)
+        queries = [query.strip() for query in request.queries]
 
-        ranking_utility = DocumentRankingUtility(filtered_result_path, metadata_file_path)
-        ranked_results = ranking_utility.rank()
+        # The queries share their barrel reads; each one is still ranked on its own
+        batch_results = await asyncio.get_running_loop().run_in_executor(
+            search_executor, search_engine.search_batch, queries, request.top_k
+        )
 
-        # Return ranked results
-        return JSONResponse(content={"query": query, "ranked_results": ranked_results}, status_code=200)
+        results = [
+            {"query": query, "ranked_results": ranked_results or []}
+            for query, ranked_results in zip(queries, batch_results)
+        ]
+        return JSONResponse(content={"results": results}, status_code=200)
 
     except Exception as e:
         print(e)
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+def stream_results(page, ranked_docs):
+    """
+    Yield the page header and then one JSON line per result, hydrating the results in
+    batches so the client receives the first ones before the rest are read.
+    """
+    yield json.dumps(page) + "\n"
+    for batch in search_engine.hydrate_in_batches(ranked_docs, STREAM_BATCH_SIZE):
+        yield "".join(json.dumps(result) + "\n" for result in batch)
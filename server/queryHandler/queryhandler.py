@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 
 # Add the parent directory of `search` and `Ranking` to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 sys.path.append(str(Path(__file__).resolve().parent.parent / "search"))
 sys.path.append(str(Path(__file__).resolve().parent.parent / "Ranking"))
 
@@ -53,17 +54,17 @@ def main():
             result = search_instance.search()
 
         # Print the search result
-        print("Search result:", result)
+        print("Search result:", search_instance.message)
 
         # Perform ranking if search was successful
-        if result and "filtered_results.json" in result:
+        if result:
             print("Performing ranking...")
             absolute_path = Path(__file__).resolve()
             filtered_result_path = absolute_path.parents[1] / 'Ranking' / 'filtered_results.json'
             metadata_file_path = absolute_path.parents[1] / 'data' / 'postings.csv'
 
             ranking_utility = DocumentRankingUtility(filtered_result_path, metadata_file_path)
-            ranked_results = ranking_utility.rank()
+            ranked_results = ranking_utility.rank(result)
 
             print("Ranked results:")
             for ranked_result in ranked_results:
@@ -0,0 +1,420 @@
+import re
+
+from search.multiSearch import MultiWordSearch
+from search.intersection import PostingList, intersect
+from search.phraseSearch import NEAR_PATTERN, PhraseSearch, count_phrase_matches
+
+# Quoted phrases, parentheses, upper-case operators and plain words
+QUERY_TOKEN_PATTERN = re.compile(r'"[^"]*"|\(|\)|[^\s()]+')
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+def is_boolean_query(query):
+    """
+    Check whether a query uses AND / OR / NOT operators or parentheses.
+    """
+    return any(token in OPERATORS or token in "()" for token in QUERY_TOKEN_PATTERN.findall(query))
+
+
+class TermNode:
+    """
+    A single query word; its cost is the number of documents containing it.
+    """
+
+    def __init__(self, word):
+        self.word = word
+        self.cost = 0
+
+    def __repr__(self):
+        return self.word
+
+
+class PhraseNode:
+    """
+    A quoted phrase: its words must occur at consecutive positions. Its cost is that of its rarest word.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.lemmas = []  # [(lemma, offset in the phrase), ...]
+        self.cost = 0
+
+    def __repr__(self):
+        return '"' + " ".join(lemma for lemma, _ in self.lemmas) + '"'
+
+
+class AndNode:
+    """
+    Documents matching every positive child and none of the negated ones.
+    """
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = 0
+
+    def __repr__(self):
+        return "AND(" + ", ".join(map(repr, self.children)) + ")"
+
+
+class OrNode:
+    """
+    Documents matching at least one child.
+    """
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = 0
+
+    def __repr__(self):
+        return "OR(" + ", ".join(map(repr, self.children)) + ")"
+
+
+class NotNode:
+    """
+    Documents to remove from the enclosing AND; only valid as an AND operand.
+    """
+
+    def __init__(self, child):
+        self.child = child
+        self.cost = 0
+
+    def __repr__(self):
+        return f"NOT({self.child!r})"
+
+
+class QueryParser:
+    """
+    Recursive descent parser for boolean queries. Operators must be written in upper case;
+    adjacent operands without an operator are combined with AND, and NOT binds tightest:
+
+        query   := or_expr
+        or_expr := and_expr ("OR" and_expr)*
+        and_expr:= unary (["AND"] unary)*
+        unary   := "NOT" unary | "(" or_expr ")" | '"' phrase '"' | word
+
+    NEAR/k needs the positions of the words next to it and is rejected here.
+    """
+
+    def __init__(self, query):
+        self.tokens = QUERY_TOKEN_PATTERN.findall(query)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        """
+        Parse the whole query.
+
+        Returns:
+            The root plan node.
+
+        Raises:
+            ValueError: If the query is malformed.
+        """
+        if not self.tokens:
+            raise ValueError("Empty query.")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected '{self.peek()}' in query.")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else OrNode(children)
+
+    def parse_and(self):
+        children = [self.parse_unary()]
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            children.append(self.parse_unary())
+        return children[0] if len(children) == 1 else AndNode(children)
+
+    def parse_unary(self):
+        token = self.take()
+        if token is None:
+            raise ValueError("Query ends where an operand was expected.")
+        if token == "NOT":
+            return NotNode(self.parse_unary())
+        if token == "(":
+            node = self.parse_or()
+            if self.take() != ")":
+                raise ValueError("Missing closing parenthesis.")
+            return node
+        if token in OPERATORS or token == ")":
+            raise ValueError(f"Unexpected '{token}' in query.")
+        if NEAR_PATTERN.fullmatch(token):
+            raise ValueError("NEAR/k cannot be combined with AND, OR, NOT or parentheses.")
+        if token.startswith('"') and token.endswith('"') and len(token) > 1:
+            return PhraseNode(token[1:-1])
+        return TermNode(token)
+
+
+class BooleanSearch(MultiWordSearch):
+    """
+    Evaluate AND / OR / NOT queries such as `(python OR java) NOT intern` or
+    `"data engineer" AND remote` as a plan tree over the barrel postings.
+
+    The planner normalizes every word, costs each node by document frequency (read from the
+    collection statistics, so no posting list is decoded just to cost it) and orders AND and
+    OR operands cheapest first. The words and phrases of an AND are intersected from their
+    posting lists, rarest first; nested groups and negated operands are then evaluated only
+    against the documents matched so far, and evaluation stops as soon as none are left.
+
+    An OR is evaluated in full: there is no score cutoff inside the plan. Top-k queries that
+    are a plain OR of words are ranked with WAND instead (see disjunction_words).
+    """
+
+    def __init__(self, query, **kwargs):
+        super().__init__(query, **kwargs)
+        self.plan = None
+        # Postings and term ID per normalized word, fetched once even if the word repeats
+        self.word_postings = {}
+        self.term_ids = {}
+        # Score boost per docID for the phrases it matches; ranking multiplies the score by (1 + boost)
+        self.proximity_boosts = {}
+
+    # Function to parse the query and build the cost-ordered plan
+    def build_plan(self):
+        root = self.prepare(QueryParser(self.query).parse())
+        if root is None:
+            raise ValueError(f"Could not lemmatize or process the words of '{self.query}'.")
+        if isinstance(root, NotNode) or (isinstance(root, AndNode) and all(isinstance(c, NotNode) for c in root.children)):
+            raise ValueError("A query needs at least one word that is not negated.")
+        return root
+
+    def prepare(self, node):
+        """
+        Normalize the words of a parsed tree, resolve their term IDs and reorder operands by cost.
+
+        Parameters:
+            node: Parsed plan node.
+
+        Returns:
+            The prepared node, or None if nothing in it survives normalization.
+        """
+        if isinstance(node, TermNode):
+            lemmas = self.normalizer.normalize(node.word)
+            terms = [self.prepare_term(lemma) for lemma in dict.fromkeys(lemmas)]
+            if not terms:
+                return None
+            if len(terms) == 1:
+                return terms[0]
+            # A word the normalizer splits (e.g. "full-stack") needs all of its parts
+            node = AndNode(sorted(terms, key=lambda term: term.cost))
+            node.cost = node.children[0].cost
+            return node
+
+        if isinstance(node, PhraseNode):
+            normalized = self.normalizer.normalize_with_positions(node.text)
+            if len(normalized) < 2:
+                return self.prepare_term(normalized[0][0]) if normalized else None
+            start = normalized[0][1]
+            node.lemmas = [(lemma, pos - start) for lemma, pos in normalized]
+            node.cost = min(self.prepare_term(lemma).cost for lemma, _ in node.lemmas)
+            return node
+
+        if isinstance(node, NotNode):
+            child = self.prepare(node.child)
+            if child is None:
+                return None
+            node.child = child
+            node.cost = child.cost
+            return node
+
+        children = [child for child in (self.prepare(c) for c in node.children) if child is not None]
+        if not children:
+            return None
+        if len(children) == 1:
+            return children[0]
+
+        if isinstance(node, AndNode):
+            # Negations go last: they only ever remove documents from what the others matched
+            children.sort(key=lambda child: (isinstance(child, NotNode), child.cost))
+            positive = [child.cost for child in children if not isinstance(child, NotNode)]
+            node.cost = min(positive) if positive else 0
+        else:
+            children.sort(key=lambda child: child.cost)
+            node.cost = sum(child.cost for child in children)
+        node.children = children
+        return node
+
+    def prepare_term(self, lemma):
+        node = TermNode(lemma)
+        if lemma not in self.term_ids:
+            resolved = self.resolve_word(lemma)
+            term_id = self.term_ids[lemma] = self.lexicon[resolved] if resolved else None
+            if not term_id:
+                self.document_frequencies[lemma] = 0
+            elif self.statistics is not None and self.statistics.has_document_frequencies:
+                self.document_frequencies[lemma] = self.statistics.document_frequency(term_id)
+            else:
+                # Without statistics the postings are counted, and kept for evaluation
+                self.document_frequencies[lemma] = len(self.postings(lemma))
+        node.cost = self.document_frequencies[lemma]
+        return node
+
+    # Function to fetch the postings of a normalized word, once
+    def postings(self, lemma):
+        if lemma not in self.word_postings:
+            term_id = self.term_ids.get(lemma)
+            self.word_postings[lemma] = (self.barrel_manager.query_term(term_id) if term_id else None) or []
+        return self.word_postings[lemma]
+
+    # Function to return the words of a plan that is a plain OR of words, or None for any other plan
+    def disjunction_words(self):
+        if self.plan is None:
+            try:
+                self.plan = self.build_plan()
+            except ValueError as error:
+                self.message = f"Invalid query: '{self.query}'. {error}"
+                return None
+        if isinstance(self.plan, OrNode) and all(isinstance(child, TermNode) for child in self.plan.children):
+            return [child.word for child in self.plan.children]
+        return None
+
+    # Function to evaluate a plan node into {docID: {word: {"frequency", "positions"}}}, restricted to candidates if given
+    def evaluate(self, node, candidates=None):
+        if isinstance(node, TermNode):
+            if candidates is None:
+                return {
+                    int(posting["docID"]): {
+                        node.word: {"frequency": posting["frequency"], "positions": posting["positions"]}
+                    }
+                    for posting in self.postings(node.word)
+                }
+            return self.evaluate_and([node], candidates)
+
+        if isinstance(node, NotNode):
+            raise ValueError("NOT can only be used together with another word.")
+
+        if isinstance(node, (AndNode, PhraseNode)):
+            return self.evaluate_and(node.children if isinstance(node, AndNode) else [node], candidates)
+
+        results = {}
+        for child in node.children:
+            for doc_id, terms in self.evaluate(child, candidates).items():
+                if doc_id in results:
+                    results[doc_id].update(terms)
+                else:
+                    results[doc_id] = dict(terms)
+        return results
+
+    def evaluate_and(self, children, candidates=None):
+        """
+        Evaluate the operands of an AND.
+
+        The words and phrase words are intersected from their posting lists, driven by the
+        rarest one; phrases are then checked against the positions of the documents left.
+        Nested groups and negated operands are evaluated with the documents matched so far
+        as their candidates, so their postings are only probed at those docIDs (skipping
+        whole blocks of block-encoded lists) instead of being evaluated in full.
+
+        Parameters:
+            children (list): Prepared operands, cheapest first and negations last.
+            candidates (list): Sorted docIDs the result is restricted to (default: no restriction).
+
+        Returns:
+            dict: {docID: {word: {"frequency", "positions"}}} of the matching documents.
+        """
+        positive = [child for child in children if not isinstance(child, NotNode)]
+        if not positive:
+            raise ValueError("A group needs at least one word that is not negated.")
+        phrases = [child for child in positive if isinstance(child, PhraseNode)]
+        words = [child.word for child in positive if isinstance(child, TermNode)]
+        words += [lemma for phrase in phrases for lemma, _ in phrase.lemmas]
+        words = list(dict.fromkeys(words))
+
+        results = None
+        if words:
+            posting_lists = [PostingList(self.postings(word)) for word in words]
+            if candidates is not None:
+                posting_lists.append(PostingList.of_doc_ids(candidates))
+            results = {}
+            for doc_id, indexes in intersect(posting_lists):
+                terms = {
+                    word: {
+                        "frequency": posting_list.postings[index]["frequency"],
+                        "positions": posting_list.postings[index]["positions"]
+                    }
+                    for word, posting_list, index in zip(words, posting_lists, indexes)
+                }
+                boost = self.score_phrases(phrases, terms)
+                if boost is not None:
+                    results[doc_id] = terms
+                    if boost:
+                        self.proximity_boosts[doc_id] = self.proximity_boosts.get(doc_id, 0.0) + boost
+
+        for child in positive:
+            if isinstance(child, (TermNode, PhraseNode)):
+                continue
+            if results is not None and not results:
+                return {}
+            child_results = self.evaluate(child, candidates if results is None else sorted(results))
+            if results is None:
+                results = child_results
+            else:
+                results = {
+                    doc_id: {**terms, **child_results[doc_id]}
+                    for doc_id, terms in results.items() if doc_id in child_results
+                }
+
+        for child in children:
+            if not results:
+                return {}
+            if isinstance(child, NotNode):
+                for doc_id in self.evaluate(child.child, sorted(results)):
+                    results.pop(doc_id, None)
+        return results
+
+    @staticmethod
+    def score_phrases(phrases, terms):
+        """
+        Check phrases against one document.
+
+        Returns:
+            float: The document's phrase boost, or None if a phrase does not occur in it.
+        """
+        boost = 0.0
+        for phrase in phrases:
+            position_lists = [terms[lemma]["positions"] for lemma, _ in phrase.lemmas]
+            matches = count_phrase_matches(position_lists, [offset for _, offset in phrase.lemmas])
+            if not matches:
+                return None
+            boost += PhraseSearch.phrase_boost * matches
+        return boost
+
+    # Function to perform boolean search
+    def search(self):
+        if self.plan is None:
+            try:
+                self.plan = self.build_plan()
+            except ValueError as error:
+                self.message = f"Invalid query: '{self.query}'. {error}"
+                return {}
+
+        try:
+            results = self.evaluate(self.plan)
+        except ValueError as error:
+            self.message = f"Invalid query: '{self.query}'. {error}"
+            return {}
+
+        final_results = {str(doc_id): terms for doc_id, terms in sorted(results.items())}
+
+        if self.debug_dump:
+            self.dump_results(final_results)
+
+        if final_results:
+            self.message = f"Found {len(final_results)} results for boolean query '{self.query}'."
+        else:
+            self.message = f"No documents found matching the boolean query: {self.query}."
+        return final_results
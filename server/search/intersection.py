@@ -0,0 +1,139 @@
+from bisect import bisect_left
+
+from inverted_index.BinaryBarrel import BLOCK_SIZE, BlockPostingList
+from inverted_index.CompactPostings import CompactPostingList
+
+
+class PostingList:
+    """
+    The postings of one term, sorted by docID, with galloping search for skipping ahead.
+    """
+
+    def __init__(self, postings):
+        """
+        Parameters:
+            postings (list): Postings of the term ({"docID", "frequency", "positions"}).
+        """
+        # Last docID of each block of a lazily decoded list, for skipping whole blocks
+        self.skip_doc_ids = None
+        if isinstance(postings, (CompactPostingList, BlockPostingList)):
+            # Already in docID order; postings are only decoded for the entries that are visited
+            self.postings = postings
+            self.doc_ids = postings.doc_ids
+            self.frequencies = postings.frequencies
+            if isinstance(postings, BlockPostingList):
+                self.skip_doc_ids = postings.block_last_doc_ids
+            return
+        # Decoded BRL1 postings are already in docID order, so this sort is linear for them
+        self.postings = sorted(postings, key=lambda posting: int(posting["docID"]))
+        self.doc_ids = [int(posting["docID"]) for posting in self.postings]
+        self.frequencies = [posting["frequency"] for posting in self.postings]
+
+    @classmethod
+    def of_doc_ids(cls, doc_ids):
+        """
+        A list of bare docIDs, such as the documents an AND has matched so far, that can be
+        intersected with term postings to filter them. It has no postings to read.
+
+        Parameters:
+            doc_ids (list): Sorted docIDs.
+        """
+        posting_list = cls([])
+        posting_list.doc_ids = list(doc_ids)
+        return posting_list
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def frequency(self, index):
+        """
+        Return the frequency of the entry at index without decoding its positions.
+        """
+        return self.frequencies[index]
+
+    def advance_to(self, start, target):
+        """
+        Find the first entry at or after start whose docID is >= target.
+
+        The search gallops forward in doubling steps and then binary searches the bracketed
+        range, so skipping k entries costs O(log k) instead of O(k).
+
+        Parameters:
+            start (int): Index to search from.
+            target (int): docID to reach.
+
+        Returns:
+            int: Index of the entry, or len(self) if every remaining docID is smaller.
+        """
+        if self.skip_doc_ids is not None:
+            return self.advance_blocks(start, target)
+        size = len(self.doc_ids)
+        if start >= size or self.doc_ids[start] >= target:
+            return start
+
+        low, step = start, 1
+        high = start + step
+        while high < size and self.doc_ids[high] < target:
+            low = high
+            step *= 2
+            high = start + step
+        return bisect_left(self.doc_ids, target, low, min(high, size))
+
+    def advance_blocks(self, start, target):
+        """
+        advance_to for a lazily decoded list: gallop over the skip entries to the first block
+        whose last docID is >= target, then binary search inside that block only, so the
+        blocks jumped over are never decoded.
+        """
+        skips = self.skip_doc_ids
+        block = start // BLOCK_SIZE
+        if block >= len(skips):
+            return len(self.doc_ids)
+        if skips[block] < target:
+            low, step = block, 1
+            high = block + step
+            while high < len(skips) and skips[high] < target:
+                low = high
+                step *= 2
+                high = block + step
+            block = bisect_left(skips, target, low, min(high, len(skips)))
+            if block == len(skips):
+                return len(self.doc_ids)
+            start = block * BLOCK_SIZE
+        block_doc_ids = self.postings.block(block)[0]
+        return block * BLOCK_SIZE + bisect_left(block_doc_ids, target, start - block * BLOCK_SIZE)
+
+
+def intersect(posting_lists):
+    """
+    Intersect posting lists, driving from the rarest term and galloping through the others.
+
+    The cost is about the length of the shortest list times the log of the skipped distance
+    in the longer ones, rather than the sum of all list lengths.
+
+    Parameters:
+        posting_lists (list): PostingList objects.
+
+    Returns:
+        list: (docID, [index of the docID in each input list]) tuples, in docID order.
+    """
+    if not posting_lists:
+        return []
+
+    order = sorted(range(len(posting_lists)), key=lambda i: len(posting_lists[i]))
+    rarest = posting_lists[order[0]]
+    cursors = [0] * len(posting_lists)
+
+    matches = []
+    for rare_index, doc_id in enumerate(rarest.doc_ids):
+        cursors[order[0]] = rare_index
+        for i in order[1:]:
+            posting_list = posting_lists[i]
+            cursors[i] = posting_list.advance_to(cursors[i], doc_id)
+            if cursors[i] >= len(posting_list):
+                return matches
+            if posting_list.doc_ids[cursors[i]] != doc_id:
+                break
+        else:
+            matches.append((doc_id, list(cursors)))
+    return matches
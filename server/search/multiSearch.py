@@ -1,28 +1,44 @@
 import json
 import os
 import csv
+import logging
 import nltk
-from nltk.corpus import stopwords, words
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
 from nltk.metrics import edit_distance
 from pathlib import Path
 
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.CollectionStatistics import document_frequency
+from search.intersection import PostingList, intersect
+from Preprocessing.TextNormalizer import get_normalizer
+
 # Ensure necessary NLTK data is downloaded
 nltk.download("punkt", quiet=True)
 nltk.download("stopwords", quiet=True)
 nltk.download("wordnet", quiet=True)
 nltk.download("words", quiet=True)
 
+# Per-query diagnostics go to the log rather than stdout, which the server shares across requests
+logger = logging.getLogger(__name__)
+
 class MultiWordSearch:
-    def __init__(self, query):
+    def __init__(self, query, lexicon=None, normalizer=None, barrel_manager=None, spelling_index=None, debug_dump=False,
+                 statistics=None):
         self.query = query
+        self.debug_dump = debug_dump
+        self.message = ""
+        # Number of documents containing each query word, used by BM25 ranking
+        self.document_frequencies = {}
         self.absolute_path = Path(__file__).resolve()
         self.output_dir = os.path.join(self.absolute_path.parents[1], "inverted_index", "barrels")
         self.lexicon_path = os.path.join(self.absolute_path.parents[1], "Preprocessing", "lexicon.csv")
-        self.stop_words = set(stopwords.words("english"))
-        self.lemmatizer = WordNetLemmatizer()
-        self.lexicon = self.load_lexicon()
+        # Shared state can be handed in by a long-lived SearchEngine to skip reloading it per query
+        self.normalizer = normalizer or get_normalizer()
+        self.lexicon = lexicon if lexicon is not None else self.load_lexicon()
+        self.barrel_manager = barrel_manager or BarrelManager(self.output_dir)
+        # Prebuilt fuzzy lookup; without it typos fall back to scanning the whole lexicon
+        self.spelling_index = spelling_index
+        # Collection statistics; document frequencies are read from them instead of counting postings
+        self.statistics = statistics
 
     # Load the lexicon file into a dictionary
     def load_lexicon(self):
@@ -36,12 +52,8 @@ class MultiWordSearch:
 
     # Function to process the query (lemmatization and stopword removal)
     def process_query(self):
-        query_tokens = word_tokenize(self.query.lower())  # Tokenize and lowercase the query
-        query_tokens = [
-            self.lemmatizer.lemmatize(token) for token in query_tokens
-            if len(token) > 2 and token not in self.stop_words
-        ]
-        return query_tokens
+        # The shared normalizer produces the same lemmas as the indexing pipeline
+        return self.normalizer.normalize(self.query)
 
     # Function to determine which barrel a term belongs to (based on term ID)
     def get_barrel(self, term_id):
@@ -63,6 +75,9 @@ class MultiWordSearch:
 
     # Function to find the closest matching word from the lexicon using Levenshtein distance
     def find_closest_word(self, query_word):
+        if self.spelling_index:
+            return self.spelling_index.closest(query_word)
+
         closest_word = None
         min_distance = float('inf')
         for word in self.lexicon:
@@ -72,70 +87,68 @@ class MultiWordSearch:
                 min_distance = dist
         return closest_word
 
+    # Function to map a query word to the lexicon word used for it, falling back to the closest match
+    def resolve_word(self, word):
+        if self.lexicon.get(word):
+            return word
+        closest_word = self.find_closest_word(word)
+        if closest_word:
+            logger.debug("No exact match found for '%s'. Using closest match: '%s'", word, closest_word)
+        return closest_word
+
     # Function to perform multi-word search
     def search(self):
         lemmatized_words = self.process_query()
 
         if not lemmatized_words:
-            return f"Invalid query: '{self.query}'. Could not lemmatize or process the words."
+            self.message = f"Invalid query: '{self.query}'. Could not lemmatize or process the words."
+            return {}
 
         # Dictionary to hold postings for each query word
         word_postings = {}
 
         # Collect postings for each lemmatized word
         for word in lemmatized_words:
-            term_id = self.lexicon.get(word)
-            if not term_id:
-                # Try finding the closest match if no exact match is found
-                closest_word = self.find_closest_word(word)
-                if closest_word:
-                    print(f"Warning: No exact match found for '{word}'. Using closest match: '{closest_word}'")
-                    term_id = self.lexicon.get(closest_word)
-                else:
-                    return f"Word '{word}' or any close match not found in the lexicon."
-
-            barrel_key = self.get_barrel(term_id)
-            bucket_key = self.get_bucket(term_id)
-
-            barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
-            if not os.path.exists(barrel_path):
-                return f"No barrel found for word '{word}' (term ID: {term_id})."
-
-            with open(barrel_path, "r") as file:
-                barrel_data = json.load(file)
-
-            # Get postings from the relevant bucket
-            postings = barrel_data.get(bucket_key, {}).get(term_id, [])
+            # Fall back to the closest match if there is no exact match
+            resolved = self.resolve_word(word)
+            if not resolved:
+                self.message = f"Word '{word}' or any close match not found in the lexicon."
+                return {}
+            term_id = self.lexicon.get(resolved)
+
+            # Get postings from the relevant barrel and bucket
+            postings = self.barrel_manager.query_term(term_id)
+            if postings is None:
+                postings = []
             word_postings[word] = postings
+            self.document_frequencies[word] = document_frequency(self.statistics, term_id, postings)
 
-        # Find documents that contain all query words
-        doc_results = {}
-
-        # Loop through each word's postings and collect the relevant documents
-        for word, postings in word_postings.items():
-            for posting in postings:
-                doc_id = posting["docID"]
-                if doc_id not in doc_results:
-                    doc_results[doc_id] = {}
-
-                doc_results[doc_id][word] = {
-                    "frequency": posting["frequency"],
-                    "positions": posting["positions"]
-                }
+        # Find documents that contain *all* query words, starting from the rarest word
+        words = list(word_postings)
+        posting_lists = [PostingList(word_postings[word]) for word in words]
 
-        # Filter documents that contain *all* query words
         final_results = {}
-        for doc_id, terms in doc_results.items():
-            if all(word in terms for word in lemmatized_words):
-                final_results[doc_id] = terms
-
-        # Store the results in a JSON file
-        results_path = os.path.join(self.absolute_path.parents[1], "Ranking", "filtered_results.json")
+        for doc_id, indexes in intersect(posting_lists):
+            final_results[str(doc_id)] = {
+                word: {
+                    "frequency": posting_list.postings[index]["frequency"],
+                    "positions": posting_list.postings[index]["positions"]
+                }
+                for word, posting_list, index in zip(words, posting_lists, indexes)
+            }
 
-        with open(results_path, "w") as result_file:
-            json.dump(final_results, result_file, indent=4)
+        if self.debug_dump:
+            self.dump_results(final_results)
 
         if final_results:
-            return f"Results for multi-word query '{self.query}' have been stored in '{results_path}'."
+            self.message = f"Found {len(final_results)} results for multi-word query '{self.query}'."
         else:
-            return f"No documents found containing all words from the query: {self.query}."
+            self.message = f"No documents found containing all words from the query: {self.query}."
+        return final_results
+
+    # Function to write the filtered results to filtered_results.json for debugging
+    def dump_results(self, results):
+        results_path = os.path.join(self.absolute_path.parents[1], "Ranking", "filtered_results.json")
+        with open(results_path, "w") as result_file:
+            json.dump(results, result_file, indent=4)
+        logger.debug("Results for multi-word query '%s' have been stored in '%s'.", self.query, results_path)
@@ -0,0 +1,185 @@
+import math
+import re
+
+from inverted_index.CollectionStatistics import document_frequency
+from search.multiSearch import MultiWordSearch
+from search.intersection import PostingList, intersect
+
+# Quoted phrases, NEAR/k operators and plain words
+QUERY_TOKEN_PATTERN = re.compile(r'"[^"]*"|NEAR/\d+|\S+')
+NEAR_PATTERN = re.compile(r'NEAR/(\d+)')
+
+
+def is_phrase_query(query):
+    """
+    Check whether a query uses quoted phrases or NEAR/k operators.
+    """
+    return '"' in query or NEAR_PATTERN.search(query) is not None
+
+
+def count_phrase_matches(position_lists, offsets):
+    """
+    Count the start positions s where every word i of a phrase occurs at s + offsets[i].
+
+    The shifted position lists are merged in a single linear pass.
+
+    Parameters:
+        position_lists (list): Sorted positions of each phrase word in one document.
+        offsets (list): Position of each word inside the phrase.
+
+    Returns:
+        int: Number of phrase occurrences.
+    """
+    if not position_lists:
+        return 0
+    shifted = [[pos - offset for pos in positions] for positions, offset in zip(position_lists, offsets)]
+    cursors = [0] * len(shifted)
+    matches = 0
+    while all(cursor < len(starts) for cursor, starts in zip(cursors, shifted)):
+        current = [starts[cursor] for cursor, starts in zip(cursors, shifted)]
+        highest = max(current)
+        if current[0] == highest and all(value == highest for value in current):
+            matches += 1
+            cursors = [cursor + 1 for cursor in cursors]
+        else:
+            cursors = [cursor + 1 if value < highest else cursor for cursor, value in zip(cursors, current)]
+    return matches
+
+
+def minimum_distance(first_positions, second_positions):
+    """
+    Smallest distance between a position in one sorted list and a position in another, in linear time.
+    """
+    i = j = 0
+    best = math.inf
+    while i < len(first_positions) and j < len(second_positions):
+        best = min(best, abs(first_positions[i] - second_positions[j]))
+        if first_positions[i] < second_positions[j]:
+            i += 1
+        else:
+            j += 1
+    return best
+
+
+class PhraseSearch(MultiWordSearch):
+    """
+    Search for quoted phrases ("data engineer") and NEAR/k proximity pairs, optionally
+    combined with plain words. Every word must occur in a matching document; positions
+    are only compared for the documents left after docID intersection.
+    """
+
+    # Score boost per phrase occurrence and for the closest NEAR/k pair
+    phrase_boost = 0.5
+    near_boost = 0.5
+
+    def __init__(self, query, **kwargs):
+        super().__init__(query, **kwargs)
+        self.phrases = []        # [[(lemma, offset), ...], ...]
+        self.near_clauses = []   # [(lemma, lemma, k), ...]
+        # Score boost per docID; ranking multiplies the score by (1 + boost)
+        self.proximity_boosts = {}
+
+    # Function to parse the query into plain words, phrases and NEAR/k clauses
+    def process_query(self):
+        self.phrases = []
+        self.near_clauses = []
+        lemmas = []
+        units = []
+        pending_near = None
+
+        for token in QUERY_TOKEN_PATTERN.findall(self.query):
+            near = NEAR_PATTERN.fullmatch(token)
+            if near:
+                pending_near = int(near.group(1))
+                continue
+
+            if token.startswith('"'):
+                normalized = self.normalizer.normalize_with_positions(token.strip('"'))
+                if len(normalized) > 1:
+                    start = normalized[0][1]
+                    self.phrases.append([(lemma, pos - start) for lemma, pos in normalized])
+                unit = [lemma for lemma, _ in normalized]
+            else:
+                unit = self.normalizer.normalize(token)
+
+            if not unit:
+                continue
+            if pending_near is not None and units:
+                self.near_clauses.append((units[-1][-1], unit[0], pending_near))
+            pending_near = None
+            units.append(unit)
+            lemmas.extend(unit)
+
+        return list(dict.fromkeys(lemmas))
+
+    # Function to perform phrase and proximity search
+    def search(self):
+        lemmatized_words = self.process_query()
+
+        if not lemmatized_words:
+            self.message = f"Invalid query: '{self.query}'. Could not lemmatize or process the words."
+            return {}
+
+        word_postings = {}
+        for word in lemmatized_words:
+            resolved = self.resolve_word(word)
+            if not resolved:
+                self.message = f"Word '{word}' or any close match not found in the lexicon."
+                return {}
+            term_id = self.lexicon[resolved]
+            postings = self.barrel_manager.query_term(term_id) or []
+            word_postings[word] = postings
+            self.document_frequencies[word] = document_frequency(self.statistics, term_id, postings)
+
+        words = list(word_postings)
+        posting_lists = [PostingList(word_postings[word]) for word in words]
+
+        final_results = {}
+        for doc_id, indexes in intersect(posting_lists):
+            terms = {
+                word: {
+                    "frequency": posting_list.postings[index]["frequency"],
+                    "positions": posting_list.postings[index]["positions"]
+                }
+                for word, posting_list, index in zip(words, posting_lists, indexes)
+            }
+
+            boost = self.score_proximity(terms)
+            if boost is None:
+                continue
+            final_results[str(doc_id)] = terms
+            self.proximity_boosts[doc_id] = boost
+
+        if self.debug_dump:
+            self.dump_results(final_results)
+
+        if final_results:
+            self.message = f"Found {len(final_results)} results for phrase query '{self.query}'."
+        else:
+            self.message = f"No documents found matching the phrases in the query: {self.query}."
+        return final_results
+
+    def score_proximity(self, terms):
+        """
+        Check the phrase and NEAR/k clauses against one document.
+
+        Parameters:
+            terms (dict): word -> {"frequency", "positions"} for the document.
+
+        Returns:
+            float: The document's proximity boost, or None if a clause does not match.
+        """
+        boost = 0.0
+        for phrase in self.phrases:
+            position_lists = [terms[lemma]["positions"] for lemma, _ in phrase]
+            matches = count_phrase_matches(position_lists, [offset for _, offset in phrase])
+            if not matches:
+                return None
+            boost += self.phrase_boost * matches
+
+        for first, second, max_distance in self.near_clauses:
+            distance = minimum_distance(terms[first]["positions"], terms[second]["positions"])
+            if distance > max_distance:
+                return None
+            boost += self.near_boost * (max_distance + 1 - distance) / (max_distance + 1)
+        return boost
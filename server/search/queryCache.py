@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Approximate bytes held by a cache entry, and by each result in it. Hydrated results carry
+# the short display fields (title, url, company, location); the others are (doc_id, score) tuples.
+ENTRY_BYTES = 256
+HYDRATED_RESULT_BYTES = 512
+RESULT_BYTES = 64
+
+
+class QueryCache:
+    """
+    LRU cache of ranked query results with a time-to-live and memory bounds.
+
+    Keys carry the index generation they were computed against, so results from an
+    older index are never served after a rebuild; invalidate() drops them eagerly.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_seconds=300):
+        """
+        Parameters:
+            max_entries (int): Maximum number of cached queries.
+            max_bytes (int): Approximate upper bound on the memory held by cached results.
+            ttl_seconds (float): Seconds a result stays valid (None to keep it until evicted).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> (results, size, expires_at)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def estimate_size(results):
+        """
+        Approximate the memory held by a result list from its length, without serializing it.
+        """
+        if not results:
+            return ENTRY_BYTES
+        per_result = HYDRATED_RESULT_BYTES if isinstance(results[0], dict) else RESULT_BYTES
+        return ENTRY_BYTES + per_result * len(results)
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Parameters:
+            key (tuple): Cache key.
+
+        Returns:
+            tuple: (True, results) on a hit, (False, None) on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self.remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, results):
+        """
+        Cache a result, evicting the least recently used entries to stay within bounds.
+
+        Parameters:
+            key (tuple): Cache key.
+            results: Ranked results (None for a query without matches).
+        """
+        size = self.estimate_size(results)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (results, size, expires_at)
+            self.total_bytes += size
+
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key):
+        # Callers hold the lock
+        _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def invalidate(self):
+        """
+        Drop every cached result, e.g. after the index has been rebuilt.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """
+        Report the cache size and hit/miss counters.
+
+        Returns:
+            dict: Cache metrics.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,363 @@
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+
+from search.singleSearch import SingleWordSearch
+from search.multiSearch import MultiWordSearch
+from search.phraseSearch import PhraseSearch, is_phrase_query
+from search.booleanQuery import BooleanSearch, is_boolean_query
+from search.spellingIndex import SpellingIndex
+from search.queryCache import QueryCache
+from inverted_index.BarrelManager import BarrelManager, PrefetchedBarrels
+from inverted_index.CollectionStatistics import CollectionStatistics
+from Ranking.ranking import DocumentRankingUtility
+from Ranking.MetadataStore import MetadataStore
+from Preprocessing.CompactLexicon import CompactLexicon
+from Preprocessing.TextNormalizer import get_normalizer
+
+# Quoted phrases, parentheses and single words, for building cache keys
+CACHE_KEY_TOKEN_PATTERN = re.compile(r'"[^"]*"|\(|\)|[^\s()]+')
+# Tokens that change the meaning of a query and are kept as written in cache keys
+QUERY_OPERATOR_PATTERN = re.compile(r'AND|OR|NOT|NEAR/\d+|\(|\)')
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSnapshot:
+    """
+    An immutable view of the on-disk index that a query is served from.
+    """
+
+    def __init__(self, lexicon, barrel_manager, spelling_index, statistics, generation=0):
+        """
+        Parameters:
+            lexicon (dict): Mapping of words to their term IDs.
+            spelling_index (SpellingIndex): Fuzzy lookup over the lexicon words.
+            statistics (CollectionStatistics): Corpus statistics used for BM25 ranking.
+            barrel_manager (BarrelManager): Manager used to read postings from the barrels.
+            generation (int): Index generation, incremented on every reload.
+        """
+        self.lexicon = lexicon
+        self.barrel_manager = barrel_manager
+        self.spelling_index = spelling_index
+        self.statistics = statistics
+        self.generation = generation
+
+
+class SearchEngine:
+    """
+    A long-lived search engine that loads the lexicon, the barrel index and the
+    document metadata once and serves every query from memory.
+    """
+
+    def __init__(self, base_dir=None, ranking_mode="bm25", cache_max_entries=1024, cache_max_bytes=64 * 1024 * 1024,
+                 cache_ttl_seconds=300, in_memory_index=False):
+        """
+        Initialize the engine and load the first index snapshot.
+
+        Parameters:
+            base_dir (str): The server directory holding the index files (default: parent of this package).
+            ranking_mode (str): Ranking mode passed to DocumentRankingUtility.rank ("bm25" or "frequency").
+            cache_max_entries (int): Maximum number of queries kept in the result cache (0 disables it).
+            cache_max_bytes (int): Approximate memory budget of the result cache.
+            cache_ttl_seconds (float): Seconds a cached result stays valid.
+            in_memory_index (bool): Hold every barrel in memory as compact posting lists.
+        """
+        self.ranking_mode = ranking_mode
+        self.in_memory_index = in_memory_index
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).resolve().parents[1]
+        self.lexicon_path = self.base_dir / "Preprocessing" / "lexicon.csv"
+        self.compact_lexicon_path = self.base_dir / "Preprocessing" / "lexicon.lex"
+        self.spelling_index_path = self.base_dir / "Preprocessing" / "spelling_index.json"
+        self.barrels_dir = self.base_dir / "inverted_index" / "barrels"
+        self.metadata_path = self.base_dir / "data" / "postings.csv"
+        self.metadata_db_path = self.base_dir / "data" / "metadata.db"
+        self.filtered_results_path = self.base_dir / "Ranking" / "filtered_results.json"
+
+        # NLP state never changes between index rebuilds, so it is built only once
+        self.normalizer = get_normalizer()
+
+        # Display fields are read per result from the docID-keyed store; it is filled at ingest time
+        self.metadata_store = MetadataStore(self.metadata_db_path)
+        self.metadata_store.build_from_csv(self.metadata_path)
+
+        # Ranked results of popular queries, keyed by normalized query, page and index generation
+        self.query_cache = QueryCache(cache_max_entries, cache_max_bytes, cache_ttl_seconds) if cache_max_entries else None
+
+        self._reload_lock = threading.Lock()
+        self._snapshot = None
+        self.generation = 0
+        self.reload()
+
+    def load_lexicon(self):
+        """
+        Open the memory-mapped lexicon, building it from the lexicon CSV if it is missing or stale.
+
+        Returns:
+            Mapping: Words mapped to their term IDs (an empty dict if there is no lexicon yet).
+        """
+        if not os.path.exists(self.lexicon_path):
+            print(f"Lexicon file not found at {self.lexicon_path}. Starting with an empty lexicon.")
+            return {}
+        return CompactLexicon.load_or_build(self.lexicon_path, self.compact_lexicon_path)
+
+    def reload(self):
+        """
+        Rebuild the in-memory snapshot from disk and swap it in atomically.
+
+        Queries that are already running keep using the snapshot they started with.
+        """
+        with self._reload_lock:
+            lexicon = self.load_lexicon()
+            barrel_manager = BarrelManager(self.barrels_dir, in_memory=self.in_memory_index)
+            if self.in_memory_index:
+                barrel_count = barrel_manager.preload()
+                print(f"Loaded {barrel_count} barrels into memory ({barrel_manager.resident_bytes()} bytes of postings).")
+            snapshot = IndexSnapshot(
+                lexicon=lexicon,
+                barrel_manager=barrel_manager,
+                spelling_index=SpellingIndex.load_or_build(self.lexicon_path, self.spelling_index_path),
+                statistics=CollectionStatistics.for_barrels(self.barrels_dir),
+                generation=self.generation + 1,
+            )
+            self._snapshot = snapshot
+            self.generation = snapshot.generation
+            if self.query_cache is not None:
+                self.query_cache.invalidate()
+        print(f"Search engine loaded {len(snapshot.lexicon)} lexicon entries and {self.metadata_store.count()} documents.")
+
+    def search(self, query, top_k=None, offset=0, hydrate=True):
+        """
+        Run a query against the current snapshot and rank the matching documents.
+
+        Parameters:
+            query (str): The raw query text.
+            top_k (int): Number of results to return (default: all).
+            offset (int): Number of top results to skip, for paging.
+            hydrate (bool): Attach the display fields; otherwise (doc_id, score) tuples are returned.
+
+        Returns:
+            list: Ranked results, or None if the query matched nothing.
+        """
+        snapshot = self._snapshot
+        if self.query_cache is None:
+            return self.run_query(query, top_k, snapshot, offset, hydrate)
+
+        key = (self.cache_key(query), top_k, offset, hydrate, snapshot.generation)
+        hit, ranked_results = self.query_cache.get(key)
+        if not hit:
+            ranked_results = self.run_query(query, top_k, snapshot, offset, hydrate)
+            self.query_cache.put(key, ranked_results)
+        return ranked_results
+
+    def search_batch(self, queries, top_k=None):
+        """
+        Run many queries together, sharing the term lookups between them.
+
+        Every query is normalized first; the words of all queries that miss the result
+        cache are then resolved to term IDs and their postings fetched grouped by barrel,
+        so each barrel is read once for the whole batch. Each query is then ranked on its own.
+
+        Parameters:
+            queries (list): The raw query texts.
+            top_k (int): Number of results to return per query (default: all).
+
+        Returns:
+            list: Ranked results (or None) for each query, in the order given.
+        """
+        snapshot = self._snapshot
+        keys = [self.cache_key(query) for query in queries]
+
+        # Queries with the same normalized form are answered once
+        results = {}
+        pending = {}
+        for query, key in zip(queries, keys):
+            if key in results or key in pending:
+                continue
+            hit, ranked_results = self.query_cache.get((key, top_k, 0, True, snapshot.generation)) \
+                if self.query_cache is not None else (False, None)
+            if hit:
+                results[key] = ranked_results
+            else:
+                pending[key] = query
+
+        if pending:
+            term_ids = [self.resolve_lemma(lemma, snapshot) for lemma in self.key_lemmas(pending)]
+            postings = snapshot.barrel_manager.query_terms([term_id for term_id in term_ids if term_id])
+            batch_snapshot = IndexSnapshot(
+                lexicon=snapshot.lexicon,
+                barrel_manager=PrefetchedBarrels(snapshot.barrel_manager, postings),
+                spelling_index=snapshot.spelling_index,
+                statistics=snapshot.statistics,
+                generation=snapshot.generation,
+            )
+            for key, query in pending.items():
+                results[key] = self.run_query(query, top_k, batch_snapshot)
+                if self.query_cache is not None:
+                    self.query_cache.put((key, top_k, 0, True, snapshot.generation), results[key])
+
+        return [results[key] for key in keys]
+
+    @staticmethod
+    def key_lemmas(keys):
+        """
+        Collect the distinct lemmas of normalized cache keys, skipping operators and phrase offsets.
+        """
+        lemmas = {}
+        for key in keys:
+            for token in CACHE_KEY_TOKEN_PATTERN.findall(key):
+                if QUERY_OPERATOR_PATTERN.fullmatch(token):
+                    continue
+                if token.startswith('"'):
+                    for part in token.strip('"').split():
+                        lemmas[part.rsplit("@", 1)[0]] = None
+                else:
+                    lemmas[token] = None
+        return list(lemmas)
+
+    @staticmethod
+    def resolve_lemma(lemma, snapshot):
+        """
+        Map a lemma to its term ID the way the searches do, falling back to the closest lexicon word.
+        """
+        term_id = snapshot.lexicon.get(lemma)
+        if not term_id and snapshot.spelling_index:
+            closest = snapshot.spelling_index.closest(lemma)
+            term_id = snapshot.lexicon.get(closest) if closest else None
+        return term_id
+
+    def hydrate_in_batches(self, ranked_docs, batch_size=20):
+        """
+        Attach the display fields to ranked (doc_id, score) tuples a batch at a time, so a
+        streamed response can send the first results before the rest are read.
+
+        Parameters:
+            ranked_docs (list): (doc_id, score) tuples, best first.
+            batch_size (int): Documents read from the metadata store per batch.
+
+        Yields:
+            list: Hydrated results of the next batch.
+        """
+        ranking_utility = DocumentRankingUtility(
+            self.filtered_results_path, self.metadata_path, metadata_store=self.metadata_store
+        )
+        for start in range(0, len(ranked_docs), batch_size):
+            yield ranking_utility.hydrate_results(ranked_docs[start:start + batch_size])
+
+    def cache_key(self, query):
+        """
+        Normalize a query for the result cache, so that queries differing only in case,
+        spacing or inflection ("Software Engineers" / "software engineer") share an entry.
+
+        Operators and parentheses are kept as written, and phrases keep the gaps between their words.
+        """
+        parts = []
+        for token in CACHE_KEY_TOKEN_PATTERN.findall(query):
+            if QUERY_OPERATOR_PATTERN.fullmatch(token):
+                parts.append(token)
+            elif token.startswith('"'):
+                normalized = self.normalizer.normalize_with_positions(token.strip('"'))
+                start = normalized[0][1] if normalized else 0
+                parts.append('"' + " ".join(f"{lemma}@{pos - start}" for lemma, pos in normalized) + '"')
+            else:
+                parts.extend(self.normalizer.normalize(token))
+        return " ".join(parts)
+
+    def run_query(self, query, top_k, snapshot, offset=0, hydrate=True):
+        """
+        Search and rank a query against the given snapshot, bypassing the result cache.
+
+        Only the top offset + top_k documents are selected, and only the requested page of
+        them is hydrated.
+        """
+        # Ranking depth needed to fill the requested page
+        depth = offset + top_k if top_k else None
+        search_kwargs = dict(
+            lexicon=snapshot.lexicon,
+            normalizer=self.normalizer,
+            barrel_manager=snapshot.barrel_manager,
+            spelling_index=snapshot.spelling_index,
+            statistics=snapshot.statistics,
+        )
+        # Boolean queries may contain phrases, so they are recognized first
+        if is_boolean_query(query):
+            search_instance = BooleanSearch(query, **search_kwargs)
+        elif is_phrase_query(query):
+            search_instance = PhraseSearch(query, **search_kwargs)
+        elif len(query.split()) == 1:
+            search_instance = SingleWordSearch(query, **search_kwargs)
+        else:
+            search_instance = MultiWordSearch(query, **search_kwargs)
+
+        # Postings go straight into ranking, so concurrent queries never share a results file
+        ranking_utility = DocumentRankingUtility(
+            self.filtered_results_path, self.metadata_path, metadata_store=self.metadata_store
+        )
+
+        if depth and self.ranking_mode == "bm25":
+            ranked_docs = self.rank_top_k(search_instance, snapshot, ranking_utility, depth)
+            if ranked_docs is not None:
+                if not ranked_docs:
+                    logger.debug(search_instance.message or f"No results found for query: {query}")
+                    return None
+                return ranking_utility.page_results(ranked_docs, offset=offset, hydrate=hydrate)
+
+        filtered_results = search_instance.search()
+
+        if not filtered_results:
+            logger.debug(search_instance.message)
+            return None
+
+        return ranking_utility.rank(
+            filtered_results,
+            mode=self.ranking_mode,
+            top_k=depth,
+            statistics=snapshot.statistics,
+            document_frequencies=search_instance.document_frequencies,
+            boosts=getattr(search_instance, "proximity_boosts", None),
+            offset=offset,
+            hydrate=hydrate,
+        )
+
+    def rank_top_k(self, search_instance, snapshot, ranking_utility, top_k):
+        """
+        Rank the top_k results with early termination, when the query and index allow it.
+
+        Single words are served from their impact-ordered postings and plain OR queries with
+        WAND; both give the same scores as full BM25 ranking.
+
+        Returns:
+            list: (doc_id, score) tuples, best first, or None if the query needs full ranking.
+        """
+        if isinstance(search_instance, SingleWordSearch):
+            _, term_id = search_instance.resolve_term()
+            if not term_id:
+                return []
+            impact_reader = snapshot.barrel_manager.open_impacts(term_id)
+            if impact_reader is None:
+                return None
+            return ranking_utility.rank_term_by_impact(impact_reader, term_id, snapshot.statistics, top_k)
+
+        if isinstance(search_instance, BooleanSearch):
+            words = search_instance.disjunction_words()
+            if words is None:
+                return None
+            upper_bounds = {}
+            document_frequencies = search_instance.document_frequencies
+            for word in words:
+                term_id = search_instance.term_ids.get(word)
+                # Words in no document are dropped before their postings are fetched
+                if not document_frequencies.get(word):
+                    continue
+                impact_reader = snapshot.barrel_manager.open_impacts(term_id)
+                entry = impact_reader.find_entry(term_id) if impact_reader is not None else None
+                if entry is None:
+                    return None
+                upper_bounds[word] = entry[2:]
+            term_postings = {word: search_instance.postings(word) for word in upper_bounds}
+            return ranking_utility.rank_disjunction_wand(term_postings, upper_bounds, snapshot.statistics, top_k,
+                                                         document_frequencies)
+
+        return None
@@ -1,27 +1,43 @@
 import json
 import os
 import csv
+import logging
 import nltk
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from nltk import pos_tag
 import difflib  # For fuzzy matching
 from pathlib import Path
 
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.CollectionStatistics import document_frequency
+from Preprocessing.TextNormalizer import get_normalizer
+
 # Ensure necessary NLTK data is downloaded
 nltk.download("punkt", quiet=True)
 nltk.download("stopwords", quiet=True)
 nltk.download("wordnet", quiet=True)
 nltk.download("words", quiet=True)
 
+# Per-query diagnostics go to the log rather than stdout, which the server shares across requests
+logger = logging.getLogger(__name__)
+
 class SingleWordSearch:
-    def __init__(self, query):
+    def __init__(self, query, lexicon=None, normalizer=None, barrel_manager=None, spelling_index=None, debug_dump=False,
+                 statistics=None):
         self.query = query
+        self.debug_dump = debug_dump
+        self.message = ""
+        # Number of documents containing each query word, used by BM25 ranking
+        self.document_frequencies = {}
         self.absolute_path = Path(__file__).resolve()
         self.output_dir = os.path.join(self.absolute_path.parents[1], "inverted_index", "barrels")
         self.lexicon_path = os.path.join(self.absolute_path.parents[1], "Preprocessing", "lexicon.csv")
-        self.lemmatizer = WordNetLemmatizer()
-        self.lexicon = self.load_lexicon()
+        # Shared state can be handed in by a long-lived SearchEngine to skip reloading it per query
+        self.normalizer = normalizer or get_normalizer()
+        self.lexicon = lexicon if lexicon is not None else self.load_lexicon()
+        self.barrel_manager = barrel_manager or BarrelManager(self.output_dir)
+        # Prebuilt fuzzy lookup; without it typos fall back to scanning the whole lexicon
+        self.spelling_index = spelling_index
+        # Collection statistics; document frequencies are read from them instead of counting postings
+        self.statistics = statistics
 
     # Load the lexicon file into a dictionary
     def load_lexicon(self):
@@ -33,40 +49,12 @@ class SingleWordSearch:
                 lexicon[word] = term_id
         return lexicon
 
-    # Map NLTK POS tags to WordNet POS tags
-    @staticmethod
-    def get_wordnet_pos(treebank_tag):
-        if treebank_tag.startswith('J'):  # Adjective
-            return 'a'
-        elif treebank_tag.startswith('V'):  # Verb
-            return 'v'
-        elif treebank_tag.startswith('N'):  # Noun
-            return 'n'
-        elif treebank_tag.startswith('R'):  # Adverb
-            return 'r'
-        else:
-            return None
-
     # Function to process the query and lemmatize the word
     def process_query(self):
-        query_tokens = word_tokenize(self.query.lower())  # Tokenize and lowercase the query
-        print(f"Tokenized query: {query_tokens}")  # Debug log for tokenized query
+        # The shared normalizer produces the same lemmas as the indexing pipeline
+        lemmatized_tokens = self.normalizer.normalize(self.query)
 
-        # Filter out short tokens and any non-alphabetic tokens
-        filtered_tokens = [token for token in query_tokens if len(token) > 2 and token.isalpha()]
-
-        # Debug log for filtered tokens
-        print(f"Filtered tokens: {filtered_tokens}")
-
-        # Perform POS tagging and lemmatization
-        pos_tags = pos_tag(filtered_tokens)
-        lemmatized_tokens = []
-        for word, tag in pos_tags:
-            wordnet_pos = self.get_wordnet_pos(tag) or 'n'  # Default to noun if no match
-            lemmatized_tokens.append(self.lemmatizer.lemmatize(word, pos=wordnet_pos))
-
-        # Debug log to see what lemmatized tokens we have
-        print(f"Lemmatized tokens: {lemmatized_tokens}")
+        logger.debug("Lemmatized tokens: %s", lemmatized_tokens)
 
         return lemmatized_tokens  # Return the list of lemmatized tokens
 
@@ -96,12 +84,13 @@ class SingleWordSearch:
         except ValueError:
             return None  # Handle non-integer terms (if any)
 
-    # Main function to perform single-word search
-    def search(self):
+    # Function to find the lemmatized query word and its term ID, correcting typos if needed
+    def resolve_term(self):
         lemmatized_query = self.process_query()
 
         if not lemmatized_query:
-            return f"Invalid query: '{self.query}'. Could not lemmatize or process the word."
+            self.message = f"Invalid query: '{self.query}'. Could not lemmatize or process the word."
+            return None, None
 
         # Use the first lemmatized token for searching
         lemmatized_word = lemmatized_query[0]
@@ -111,41 +100,50 @@ class SingleWordSearch:
 
         # If the word is not found, try to find the closest match in the lexicon
         if not term_id:
-            closest_match = self.get_closest_match(lemmatized_word, self.lexicon)
+            if self.spelling_index:
+                closest_match = self.spelling_index.closest(lemmatized_word)
+            else:
+                closest_match = self.get_closest_match(lemmatized_word, self.lexicon)
             if closest_match:
-                print(f"Word '{lemmatized_word}' not found. Using closest match: '{closest_match}'")
+                logger.debug("Word '%s' not found. Using closest match: '%s'", lemmatized_word, closest_match)
                 term_id = self.lexicon.get(closest_match)
             else:
-                return f"Word '{lemmatized_word}' (and closest matches) not found in the lexicon."
+                self.message = f"Word '{lemmatized_word}' (and closest matches) not found in the lexicon."
+                return lemmatized_word, None
+
+        return lemmatized_word, term_id
+
+    # Main function to perform single-word search
+    def search(self):
+        lemmatized_word, term_id = self.resolve_term()
+        if not term_id:
+            return []
 
         barrel_key = self.get_barrel(term_id)
         if not barrel_key:
-            return f"Invalid term ID '{term_id}' for query: {self.query}. Unable to determine barrel."
+            self.message = f"Invalid term ID '{term_id}' for query: {self.query}. Unable to determine barrel."
+            return []
 
         bucket_key = self.get_bucket(term_id)
         if not bucket_key:
-            return f"Invalid term ID '{term_id}' for query: {self.query}. Unable to determine bucket."
-
-        # Path to the appropriate barrel file
-        barrel_path = os.path.join(self.output_dir, f"{barrel_key}.json")
-        print(barrel_path)
-        if not os.path.exists(barrel_path):
-            return f"No results found for query: {self.query} (lemmatized as '{lemmatized_word}', term ID: {term_id})"
-
-        # Load the barrel and search within the bucket
-        with open(barrel_path, "r") as file:
-            barrel_data = json.load(file)
+            self.message = f"Invalid term ID '{term_id}' for query: {self.query}. Unable to determine bucket."
+            return []
 
-        # Search for the term in the appropriate bucket
-        postings = barrel_data.get(bucket_key, {}).get(term_id, None)
+        # Search for the term in the appropriate barrel and bucket
+        postings = self.barrel_manager.query_term(term_id)
         if postings:
-            # Path to store the results
-            results_path = os.path.join(self.absolute_path.parents[1], "Ranking", "filtered_results.json")
-
-            # Write results to the JSON file
-            with open(results_path, "w") as result_file:
-                json.dump(postings, result_file, indent=4)
-
-            return f"Results for '{self.query}' (lemmatized as '{lemmatized_word}') have been stored in '{results_path}'."
+            self.document_frequencies[lemmatized_word] = document_frequency(self.statistics, term_id, postings)
+            self.message = f"Found {len(postings)} results for '{self.query}' (lemmatized as '{lemmatized_word}')."
+            if self.debug_dump:
+                self.dump_results(list(postings))
+            return postings
         else:
-            return f"No results found for query: {self.query} (lemmatized as '{lemmatized_word}', term ID: {term_id}')"
+            self.message = f"No results found for query: {self.query} (lemmatized as '{lemmatized_word}', term ID: {term_id}')"
+            return []
+
+    # Function to write the postings to filtered_results.json for debugging
+    def dump_results(self, results):
+        results_path = os.path.join(self.absolute_path.parents[1], "Ranking", "filtered_results.json")
+        with open(results_path, "w") as result_file:
+            json.dump(results, result_file, indent=4)
+        logger.debug("Results for '%s' have been stored in '%s'.", self.query, results_path)
@@ -0,0 +1,213 @@
+import csv
+import json
+import os
+from collections import defaultdict
+
+
+def bounded_edit_distance(source, target, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions),
+    abandoning the computation as soon as it must exceed max_distance.
+
+    Parameters:
+        source (str): First word.
+        target (str): Second word.
+        max_distance (int): Largest distance of interest.
+
+    Returns:
+        int: The distance, or None if it is larger than max_distance.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return None
+
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = current[0]
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return None
+        previous_previous, previous = previous, current
+
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+def write_spelling_index(lexicon_path, index_path):
+    """
+    Build the spelling index from the lexicon CSV and persist it, replacing any existing file atomically.
+
+    Parameters:
+        lexicon_path (str): The lexicon CSV (word, term ID rows).
+        index_path (str): Destination of the spelling index.
+
+    Returns:
+        int: Number of words indexed.
+    """
+    lexicon = {}
+    with open(lexicon_path, "r", newline="") as file:
+        for row in csv.reader(file):
+            if len(row) == 2 and row[1].isdigit():
+                lexicon[row[0]] = row[1]
+    index = SpellingIndex.from_lexicon(lexicon)
+    index.save(index_path, SpellingIndex.file_signature(lexicon_path))
+    return len(index.words)
+
+
+class SpellingIndex:
+    """
+    SymSpell-style fuzzy lookup over the lexicon.
+
+    Every lexicon word is indexed under all strings obtained by deleting up to max_distance
+    characters from its prefix. A misspelled query word only has to generate its own deletes
+    and verify the few words sharing one of them, instead of scanning the whole vocabulary.
+    """
+
+    def __init__(self, words, max_distance=2, prefix_length=7):
+        """
+        Build the deletion index.
+
+        Parameters:
+            words (list): Lexicon words, most frequent first (ties in distance prefer earlier words).
+            max_distance (int): Largest edit distance a lookup can correct.
+            prefix_length (int): Only this many leading characters are used for deletes.
+        """
+        self.words = list(words)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.word_ids = {word: idx for idx, word in enumerate(self.words)}
+        self.deletes = defaultdict(list)
+        for idx, word in enumerate(self.words):
+            for delete in self.generate_deletes(word[:prefix_length], max_distance):
+                self.deletes[delete].append(idx)
+
+    @classmethod
+    def from_lexicon(cls, lexicon, **kwargs):
+        """
+        Build the index over the words of a word -> term ID mapping.
+        """
+        # Lower term IDs were assigned to more frequent words
+        words = sorted(
+            (word for word, term_id in lexicon.items() if str(term_id).isdigit()),
+            key=lambda word: int(lexicon[word]),
+        )
+        return cls(words, **kwargs)
+
+    @staticmethod
+    def generate_deletes(word, max_distance):
+        """
+        Return the word and every string obtained by deleting up to max_distance characters.
+        """
+        deletes = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            next_frontier = set()
+            for candidate in frontier:
+                for i in range(len(candidate)):
+                    next_frontier.add(candidate[:i] + candidate[i + 1:])
+            next_frontier -= deletes
+            deletes |= next_frontier
+            frontier = next_frontier
+        return deletes
+
+    def lookup(self, word, max_distance=None, top_k=1):
+        """
+        Find the lexicon words closest to a (possibly misspelled) word.
+
+        Parameters:
+            word (str): The word to correct.
+            max_distance (int): Largest accepted edit distance (capped at the index's max_distance).
+            top_k (int): Maximum number of suggestions.
+
+        Returns:
+            list: (word, distance) tuples, closest first.
+        """
+        if word in self.word_ids:
+            return [(word, 0)]
+
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        candidates = set()
+        for delete in self.generate_deletes(word[:self.prefix_length], max_distance):
+            candidates.update(self.deletes.get(delete, ()))
+
+        matches = []
+        for idx in candidates:
+            distance = bounded_edit_distance(word, self.words[idx], max_distance)
+            if distance is not None:
+                matches.append((distance, idx))
+        matches.sort()
+        return [(self.words[idx], distance) for distance, idx in matches[:top_k]]
+
+    def closest(self, word):
+        """
+        Return the single closest lexicon word, or None if nothing is within max_distance.
+        """
+        matches = self.lookup(word)
+        return matches[0][0] if matches else None
+
+    def save(self, index_path, source_signature=None):
+        """
+        Persist the index as JSON, tagged with the signature of the lexicon it was built from.
+        """
+        data = {
+            "source": source_signature,
+            "max_distance": self.max_distance,
+            "prefix_length": self.prefix_length,
+            "words": self.words,
+            "deletes": self.deletes,
+        }
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, "r") as file:
+            data = json.load(file)
+        index = cls.__new__(cls)
+        index.words = data["words"]
+        index.max_distance = data["max_distance"]
+        index.prefix_length = data["prefix_length"]
+        index.word_ids = {word: idx for idx, word in enumerate(index.words)}
+        index.deletes = data["deletes"]
+        return index, data.get("source")
+
+    @staticmethod
+    def file_signature(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @classmethod
+    def load_or_build(cls, lexicon_path, index_path):
+        """
+        Load the spelling index persisted by the ingestion pipeline.
+
+        The pipeline rewrites the index after every batch, so it is only built here when the
+        file is missing or unreadable (an index directory that predates it).
+
+        Parameters:
+            lexicon_path (str): The lexicon CSV file.
+            index_path (str): Where the spelling index is persisted.
+
+        Returns:
+            SpellingIndex: The index.
+        """
+        if os.path.exists(index_path):
+            try:
+                return cls.load(index_path)[0]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Rebuilding unreadable spelling index at {index_path}: {e}")
+
+        if not os.path.exists(lexicon_path):
+            return cls([])
+        count = write_spelling_index(lexicon_path, index_path)
+        print(f"Spelling index built for {count} words.")
+        return cls.load(index_path)[0]
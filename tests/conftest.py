@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The server modules import each other from the server directory (e.g. "from search.x import ...")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "server"))
@@ -0,0 +1,51 @@
+import os
+
+from inverted_index.BarrelCache import BarrelCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self, path):
+        self.loads += 1
+        with open(path) as file:
+            return file.read()
+
+
+def test_barrel_cache_reloads_a_rewritten_file(tmp_path):
+    path = tmp_path / "0.json"
+    path.write_text("first")
+    cache, loader = BarrelCache(), CountingLoader()
+
+    assert cache.get(path, loader) == "first"
+    assert cache.get(path, loader) == "first"
+    assert loader.loads == 1
+
+    # Same size, newer mtime: only the modification time tells the versions apart
+    temp_path = tmp_path / "0.json.tmp"
+    temp_path.write_text("other")
+    stat = os.stat(path)
+    os.replace(temp_path, path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get(path, loader) == "other"
+    assert loader.loads == 2
+
+    path.unlink()
+    assert cache.get(path, loader) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_barrel_cache_evicts_least_recently_used(tmp_path):
+    cache, loader = BarrelCache(max_bytes=10), CountingLoader()
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("xxxx")
+    cache.get(tmp_path / "a", loader)
+    cache.get(tmp_path / "b", loader)
+    cache.get(tmp_path / "a", loader)
+    cache.get(tmp_path / "c", loader)  # Over budget: "b" is the least recently used
+    assert loader.loads == 3
+    cache.get(tmp_path / "a", loader)
+    assert loader.loads == 3
+    cache.get(tmp_path / "b", loader)
+    assert loader.loads == 4
@@ -0,0 +1,86 @@
+import random
+
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.BinaryBarrel import (BLOCK_SIZE, HEADER, LEGACY_MAGIC, TABLE_ENTRY, BinaryBarrelReader,
+                                         BlockPostingList, decode_postings, encode_postings, encode_varint)
+from search.intersection import PostingList, intersect
+
+
+def make_postings(doc_ids, rng):
+    return [{"docID": str(doc_id), "frequency": len(positions), "positions": positions}
+            for doc_id in doc_ids
+            for positions in [sorted(rng.sample(range(200), rng.randint(1, 4)))]]
+
+
+def test_postings_round_trip_across_block_boundaries():
+    rng = random.Random(1)
+    for size in (0, 1, BLOCK_SIZE - 1, BLOCK_SIZE, BLOCK_SIZE + 1, 5 * BLOCK_SIZE + 7):
+        postings = make_postings(sorted(rng.sample(range(100000), size)), rng)
+        encoded = encode_postings(postings)
+        assert decode_postings(encoded) == postings
+
+        lazy = BlockPostingList(encoded, 0)
+        assert len(lazy) == size
+        assert list(lazy) == postings
+        assert list(lazy.doc_ids) == [int(p["docID"]) for p in postings]
+        assert list(lazy.frequencies) == [p["frequency"] for p in postings]
+        if size:
+            assert lazy[-1] == postings[-1]
+            assert lazy.block_last_doc_ids[-1] == int(postings[-1]["docID"])
+
+
+def test_legacy_barrels_are_still_read(tmp_path):
+    postings = [{"docID": "3", "frequency": 1, "positions": [4]}, {"docID": "9", "frequency": 2, "positions": [1, 5]}]
+    body = bytearray()
+    encode_varint(len(postings), body)
+    previous = 0
+    for posting in postings:
+        encode_varint(int(posting["docID"]) - previous, body)
+        previous = int(posting["docID"])
+        encode_varint(posting["frequency"], body)
+        encode_varint(len(posting["positions"]), body)
+        previous_pos = 0
+        for pos in posting["positions"]:
+            encode_varint(pos - previous_pos, body)
+            previous_pos = pos
+    path = tmp_path / "0.bin"
+    path.write_bytes(HEADER.pack(LEGACY_MAGIC, 1) + TABLE_ENTRY.pack(7, HEADER.size + TABLE_ENTRY.size, len(body)) + body)
+
+    with BinaryBarrelReader(str(path)) as reader:
+        assert reader.lookup("7") == postings
+        assert reader.lookup("8") is None
+
+
+def merge_and(word_postings):
+    # The dictionary merge intersections used before galloping
+    merged = {}
+    for word, postings in word_postings.items():
+        for posting in postings:
+            merged.setdefault(int(posting["docID"]), {})[word] = posting["frequency"]
+    return sorted(doc_id for doc_id, terms in merged.items() if all(word in terms for word in word_postings))
+
+
+def test_galloping_and_matches_dictionary_merge(tmp_path):
+    rng = random.Random(7)
+    # Term 1 is rare, the others range from sparse to present in almost every document
+    densities = {"1": 0.002, "2": 0.05, "3": 0.3, "4": 0.9, "105": 0.5}
+    index = {term: make_postings([doc_id for doc_id in range(20000) if rng.random() < density], rng)
+             for term, density in densities.items()}
+    manager = BarrelManager(str(tmp_path), cache=BarrelCache())
+    manager.update_barrels(index)
+
+    for terms in (["1", "4"], ["2", "3"], ["1", "2", "3", "4"], ["3", "4", "105"], ["4", "105"]):
+        postings = {term: manager.query_term(term) for term in terms}
+        assert all(isinstance(p, BlockPostingList) for p in postings.values())
+        posting_lists = [PostingList(postings[term]) for term in terms]
+        assert [doc_id for doc_id, _ in intersect(posting_lists)] == merge_and(index_subset(index, terms))
+
+    # Driving from the rare term leaves most blocks of the common one undecoded
+    common = manager.query_term("4")
+    intersect([PostingList(manager.query_term("1")), PostingList(common)])
+    assert len(common.blocks) < len(common.block_offsets) // 2
+
+
+def index_subset(index, terms):
+    return {term: index[term] for term in terms}
@@ -0,0 +1,181 @@
+import pytest
+
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.BinaryBarrel import BlockPostingList
+from inverted_index.CollectionStatistics import CollectionStatistics
+from search.booleanQuery import AndNode, BooleanSearch, NotNode, OrNode, QueryParser, TermNode, is_boolean_query
+
+
+class StubNormalizer:
+    """
+    Lower-cases and splits on whitespace, standing in for the NLTK normalizer.
+    """
+
+    def normalize(self, text):
+        return text.lower().split()
+
+    def normalize_with_positions(self, text):
+        return [(word, pos) for pos, word in enumerate(text.lower().split())]
+
+
+class StubBarrels:
+    def __init__(self, documents):
+        # documents: {docID: "text"} -> postings per term ID
+        self.postings = {}
+        self.lexicon = {}
+        for doc_id, text in sorted(documents.items()):
+            positions = {}
+            for pos, word in enumerate(text.split()):
+                positions.setdefault(word, []).append(pos)
+            for word, word_positions in positions.items():
+                term_id = self.lexicon.setdefault(word, str(len(self.lexicon) + 1))
+                self.postings.setdefault(term_id, []).append(
+                    {"docID": str(doc_id), "frequency": len(word_positions), "positions": word_positions})
+
+    def query_term(self, term_id):
+        return self.postings.get(term_id)
+
+
+class CountingStatistics:
+    has_document_frequencies = True
+
+    def __init__(self, barrels):
+        self.barrels = barrels
+
+    def document_frequency(self, term_id):
+        return len(self.barrels.postings.get(str(term_id), []))
+
+
+DOCUMENTS = {
+    1: "python data engineer remote",
+    2: "java data engineer",
+    3: "python developer intern",
+    4: "senior data scientist python",
+    5: "engineer data python",
+}
+
+
+def boolean_search(query, statistics=True, documents=DOCUMENTS):
+    barrels = StubBarrels(documents)
+    return BooleanSearch(
+        query,
+        statistics=CountingStatistics(barrels) if statistics else None,
+        lexicon=barrels.lexicon,
+        normalizer=StubNormalizer(),
+        barrel_manager=barrels,
+        spelling_index=None,
+    )
+
+
+def matching(query, **kwargs):
+    return sorted(int(doc_id) for doc_id in boolean_search(query, **kwargs).search())
+
+
+def test_and_binds_tighter_than_or():
+    tree = QueryParser("a OR b AND c").parse()
+    assert isinstance(tree, OrNode)
+    assert isinstance(tree.children[1], AndNode)
+    assert repr(tree) == "OR(a, AND(b, c))"
+
+
+def test_not_binds_tighter_than_and_and_implicit_and():
+    assert repr(QueryParser("a NOT b c").parse()) == "AND(a, NOT(b), c)"
+    assert repr(QueryParser("NOT a OR b").parse()) == "OR(NOT(a), b)"
+
+
+def test_parentheses_override_precedence():
+    tree = QueryParser("(a OR b) AND c").parse()
+    assert isinstance(tree, AndNode)
+    assert isinstance(tree.children[0], OrNode)
+    assert isinstance(tree.children[1], TermNode)
+
+
+def test_malformed_queries_are_rejected():
+    for query in ("(a OR b", "a OR", "a )", "a AND OR b"):
+        with pytest.raises(ValueError):
+            QueryParser(query).parse()
+
+
+def test_near_cannot_be_mixed_with_boolean_operators():
+    with pytest.raises(ValueError, match="NEAR"):
+        QueryParser("python NEAR/3 data AND remote").parse()
+    search = boolean_search("python NEAR/3 data AND remote")
+    assert search.search() == {}
+    assert "NEAR" in search.message
+
+
+def test_phrase_is_one_operand():
+    assert is_boolean_query('"data engineer" AND remote')
+    assert not is_boolean_query('"data engineer"')
+    tree = QueryParser('"data engineer" AND NOT java').parse()
+    assert isinstance(tree, AndNode)
+    assert isinstance(tree.children[1], NotNode)
+
+
+def test_boolean_results():
+    assert matching("python AND data") == [1, 4, 5]
+    assert matching("python OR java") == [1, 2, 3, 4, 5]
+    assert matching("(python OR java) NOT intern") == [1, 2, 4, 5]
+    assert matching("data AND (remote OR scientist)") == [1, 4]
+    assert matching("python AND java") == []
+
+
+def test_phrases_keep_word_order():
+    assert matching('"data engineer" AND python') == [1]
+    assert matching('"data engineer" OR intern') == [1, 2, 3]
+    assert matching('python NOT "data engineer"') == [3, 4, 5]
+
+
+def test_phrase_matches_are_boosted():
+    search = boolean_search('"data engineer" OR intern')
+    search.search()
+    assert set(search.proximity_boosts) == {1, 2}
+
+
+def test_or_returns_every_match():
+    # Every document of a disjunction is returned, not just the first ones in docID order
+    documents = {doc_id: "common" for doc_id in range(1, 200)}
+    documents[500] = "rare"
+    assert len(matching("common OR rare", documents=documents)) == 200
+
+
+def test_plan_is_costed_without_decoding_postings():
+    search = boolean_search("python AND remote AND data")
+    search.plan = search.build_plan()
+    assert [child.word for child in search.plan.children] == ["remote", "python", "data"]
+    assert search.word_postings == {}
+    assert search.document_frequencies == {"python": 4, "remote": 1, "data": 4}
+
+
+def test_statistics_are_optional():
+    assert matching("python AND data", statistics=False) == [1, 4, 5]
+
+
+def test_only_negated_words_are_rejected():
+    search = boolean_search("NOT python")
+    assert search.search() == {}
+    assert "not negated" in search.message
+
+
+def test_nested_groups_only_probe_the_matched_documents(tmp_path):
+    manager = BarrelManager(str(tmp_path), cache=BarrelCache())
+    manager.update_barrels({
+        "1": [{"docID": str(doc_id), "frequency": 1, "positions": [0]} for doc_id in (700, 2500)],
+        "2": [{"docID": str(doc_id), "frequency": 1, "positions": [1]} for doc_id in range(0, 3000, 2)],
+        "3": [{"docID": str(doc_id), "frequency": 1, "positions": [1]} for doc_id in range(1, 3000, 2)],
+    })
+    search = BooleanSearch(
+        "rare AND (common OR other) NOT other",
+        statistics=CollectionStatistics.for_barrels(str(tmp_path)),
+        lexicon={"rare": "1", "common": "2", "other": "3"},
+        normalizer=StubNormalizer(),
+        barrel_manager=manager,
+        spelling_index=None,
+    )
+    assert sorted(int(doc_id) for doc_id in search.search()) == [700, 2500]
+    # Each of the 12 blocks of the long lists is only decoded where a candidate falls
+    for word in ("common", "other"):
+        postings = search.word_postings[word]
+        assert isinstance(postings, BlockPostingList)
+        assert len(postings.blocks) <= 2
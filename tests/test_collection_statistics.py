@@ -0,0 +1,73 @@
+import json
+import os
+
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.CollectionStatistics import CollectionStatistics, document_frequency
+
+INDEX = {
+    "1": [{"docID": "0", "frequency": 2, "positions": [0, 3]}, {"docID": "2", "frequency": 1, "positions": [1]}],
+    "2": [{"docID": "2", "frequency": 3, "positions": [0, 2, 4]}],
+    "150": [{"docID": "5", "frequency": 1, "positions": [7]}],
+}
+
+
+def build(tmp_path):
+    BarrelManager(str(tmp_path), cache=BarrelCache()).update_barrels(INDEX)
+    return CollectionStatistics.for_barrels(str(tmp_path))
+
+
+def summary(stats):
+    return (stats.total_docs, stats.total_length, list(stats.doc_lengths),
+            [stats.document_frequency(term) for term in (1, 2, 150, 151)])
+
+
+def test_incremental_statistics_match_a_rebuild(tmp_path):
+    stats = build(tmp_path)
+    assert summary(stats) == (3, 7, [2, 0, 4, 0, 0, 1], [2, 1, 1, 0])
+    assert summary(CollectionStatistics.rebuild(str(tmp_path))) == summary(stats)
+
+
+def test_missing_sidecar_is_rebuilt_from_barrels(tmp_path):
+    expected = summary(build(tmp_path))
+    os.remove(tmp_path / CollectionStatistics.FILE_NAME)
+    assert summary(CollectionStatistics.for_barrels(str(tmp_path))) == expected
+    assert (tmp_path / CollectionStatistics.FILE_NAME).exists()
+
+
+def test_partial_sidecar_is_rebuilt_from_barrels(tmp_path):
+    expected = summary(build(tmp_path))
+    os.remove(tmp_path / CollectionStatistics.DOCUMENT_FREQUENCIES_FILE_NAME)
+    assert summary(CollectionStatistics.for_barrels(str(tmp_path))) == expected
+
+    # Arrays from another write than the header
+    stats_path = tmp_path / CollectionStatistics.FILE_NAME
+    header = json.loads(stats_path.read_text())
+    stats_path.write_text(json.dumps({**header, "documents": header["documents"] + 10}))
+    assert summary(CollectionStatistics.for_barrels(str(tmp_path))) == expected
+
+    stats_path.write_text("{")
+    assert summary(CollectionStatistics.for_barrels(str(tmp_path))) == expected
+
+
+def test_legacy_sidecar_is_rebuilt_with_document_frequencies(tmp_path):
+    expected = summary(build(tmp_path))
+    (tmp_path / CollectionStatistics.FILE_NAME).write_text(json.dumps({"doc_lengths": [2, 0, 4, 0, 0, 1]}))
+    stats = CollectionStatistics.for_barrels(str(tmp_path))
+    assert stats.has_document_frequencies
+    assert summary(stats) == expected
+
+
+def test_empty_index_has_empty_statistics(tmp_path):
+    stats = CollectionStatistics.for_barrels(str(tmp_path))
+    assert stats.total_docs == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_document_frequency_falls_back_to_the_postings(tmp_path):
+    stats = build(tmp_path)
+    postings = INDEX["1"]
+    assert document_frequency(stats, "1", postings[:1]) == 2
+    assert document_frequency(None, "1", postings[:1]) == 1
+    stats.has_document_frequencies = False
+    assert document_frequency(stats, "1", postings) == 2
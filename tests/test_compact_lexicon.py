@@ -0,0 +1,72 @@
+import csv
+import os
+
+import pytest
+
+from Preprocessing.CompactLexicon import CompactLexicon, write_compact_lexicon
+
+ENTRIES = [("python", 0), ("data", 1), ("engineer", 2), ("zürich", 3), ("analyst", 4), ("java", 5)]
+
+
+def write_lexicon_csv(path, entries):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Word", "Index"])
+        writer.writerows(entries)
+    return path
+
+
+@pytest.fixture
+def lexicon(tmp_path):
+    lexicon_path = write_lexicon_csv(tmp_path / "lexicon.csv", ENTRIES)
+    lexicon = CompactLexicon.load_or_build(lexicon_path, tmp_path / "lexicon.lex")
+    yield lexicon
+    lexicon.close()
+
+
+def test_binary_search_finds_first_last_and_inner_words(lexicon):
+    words = list(lexicon)
+    assert words == sorted(words, key=lambda word: word.encode("utf-8"))
+    assert (words[0], words[-1]) == ("analyst", "zürich")
+    assert lexicon.find("analyst") == 0
+    assert lexicon.find("zürich") == len(ENTRIES) - 1
+    for word, term_id in ENTRIES:
+        assert lexicon[word] == str(term_id)
+        assert lexicon.term_id(word) == term_id
+    assert dict(lexicon.items()) == {word: str(term_id) for word, term_id in ENTRIES}
+
+
+def test_missing_words_are_not_found(lexicon):
+    # Before the first word, after the last one, between two words, and a prefix of one
+    for word in ("aardvark", "zzz", "go", "pyth", ""):
+        assert lexicon.find(word) == -1
+        assert word not in lexicon
+        assert lexicon.term_id(word) is None
+        assert lexicon.get(word) is None
+    with pytest.raises(KeyError):
+        lexicon["rust"]
+    assert 5 not in lexicon
+
+
+def test_load_or_build_rebuilds_when_the_csv_changes(tmp_path, lexicon):
+    lexicon_path, compact_path = tmp_path / "lexicon.csv", tmp_path / "lexicon.lex"
+    reopened = CompactLexicon.load_or_build(lexicon_path, compact_path)
+    assert reopened.source_signature == lexicon.source_signature
+    reopened.close()
+
+    write_lexicon_csv(lexicon_path, ENTRIES + [("rust", 6)])
+    stat = os.stat(lexicon_path)
+    rebuilt = CompactLexicon.load_or_build(lexicon_path, compact_path)
+    assert rebuilt.source_signature == (stat.st_size, stat.st_mtime_ns)
+    assert rebuilt["rust"] == "6"
+    assert len(rebuilt) == len(ENTRIES) + 1
+    rebuilt.close()
+
+
+def test_load_or_build_replaces_an_unreadable_file(tmp_path):
+    lexicon_path = write_lexicon_csv(tmp_path / "lexicon.csv", ENTRIES)
+    (tmp_path / "lexicon.lex").write_bytes(b"not a lexicon")
+    lexicon = CompactLexicon.load_or_build(lexicon_path, tmp_path / "lexicon.lex")
+    assert lexicon["java"] == "5"
+    lexicon.close()
+    assert write_compact_lexicon(lexicon_path, tmp_path / "other.lex") == len(ENTRIES)
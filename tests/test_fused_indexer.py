@@ -0,0 +1,114 @@
+import csv
+
+import pytest
+
+import Forward_Index.ForwardIndexGenerator
+import ingestion.fusedIndexer
+from Forward_Index.ForwardIndexGenerator import ForwardIndexGenerator
+from Forward_Index.SegmentStore import SegmentStore
+from ingestion.fusedIndexer import FusedIndexer
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.InvertedIndexGenerator import InvertedIndexGenerator
+from Preprocessing.LexiconGenerator import LexiconGenerator
+
+COLUMNS = ["title", "description", "company_name", "location", "skills_desc"]
+ROWS = [
+    ["python engineer", "build data pipelines with python", "acme", "remote", "python spark"],
+    ["java developer", "maintain java services", "globex", "berlin", ""],
+    ["data scientist", "python models and data analysis", "acme", "london", "statistics"],
+    ["senior engineer", "lead the data platform team", "initech", "remote", "leadership"],
+    ["python intern", "learn python and java", "globex", "paris", "python"],
+]
+
+
+class StubNormalizer:
+    """
+    Lower-cases and splits on whitespace, standing in for the NLTK normalizer.
+    """
+
+    def normalize(self, text):
+        return text.lower().split()
+
+    def normalize_with_positions(self, text):
+        return [(word, pos) for pos, word in enumerate(text.lower().split())]
+
+    def save_warm_start(self):
+        pass
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion.fusedIndexer, "get_normalizer", StubNormalizer)
+    monkeypatch.setattr(Forward_Index.ForwardIndexGenerator, "get_normalizer", StubNormalizer)
+    csv_path = tmp_path / "upload.csv"
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        writer.writerows(ROWS)
+    return csv_path
+
+
+def make_base_dir(path):
+    for directory in ("Preprocessing", "Forward_Index", "inverted_index/barrels"):
+        (path / directory).mkdir(parents=True)
+    return path
+
+
+def run_three_passes(base_dir, csv_path):
+    """
+    Index the upload with the separate lexicon, forward index and inverted index generators.
+    """
+    lexicon_path = base_dir / "Preprocessing" / "lexicon.csv"
+    # The constructor downloads NLTK corpora for an English word list that generate() never uses
+    lexicon_generator = LexiconGenerator.__new__(LexiconGenerator)
+    lexicon_generator.output_csv = str(lexicon_path)
+    lexicon_generator.normalizer = StubNormalizer()
+    lexicon_generator.generate(csv_path)
+
+    segments_dir = base_dir / "Forward_Index" / "segments"
+    new_forward_index = base_dir / "Forward_Index" / "New_forward_index.json"
+    ForwardIndexGenerator(str(csv_path), str(lexicon_path), str(base_dir / "Forward_Index" / "forward_index.json"),
+                          str(new_forward_index), segments_dir=str(segments_dir)).generate_forward_index()
+
+    new_inverted_index = base_dir / "inverted_index" / "New_Inverted.json"
+    InvertedIndexGenerator(str(new_forward_index), str(new_inverted_index)).generate()
+    BarrelManager(str(base_dir / "inverted_index" / "barrels")).update_barrels_with_json(str(new_inverted_index))
+
+
+def read_index(base_dir):
+    """
+    Read the lexicon, forward index and barrels of base_dir, with term IDs replaced by their words.
+    """
+    with open(base_dir / "Preprocessing" / "lexicon.csv", newline="") as file:
+        lexicon = {word: term_id for word, term_id in list(csv.reader(file))[1:]}
+    words = {term_id: word for word, term_id in lexicon.items()}
+
+    forward_index = {
+        doc_id: {words[term_id]: entry for term_id, entry in terms.items()}
+        for doc_id, terms in SegmentStore(str(base_dir / "Forward_Index" / "segments")).load_all().items()
+    }
+    barrels = BarrelManager(str(base_dir / "inverted_index" / "barrels"), cache=BarrelCache())
+    inverted_index = {word: list(barrels.query_term(term_id) or []) for word, term_id in lexicon.items()}
+    return set(lexicon), forward_index, inverted_index
+
+
+@pytest.mark.parametrize("chunksize, flush_postings, merges", [(5000, FusedIndexer.flush_postings, 1), (2, 5, 3)])
+def test_fused_indexer_matches_the_three_passes(tmp_path, upload, chunksize, flush_postings, merges):
+    run_three_passes(make_base_dir(tmp_path / "three_passes"), upload)
+
+    indexer = FusedIndexer(make_base_dir(tmp_path / "fused"))
+    indexer.flush_postings = flush_postings
+    update_barrels = indexer.barrel_manager.update_barrels
+    merged = []
+    indexer.barrel_manager.update_barrels = lambda index: merged.append(len(index)) or update_barrels(index)
+    assert indexer.index_csv(upload, chunksize=chunksize)["documents"] == len(ROWS)
+
+    # Term IDs of equally frequent words may be assigned in another order, so indexes are compared by word
+    expected_words, expected_forward, expected_inverted = read_index(tmp_path / "three_passes")
+    words, forward_index, inverted_index = read_index(tmp_path / "fused")
+    assert words == expected_words
+    assert forward_index == expected_forward
+    assert inverted_index == expected_inverted
+    # Small flush thresholds merge the buffered postings into the barrels chunk by chunk
+    assert len(merged) == merges
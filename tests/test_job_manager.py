@@ -0,0 +1,91 @@
+from concurrent.futures import Future
+
+from ingestion.ingestionQueue import IngestionQueue
+from ingestion.jobManager import IngestionJobManager
+
+
+class InlineExecutor:
+    """
+    Runs the pipeline stand-in in the calling thread.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.batches = []
+
+    def submit(self, _, base_dir, batch_path, *args):
+        self.batches.append(batch_path)
+        future = Future()
+        future.set_result(self.function(batch_path))
+        return future
+
+
+def make_manager(tmp_path, pipeline, on_complete=None):
+    # The worker thread and process pool are left out; run_batch is driven directly
+    manager = IngestionJobManager.__new__(IngestionJobManager)
+    manager.base_dir = tmp_path
+    manager.chunksize = 100
+    manager.on_complete = on_complete
+    manager.write_intermediate = False
+    manager.uploads_dir = tmp_path / "uploads"
+    manager.uploads_dir.mkdir()
+    (tmp_path / "data").mkdir()
+    manager.queue = IngestionQueue(tmp_path / "ingestion.db")
+    manager.executor = InlineExecutor(pipeline)
+    manager.progress = {}
+    return manager
+
+
+def upload(manager, name, text):
+    path = manager.uploads_dir / name
+    path.write_text(text)
+    return manager.queue.enqueue(path)
+
+
+def count_rows(batch_path):
+    with open(batch_path) as file:
+        return {"documents": sum(1 for _ in file) - 1}
+
+
+def test_bad_upload_fails_only_its_job(tmp_path):
+    manager = make_manager(tmp_path, count_rows)
+    good = upload(manager, "good.csv", "title,description\nEngineer,Builds things\n")
+    missing = upload(manager, "missing.csv", "name,location\nx,y\n")
+    unreadable = upload(manager, "unreadable.csv", "")
+
+    manager.run_batch(manager.queue.pending(10))
+
+    assert manager.queue.get(good)["status"] == "completed"
+    for job_id in (missing, unreadable):
+        job = manager.queue.get(job_id)
+        assert job["status"] == "failed"
+        assert job["batch_id"] is None
+    assert "title" in manager.queue.get(missing)["error"]
+    assert len(manager.executor.batches) == 1
+
+
+def test_failed_reload_does_not_fail_an_indexed_batch(tmp_path):
+    def reload():
+        raise RuntimeError("reload failed")
+
+    manager = make_manager(tmp_path, count_rows, on_complete=reload)
+    job_id = upload(manager, "good.csv", "title,description\nEngineer,Builds things\n")
+
+    manager.run_batch(manager.queue.pending(10))
+
+    job = manager.queue.get(job_id)
+    assert job["status"] == "completed"
+    assert job["error"] is None
+    assert not (manager.uploads_dir / "good.csv").exists()
+
+
+def test_batch_completes_after_the_reload(tmp_path):
+    statuses = []
+    manager = make_manager(tmp_path, count_rows, on_complete=lambda: statuses.append(manager.queue.get(job_id)["status"]))
+    job_id = upload(manager, "good.csv", "title,description\nEngineer,Builds things\n")
+
+    manager.run_batch(manager.queue.pending(10))
+
+    # A client polling the job only sees "completed" once the new documents are searchable
+    assert statuses and statuses[0] != "completed"
+    assert manager.queue.get(job_id)["status"] == "completed"
@@ -0,0 +1,64 @@
+import csv
+
+import pytest
+
+from Ranking.MetadataStore import MetadataStore
+
+COLUMNS = ["title", "description", "job_posting_url", "company_name", "location"]
+
+
+def write_postings(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    yield store
+    store.close()
+
+
+def test_build_from_csv_numbers_rows_from_zero(tmp_path, store):
+    postings = write_postings(tmp_path / "postings.csv", [
+        ["Python Engineer", "build pipelines", "https://jobs/0", "Acme", "Remote"],
+        ["Data Analyst", "dashboards", "https://jobs/1", "Globex", ""],
+    ])
+    store.build_from_csv(postings)
+    assert store.count() == 2
+    assert store.get_many([0, 1]) == {
+        0: {"title": "Python Engineer", "url": "https://jobs/0", "company": "Acme", "location": "Remote"},
+        1: {"title": "Data Analyst", "url": "https://jobs/1", "company": "Globex", "location": None},
+    }
+
+    # A populated store is not rebuilt, and a missing CSV leaves an empty store empty
+    write_postings(postings, [["Other", "", "", "", ""]])
+    store.build_from_csv(postings)
+    assert store.get_many([0])[0]["title"] == "Python Engineer"
+    empty = MetadataStore(tmp_path / "empty.db")
+    empty.build_from_csv(tmp_path / "missing.csv")
+    assert empty.count() == 0
+    empty.close()
+
+
+def test_append_csv_continues_from_the_first_doc_id(tmp_path, store):
+    upload = write_postings(tmp_path / "upload.csv", [
+        ["Rust Engineer", "", "https://jobs/7", "Initech", "Berlin"],
+        ["Java Developer", "", "https://jobs/8", "Acme", "Paris"],
+        ["Data Scientist", "", "https://jobs/9", "Globex", "London"],
+    ])
+    assert store.append_csv(upload, 7, chunksize=2) == 3
+    assert sorted(store.get_many(range(7, 10))) == [7, 8, 9]
+    assert store.get_many([9])[9]["company"] == "Globex"
+
+
+def test_missing_doc_ids_are_left_out(tmp_path, store):
+    upload = write_postings(tmp_path / "upload.csv", [["Python Engineer", "", "https://jobs/0", "Acme", "Remote"]])
+    store.append_csv(upload, 0)
+    assert store.get_many([0, 1, 600]) == {
+        0: {"title": "Python Engineer", "url": "https://jobs/0", "company": "Acme", "location": "Remote"},
+    }
+    assert store.get_many([]) == {}
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+from search.phraseSearch import PhraseSearch, count_phrase_matches, minimum_distance
+
+
+class StubNormalizer:
+    """
+    Lower-cases and splits on whitespace, standing in for the NLTK normalizer.
+    """
+
+    def normalize(self, text):
+        return text.lower().split()
+
+    def normalize_with_positions(self, text):
+        return [(word, pos) for pos, word in enumerate(text.lower().split())]
+
+
+class StubBarrels:
+    def __init__(self, documents):
+        # documents: {docID: "text"} -> postings per term ID
+        self.postings = {}
+        self.lexicon = {}
+        for doc_id, text in sorted(documents.items()):
+            positions = {}
+            for pos, word in enumerate(text.split()):
+                positions.setdefault(word, []).append(pos)
+            for word, word_positions in positions.items():
+                term_id = self.lexicon.setdefault(word, str(len(self.lexicon) + 1))
+                self.postings.setdefault(term_id, []).append(
+                    {"docID": str(doc_id), "frequency": len(word_positions), "positions": word_positions})
+
+    def query_term(self, term_id):
+        return self.postings.get(term_id)
+
+
+def phrase_search(query, documents):
+    barrels = StubBarrels(documents)
+    search = PhraseSearch(query, lexicon=barrels.lexicon, normalizer=StubNormalizer(), barrel_manager=barrels,
+                          spelling_index=None)
+    return sorted(int(doc_id) for doc_id in search.search()), search
+
+
+def test_count_phrase_matches():
+    assert count_phrase_matches([[0, 5, 9], [1, 6, 8]], [0, 1]) == 2
+    assert count_phrase_matches([[3], [2]], [0, 1]) == 0
+    # Offsets need not be consecutive, e.g. when a stopword was removed from the phrase
+    assert count_phrase_matches([[4], [6]], [0, 2]) == 1
+
+
+def test_count_phrase_matches_with_repeated_terms():
+    # "data data" in "data data data": starts at 0 and 1, overlapping
+    assert count_phrase_matches([[0, 1, 2], [0, 1, 2]], [0, 1]) == 2
+    assert count_phrase_matches([[0, 2], [0, 2]], [0, 1]) == 0
+    assert count_phrase_matches([[0, 1, 2], [0, 1, 2], [0, 1, 2]], [0, 1, 2]) == 1
+
+
+def test_count_phrase_matches_without_positions():
+    assert count_phrase_matches([[], [1]], [0, 1]) == 0
+    assert count_phrase_matches([[0], []], [0, 1]) == 0
+    assert count_phrase_matches([], []) == 0
+
+
+def test_minimum_distance():
+    assert minimum_distance([1, 10], [4, 12]) == 2
+    assert minimum_distance([7], [7]) == 0
+    assert minimum_distance([20], [3, 9]) == 11
+    assert minimum_distance([], [1]) == math.inf
+    assert minimum_distance([1], []) == math.inf
+
+
+@pytest.mark.parametrize("k, expected", [(1, []), (2, [1]), (3, [1, 2])])
+def test_near_includes_distance_exactly_k(k, expected):
+    # python and remote are 2 words apart in doc 1 and 3 words apart in doc 2
+    documents = {1: "python data remote", 2: "remote job for python", 3: "python only"}
+    assert phrase_search(f"python NEAR/{k} remote", documents)[0] == expected
+
+
+def test_near_boost_decreases_with_distance():
+    documents = {1: "python remote", 2: "python data remote"}
+    _, search = phrase_search("python NEAR/2 remote", documents)
+    assert search.proximity_boosts[1] > search.proximity_boosts[2] > 0
+
+
+def test_phrase_with_repeated_terms():
+    documents = {1: "data data engineer", 2: "data engineer data", 3: "data"}
+    matches, search = phrase_search('"data data"', documents)
+    assert matches == [1]
+    assert search.proximity_boosts[1] == PhraseSearch.phrase_boost
@@ -0,0 +1,35 @@
+from search.queryCache import QueryCache
+
+
+def test_query_cache_keys_include_the_index_generation():
+    cache = QueryCache()
+    cache.put(("python", 10, 0, True, 1), [{"doc_id": 1}])
+    assert cache.get(("python", 10, 0, True, 1)) == (True, [{"doc_id": 1}])
+    assert cache.get(("python", 10, 0, True, 2)) == (False, None)
+
+    cache.invalidate()
+    assert cache.get(("python", 10, 0, True, 1)) == (False, None)
+
+
+def test_query_cache_caches_empty_results_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("search.queryCache.time.monotonic", lambda: now[0])
+    cache = QueryCache(ttl_seconds=5)
+    cache.put(("missing", None, 0, True, 1), None)
+    assert cache.get(("missing", None, 0, True, 1)) == (True, None)
+    now[0] += 6
+    assert cache.get(("missing", None, 0, True, 1)) == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_query_cache_evicts_by_estimated_size():
+    hydrated = [{"doc_id": doc_id, "title": "python"} for doc_id in range(10)]
+    ranked = [(doc_id, 1.0) for doc_id in range(10)]
+    assert QueryCache.estimate_size(hydrated) > QueryCache.estimate_size(ranked) > QueryCache.estimate_size(None)
+
+    cache = QueryCache(max_bytes=2 * QueryCache.estimate_size(hydrated))
+    for page in range(3):
+        cache.put(("python", 10, page, True, 1), hydrated)
+    assert cache.get(("python", 10, 0, True, 1)) == (False, None)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,109 @@
+import random
+
+import numpy as np
+import pytest
+
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from inverted_index.BinaryBarrel import BlockPostingList
+from inverted_index.CollectionStatistics import CollectionStatistics
+from inverted_index.ImpactIndex import ImpactBarrelReader, term_weight
+from Ranking.ranking import DocumentRankingUtility
+
+TERMS = ["1", "2", "3", "4", "5", "160"]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    barrels_dir = tmp_path_factory.mktemp("barrels")
+    rng = random.Random(3)
+    manager = BarrelManager(str(barrels_dir), cache=BarrelCache())
+    # Two batches, so the impact files are rewritten against updated statistics
+    for documents in (range(0, 1500), range(1500, 2500)):
+        manager.update_barrels({
+            term: [{"docID": str(doc_id), "frequency": rng.randint(1, 9), "positions": [0]}
+                   for doc_id in documents if rng.random() < density]
+            for term, density in zip(TERMS, (0.01, 0.05, 0.2, 0.5, 0.9, 0.1))
+        })
+    return manager, CollectionStatistics.for_barrels(str(barrels_dir))
+
+
+def ranking_utility():
+    return DocumentRankingUtility(None, None)
+
+
+def union(term_postings):
+    results = {}
+    for term, postings in term_postings.items():
+        for posting in postings:
+            results.setdefault(int(posting["docID"]), {})[term] = {"frequency": posting["frequency"]}
+    return dict(sorted(results.items()))
+
+
+def test_impact_barrel_round_trip(index):
+    manager, statistics = index
+    for term in TERMS:
+        postings = manager.query_term(term)
+        impacts = manager.open_impacts(term)
+        _, count, max_frequency, min_length = impacts.find_entry(term)
+        assert count == len(postings) == statistics.document_frequency(term)
+
+        blocks = list(impacts.iter_blocks(term))
+        decoded = sorted(entry for _, _, block in blocks for entry in block)
+        assert decoded == sorted((int(p["docID"]), p["frequency"]) for p in postings)
+        assert (blocks[0][0], blocks[0][1]) == (max_frequency, min_length)
+
+        # Every block's bound covers its postings and never increases
+        average_length = statistics.average_length
+        previous = float("inf")
+        for block_frequency, block_length, block in blocks:
+            bound = term_weight(block_frequency, block_length, average_length)
+            assert bound <= previous
+            for doc_id, frequency in block:
+                length = statistics.lengths_for(np.array([doc_id]))[0]
+                assert term_weight(frequency, length, average_length) <= bound + 1e-12
+            previous = bound
+
+
+@pytest.mark.parametrize("top_k", [1, 10, 100])
+def test_impact_top_k_matches_exhaustive_bm25(index, top_k):
+    manager, statistics = index
+    utility = ranking_utility()
+    for term in TERMS:
+        postings = manager.query_term(term)
+        exhaustive = utility.rank_documents_bm25(postings, None, statistics, {term: len(postings)}, top_k=top_k,
+                                                 hydrate=False)
+        fast = utility.rank_term_by_impact(manager.open_impacts(term), term, statistics, top_k)
+        assert [doc_id for doc_id, _ in fast] == [doc_id for doc_id, _ in exhaustive]
+        assert [score for _, score in fast] == pytest.approx([score for _, score in exhaustive])
+
+
+@pytest.mark.parametrize("top_k", [1, 10, 100])
+@pytest.mark.parametrize("terms", [["1", "2"], ["1", "5"], ["2", "3", "4"], TERMS])
+def test_wand_matches_exhaustive_bm25(index, terms, top_k):
+    manager, statistics = index
+    utility = ranking_utility()
+    term_postings = {term: manager.query_term(term) for term in terms}
+    document_frequencies = {term: statistics.document_frequency(term) for term in terms}
+    upper_bounds = {term: manager.open_impacts(term).find_entry(term)[2:] for term in terms}
+
+    exhaustive = utility.rank_documents_bm25(union(term_postings), None, statistics, document_frequencies,
+                                             top_k=top_k, hydrate=False)
+    wand = utility.rank_disjunction_wand(term_postings, upper_bounds, statistics, top_k, document_frequencies)
+    assert [doc_id for doc_id, _ in wand] == [doc_id for doc_id, _ in exhaustive]
+    assert [score for _, score in wand] == pytest.approx([score for _, score in exhaustive])
+
+
+def test_wand_reads_frequencies_without_decoding_positions(index, monkeypatch):
+    manager, statistics = index
+    terms = ["2", "4", "160"]
+    term_postings = {term: manager.query_term(term) for term in terms}
+    upper_bounds = {term: manager.open_impacts(term).find_entry(term)[2:] for term in terms}
+    expected = ranking_utility().rank_disjunction_wand(term_postings, upper_bounds, statistics, 10)
+
+    def fail(self, offset):
+        raise AssertionError("positions decoded while scoring")
+
+    monkeypatch.setattr(BlockPostingList, "positions", fail)
+    term_postings = {term: manager.query_term(term) for term in terms}
+    assert ranking_utility().rank_disjunction_wand(term_postings, upper_bounds, statistics, 10) == expected
@@ -0,0 +1,132 @@
+import csv
+
+import pytest
+
+import search.searchEngine
+import search.spellingIndex
+from inverted_index.BarrelCache import BarrelCache
+from inverted_index.BarrelManager import BarrelManager
+from search.searchEngine import SearchEngine
+
+DOCUMENTS = [
+    "python data engineer remote",
+    "java data engineer",
+    "python developer intern python",
+    "senior data scientist python",
+    "engineer data python python python",
+    "rust engineer",
+    "data analyst",
+    "python engineer",
+]
+QUERIES = ["python", "data engineer", "python OR rust", "\"data engineer\"", "engineer NOT java", "pyhton"]
+
+
+class StubNormalizer:
+    """
+    Lower-cases and splits on whitespace, standing in for the NLTK normalizer.
+    """
+
+    def normalize(self, text):
+        return text.lower().split()
+
+    def normalize_with_positions(self, text):
+        return [(word, pos) for pos, word in enumerate(text.lower().split())]
+
+
+def write_index(base_dir, documents, first_doc_id=0, lexicon=None):
+    """
+    Index documents the way the pipeline does: append to the lexicon CSV and merge into the barrels.
+    """
+    lexicon = {} if lexicon is None else lexicon
+    index = {}
+    for doc_id, text in enumerate(documents, start=first_doc_id):
+        positions = {}
+        for pos, word in enumerate(text.split()):
+            positions.setdefault(word, []).append(pos)
+        for word, word_positions in positions.items():
+            term_id = lexicon.setdefault(word, str(len(lexicon)))
+            index.setdefault(term_id, []).append(
+                {"docID": str(doc_id), "frequency": len(word_positions), "positions": word_positions})
+
+    with open(base_dir / "Preprocessing" / "lexicon.csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Word", "Index"])
+        writer.writerows(lexicon.items())
+    BarrelManager(str(base_dir / "inverted_index" / "barrels"), cache=BarrelCache()).update_barrels(index)
+    return lexicon
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(search.searchEngine, "get_normalizer", StubNormalizer)
+    for directory in ("Preprocessing", "inverted_index/barrels", "data", "Ranking"):
+        (tmp_path / directory).mkdir(parents=True)
+    write_index(tmp_path, DOCUMENTS)
+    return tmp_path
+
+
+def test_reload_invalidates_cached_results(base_dir):
+    engine = SearchEngine(base_dir)
+    before = engine.search("rust")
+    assert [result["doc_id"] for result in before] == [5]
+    assert engine.search("rust") == before
+    assert engine.query_cache.stats()["hits"] == 1
+
+    generation = engine.generation
+    lexicon = dict(csv.reader(open(base_dir / "Preprocessing" / "lexicon.csv")))
+    lexicon.pop("Word")
+    write_index(base_dir, ["rust rust developer"], first_doc_id=len(DOCUMENTS), lexicon=lexicon)
+    engine.reload()
+
+    assert engine.generation == generation + 1
+    assert engine.query_cache.stats()["entries"] == 0
+    assert [result["doc_id"] for result in engine.search("rust")] == [len(DOCUMENTS), 5]
+
+
+def test_pages_concatenate_to_the_full_ranking(base_dir):
+    engine = SearchEngine(base_dir, cache_max_entries=0)
+    for query in QUERIES:
+        full = engine.search(query, hydrate=False)
+        assert full, query
+        pages = []
+        for offset in range(0, len(full) + 2, 2):
+            pages.extend(engine.search(query, top_k=2, offset=offset, hydrate=False) or [])
+        assert [doc_id for doc_id, _ in pages] == [doc_id for doc_id, _ in full]
+        assert [score for _, score in pages] == pytest.approx([score for _, score in full])
+
+
+def test_page_bounds(base_dir):
+    engine = SearchEngine(base_dir, cache_max_entries=0)
+    matches = len(engine.search("python", hydrate=False))
+    assert len(engine.search("python", top_k=matches + 10, hydrate=False)) == matches
+    assert len(engine.search("python", top_k=2, offset=matches - 1, hydrate=False)) == 1
+    assert engine.search("python", top_k=2, offset=matches, hydrate=False) == []
+    assert engine.search("python", top_k=2, offset=matches + 100, hydrate=False) == []
+
+
+def test_batch_matches_single_queries(base_dir):
+    engine = SearchEngine(base_dir, cache_max_entries=0)
+    queries = QUERIES + ["python"]
+    for top_k in (None, 3):
+        batch = engine.search_batch(queries, top_k=top_k)
+        assert batch == [engine.search(query, top_k=top_k) for query in queries]
+
+
+def test_reload_loads_the_persisted_spelling_index(base_dir, monkeypatch):
+    engine = SearchEngine(base_dir)
+    assert (base_dir / "Preprocessing" / "spelling_index.json").exists()
+
+    lexicon = dict(csv.reader(open(base_dir / "Preprocessing" / "lexicon.csv")))
+    lexicon.pop("Word")
+    write_index(base_dir, ["golang developer"], first_doc_id=len(DOCUMENTS), lexicon=lexicon)
+    # The pipeline writes the spelling index next to the lexicon; reload must not rebuild it
+    search.spellingIndex.write_spelling_index(
+        base_dir / "Preprocessing" / "lexicon.csv", base_dir / "Preprocessing" / "spelling_index.json")
+
+    def fail(*args):
+        raise AssertionError("spelling index rebuilt on reload")
+
+    monkeypatch.setattr(search.spellingIndex, "write_spelling_index", fail)
+    engine.reload()
+    assert engine._snapshot.spelling_index.closest("golang") == "golang"
+    assert engine._snapshot.spelling_index.closest("golagn") == "golang"
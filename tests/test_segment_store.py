@@ -0,0 +1,42 @@
+from Forward_Index.SegmentStore import SegmentStore
+
+
+def entries(first, count):
+    return {str(doc_id): {"1": {"frequency": 1, "positions": [doc_id]}} for doc_id in range(first, first + count)}
+
+
+def test_compact_merges_small_segments(tmp_path):
+    store = SegmentStore(tmp_path)
+    for first in (0, 2, 4):
+        store.write_segment(entries(first, 2))
+
+    assert store.compact(min_docs=10) == 2
+    assert len(store.manifest["segments"]) == 1
+    assert store.load_all() == entries(0, 6)
+
+
+def test_compaction_by_one_store_is_seen_by_another(tmp_path):
+    first_store = SegmentStore(tmp_path)
+    for first in (0, 2, 4):
+        first_store.write_segment(entries(first, 2))
+    second_store = SegmentStore(tmp_path)
+
+    first_store.compact(min_docs=10)
+    second_store.write_segment(entries(6, 2))
+
+    assert SegmentStore(tmp_path).load_all() == entries(0, 8)
+    names = [segment["name"] for segment in SegmentStore(tmp_path).manifest["segments"]]
+    assert len(names) == len(set(names)) == 2
+
+
+def test_iteration_survives_a_concurrent_compaction(tmp_path):
+    reader = SegmentStore(tmp_path)
+    for first in (0, 2, 4):
+        reader.write_segment(entries(first, 2))
+
+    documents = reader.iter_documents()
+    seen = dict([next(documents)])
+    SegmentStore(tmp_path).compact(min_docs=10)
+    seen.update(documents)
+
+    assert seen == entries(0, 6)
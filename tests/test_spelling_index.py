@@ -0,0 +1,53 @@
+from search.spellingIndex import SpellingIndex, bounded_edit_distance, write_spelling_index
+
+WORDS = ["python", "data", "engineer", "engineering", "java", "pythonista"]
+
+
+def test_lookup_prefers_the_closest_and_most_frequent_word():
+    index = SpellingIndex(WORDS)
+    assert index.lookup("python") == [("python", 0)]
+    assert index.lookup("pyhton") == [("python", 1)]
+    assert index.lookup("engneer", top_k=2) == [("engineer", 1)]
+    assert index.closest("jav") == "java"
+    # "dava" is one edit from both "data" and "java"; the earlier (more frequent) word wins
+    assert index.lookup("dava", top_k=2) == [("data", 1), ("java", 1)]
+
+
+def test_lookup_respects_max_distance():
+    index = SpellingIndex(WORDS, max_distance=2)
+    assert index.lookup("pthn") == [("python", 2)]
+    assert index.lookup("pthn", max_distance=1) == []
+    assert index.lookup("thn") == []
+    # A larger per-lookup distance is capped at the index's own bound
+    assert index.lookup("thn", max_distance=3) == []
+    assert bounded_edit_distance("thn", "python", 2) is None
+    assert bounded_edit_distance("thn", "python", 3) == 3
+
+
+def test_only_the_prefix_generates_deletes():
+    index = SpellingIndex(WORDS, prefix_length=3)
+    assert all(len(delete) <= 3 for delete in index.deletes)
+    # Typos past the prefix are still found, and the distance covers the whole word
+    assert index.lookup("engineerinx") == [("engineering", 1)]
+    assert index.lookup("pythonistx") == [("pythonista", 1)]
+    # Sharing the prefix is not enough: the full word must be within max_distance
+    assert index.lookup("pytxxxxxxx") == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SpellingIndex(WORDS, max_distance=1, prefix_length=4)
+    index.save(tmp_path / "spelling_index.json", source_signature=[10, 20])
+    loaded, source = SpellingIndex.load(tmp_path / "spelling_index.json")
+    assert source == [10, 20]
+    assert (loaded.words, loaded.max_distance, loaded.prefix_length) == (WORDS, 1, 4)
+    for word in ("pyhton", "dat", "engineerinx", "thn"):
+        assert loaded.lookup(word, top_k=3) == index.lookup(word, top_k=3)
+
+
+def test_write_spelling_index_orders_words_by_term_id(tmp_path):
+    lexicon_path = tmp_path / "lexicon.csv"
+    lexicon_path.write_text("Word,Index\njava,2\npython,1\ndata,3\n")
+    assert write_spelling_index(lexicon_path, tmp_path / "spelling_index.json") == 3
+    loaded, source = SpellingIndex.load(tmp_path / "spelling_index.json")
+    assert loaded.words == ["python", "java", "data"]
+    assert source == SpellingIndex.file_signature(lexicon_path)